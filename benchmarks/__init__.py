@@ -0,0 +1,13 @@
+"""
+benchmarks
+~~~~~~~~~~
+
+Performance benchmarks for grigri's hot paths. Run them with::
+
+    python -m benchmarks run --scale small --output before.json
+    python -m benchmarks compare before.json after.json
+
+Every benchmark builds its input with the deterministic generators in
+:mod:`benchmarks.generators`, so two runs at the same scale time exactly the
+same work and their JSON results can be compared between commits.
+"""
@@ -0,0 +1,68 @@
+"""
+Command line entry point::
+
+    python -m benchmarks run [--scale small] [--match queues] [--output out.json]
+    python -m benchmarks compare before.json after.json [--threshold 0.1]
+"""
+
+import argparse
+import sys
+
+from . import harness
+from . import (bench_dates, bench_import, bench_io, bench_queues,  # registers them
+               bench_tseries)
+
+
+def _print_result(name, result):
+    if 'error' in result:
+        print('%-40s ERROR %s' % (name, result['error']))
+    else:
+        print('%-40s %10.4fs  %10.1f MB' % (name, result['seconds'], 
+                                            result['peak_memory'] / 1e6))
+
+def _seconds(value):
+    return 'ERROR' if value is None else '%.4fs' % value
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command')
+
+    run = commands.add_parser('run', help='run benchmarks')
+    run.add_argument('--scale', choices=list(harness.SCALES), default='small')
+    run.add_argument('--match', help='only run benchmarks containing this')
+    run.add_argument('--repeat', type=int, default=5)
+    run.add_argument('--output', help='write results as JSON to this file')
+
+    compare = commands.add_parser('compare', help='compare two result files')
+    compare.add_argument('before')
+    compare.add_argument('after')
+    compare.add_argument('--threshold', type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        report = harness.run(args.scale, match=args.match, repeat=args.repeat,
+                             log=_print_result)
+        if args.output:
+            harness.save(report, args.output)
+        return 0
+
+    if args.command == 'compare':
+        rows = harness.compare(harness.load(args.before), 
+                               harness.load(args.after), args.threshold)
+        for name, old, new, ratio, status in rows:
+            if ratio is None:
+                print('%-40s %11s -> %11s         %s' % (
+                      name, _seconds(old), _seconds(new), status))
+            else:
+                print('%-40s %10.4fs -> %10.4fs  x%.2f  %s' % (
+                      name, old, new, ratio, status))
+        # non-zero exit so CI can flag regressions, including benchmarks
+        # that don't run anymore
+        return 1 if any(row[-1] in ('slower', 'error') for row in rows) else 0
+
+    parser.print_help()
+    return 2
+
+if __name__ == '__main__':
+    sys.exit(main())
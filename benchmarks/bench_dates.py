@@ -0,0 +1,38 @@
+"""Benchmarks for :mod:`grigri.dates`."""
+
+from datetime import datetime, timedelta
+
+from grigri import dates
+
+from . import generators
+from .harness import benchmark
+
+
+def _days(n):
+    start = datetime(2013, 1, 1)
+    return [start + timedelta(hours=7 * i) for i in range(n)]
+
+@benchmark('dates.first_of')
+def first_of(scale):
+    days = _days(2000 * scale)
+    return lambda: [dates.first_of(dt, 'q') for dt in days]
+
+@benchmark('dates.end_of')
+def end_of(scale):
+    days = _days(2000 * scale)
+    return lambda: [dates.end_of(dt, 'm') for dt in days]
+
+@benchmark('dates.prorate')
+def prorate(scale):
+    days = _days(500 * scale)
+    return lambda: [dates.prorate(dt, 'm') for dt in days]
+
+@benchmark('dates.swing_range')
+def swing_range(scale):
+    days = _days(200 * scale)
+    return lambda: [dates.swing_range(-30, dt) for dt in days]
+
+@benchmark('dates.period_ordinals')
+def period_ordinals(scale):
+    events = generators.queue_events(100000 * scale)
+    return lambda: dates.period_ordinals(events['Created'], 'w')
@@ -0,0 +1,43 @@
+"""Benchmarks for how long importing grigri's modules takes."""
+
+import subprocess
+import sys
+
+from .harness import benchmark
+
+
+def _import(module):
+    # a fresh interpreter each time, otherwise everything after the first
+    # run is already in sys.modules
+    command = [sys.executable, '-c', 'import %s' % module]
+    return lambda: subprocess.check_call(command)
+
+@benchmark('import.python')
+def import_python(scale):
+    # baseline: interpreter startup alone
+    return _import('sys')
+
+@benchmark('import.grigri.math')
+def import_math(scale):
+    return _import('grigri.math')
+
+@benchmark('import.grigri.dates')
+def import_dates(scale):
+    return _import('grigri.dates')
+
+@benchmark('import.grigri.tools')
+def import_tools(scale):
+    return _import('grigri.tools')
+
+@benchmark('import.grigri.queues')
+def import_queues(scale):
+    return _import('grigri.queues')
+
+@benchmark('import.grigri.transforms')
+def import_transforms(scale):
+    return _import('grigri.transforms')
+
+@benchmark('import.pandas')
+def import_pandas(scale):
+    # what the grigri modules used to pay up front
+    return _import('pandas')
@@ -0,0 +1,52 @@
+"""
+Benchmarks for :mod:`grigri.io.sql`, using sqlite3 as a stand-in for SQL 
+Server, and :mod:`grigri.io.stream`.
+"""
+
+import io
+import sqlite3
+
+from grigri.io import sql, stream
+
+from . import generators
+from .harness import benchmark
+
+
+@benchmark('io.read_frame')
+def read_frame(scale):
+    conn, statement = generators.sqlite_result_set(2000 * scale)
+    return lambda: sql.read_frame(statement, conn)
+
+@benchmark('io.coerce_dtypes')
+def coerce_dtypes(scale):
+    frame = generators.wide_frame(5000 * scale)
+    raw = frame.astype(object)
+    types = {'f': float, 'i': int, 'M': sql.datetime, 'O': str}
+    columns = {col: types[frame[col].dtype.kind] for col in frame.columns}
+    return lambda: sql.coerce_dtypes(raw.copy(), columns)
+
+@benchmark('io.write_frame')
+def write_frame(scale):
+    frame = generators.wide_frame(2000 * scale, columns=20)
+    conn = sqlite3.connect(':memory:')
+    conn.execute(generators.empty_table_sql('results', frame))
+
+    def write():
+        sql.write_frame(frame, conn, 'results')
+        conn.execute('DELETE FROM results')
+
+    return write
+
+@benchmark('io.write_ndjson')
+def write_ndjson(scale):
+    frame = generators.wide_frame(2000 * scale, columns=20)
+    return lambda: stream.write_ndjson(frame, io.StringIO())
+
+@benchmark('io.read_ndjson')
+def read_ndjson(scale):
+    frame = generators.wide_frame(2000 * scale, columns=20)
+    types = stream.column_types(frame)
+    buf = io.StringIO()
+    stream.write_ndjson(frame, buf)
+    text = buf.getvalue()
+    return lambda: stream.read_ndjson(io.StringIO(text), types)
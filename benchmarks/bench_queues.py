@@ -0,0 +1,56 @@
+"""Benchmarks for :mod:`grigri.queues`."""
+
+import numpy as np
+import pandas as pd
+
+from grigri import queues
+
+from . import generators
+from .harness import benchmark
+
+
+@benchmark('queues.flow_extract')
+def flow_extract(scale):
+    events = generators.queue_events(20000 * scale)
+    return lambda: queues.flow_extract(events, 'Created')
+
+@benchmark('queues.flow_extract_weighted')
+def flow_extract_weighted(scale):
+    events = generators.queue_events(20000 * scale)
+    return lambda: queues.flow_extract(events, 'Created', 'Weight')
+
+@benchmark('queues.queues')
+def queue_metrics(scale):
+    events = generators.queue_events(20000 * scale)
+    closed = events.dropna(subset=['Closed'])
+    return lambda: queues.queues(events, closed, current_backlog=100)
+
+@benchmark('queues.backlog')
+def backlog(scale):
+    events = generators.queue_events(20000 * scale)
+    inflows = queues.flow_extract(events, 'Created')
+    outflows = queues.flow_extract(events.dropna(subset=['Closed']), 'Closed')
+    return lambda: queues.backlog(inflows, outflows)
+
+@benchmark('queues.wait')
+def wait(scale):
+    events = generators.queue_events(20000 * scale)
+    inflows = queues.flow_extract(events, 'Created')
+    outflows = queues.flow_extract(events.dropna(subset=['Closed']), 'Closed')
+    return lambda: queues.wait(inflows, outflows)
+
+@benchmark('queues.forecast_backlog')
+def forecast_backlog(scale):
+    index = pd.date_range('2013-01-01', periods=365)
+    random_state = np.random.RandomState(0)
+    arrivals = pd.Series(random_state.poisson(50, 365).astype(float), index)
+    throughput = pd.Series(random_state.poisson(48, 365).astype(float), index)
+    return lambda: queues.forecast_backlog(arrivals, throughput, 200, 
+                                           periods=90, paths=1000 * scale,
+                                           seed=0)
+
+@benchmark('queues.flow_extract.EventLog')
+def flow_extract_event_log(scale):
+    events = generators.queue_events(20000 * scale)
+    log = queues.EventLog.from_frame(events, 'Created', 'Closed')
+    return lambda: queues.flow_extract(log, 'Created')
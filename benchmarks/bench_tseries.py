@@ -0,0 +1,80 @@
+"""Benchmarks for :mod:`grigri.tseries` and :mod:`grigri.constructors`."""
+
+import numpy as np
+import pandas as pd
+
+from grigri import constructors, tseries
+from grigri.dates import ordinal_dates
+
+from . import generators
+from .harness import benchmark
+
+
+@benchmark('tseries.group_resample')
+def group_resample(scale):
+    frame = generators.grouped_tseries(20000 * scale)
+    return lambda: tseries.group_resample(frame, 'Date', groupby='Group', 
+                                          value_column='Value', how='sum')
+
+@benchmark('tseries.count_timestamps')
+def count_timestamps(scale):
+    events = generators.queue_events(100000 * scale)
+    return lambda: tseries.count_timestamps(events['Created'])
+
+@benchmark('tseries.resample_reindex')
+def resample_reindex(scale):
+    frame = generators.grouped_tseries(100000 * scale)
+    series = pd.Series(frame['Value'].values, index=frame['Date'].values)
+    new_index = pd.date_range('2013-01-01', '2013-12-31')
+    return lambda: tseries.resample_reindex(series, new_index, how='sum')
+
+@benchmark('tseries.partition_tseries')
+def partition_tseries(scale):
+    frame = generators.grouped_tseries(100000 * scale)
+    series = pd.Series(frame['Value'].values, 
+                       index=frame['Date'].values).sort_index()
+    month_ends = ordinal_dates(np.arange(12) + 516, 'm', label='end')
+    return lambda: tseries.partition_tseries(series, month_ends)
+
+@benchmark('tseries.Rollup')
+def rollup(scale):
+    frame = generators.grouped_tseries(100000 * scale)
+    return lambda: tseries.Rollup(frame, 'Date', 'Value', groupby='Group')
+
+@benchmark('tseries.Rollup.resample')
+def rollup_resample(scale):
+    frame = generators.grouped_tseries(100000 * scale)
+    rollup = tseries.Rollup(frame, 'Date', 'Value', groupby='Group')
+    # every reporting frequency from the same partials
+    return lambda: [rollup.resample(freq, how='mean') 
+                    for freq in ('d', 'w', 'm', 'q', 'y')]
+
+@benchmark('tseries.group_resample.nunique')
+def group_resample_nunique(scale):
+    frame = generators.grouped_tseries(100000 * scale)
+    frame['Customer'] = np.random.RandomState(0).randint(0, 20000, len(frame))
+    return lambda: tseries.group_resample(frame, 'Date', 'Group', 
+                                          value_column='Customer', freq='w',
+                                          how='nunique')
+
+@benchmark('tseries.group_resample.nunique_approximate')
+def group_resample_nunique_approximate(scale):
+    frame = generators.grouped_tseries(100000 * scale)
+    frame['Customer'] = np.random.RandomState(0).randint(0, 20000, len(frame))
+    return lambda: tseries.group_resample(frame, 'Date', 'Group', 
+                                          value_column='Customer', freq='w',
+                                          how='nunique', approximate=True)
+
+@benchmark('constructors.amortize')
+def amortize(scale):
+    rng = np.random.RandomState(0)
+    n = 50000 * scale
+    starts = np.datetime64('2013-01-01') + rng.randint(0, 365, n)
+    ends = starts + rng.randint(0, 730, n)
+    values = rng.gamma(2., 500., n)
+    return lambda: constructors.amortize(values, starts, ends, freq='m')
+
+@benchmark('constructors.cartesion_index')
+def cartesion_index(scale):
+    levels = [range(10), range(10), range(5), range(4), range(50 * scale)]
+    return lambda: constructors.cartesion_index(*levels)
@@ -0,0 +1,131 @@
+"""
+benchmarks.generators
+~~~~~~~~~~~~~~~~~~~~~
+
+Deterministic synthetic data sets shaped like the data grigri is used on.
+Every generator takes a `seed` so the same arguments always produce the same
+data.
+"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+
+def queue_events(n, start='2013-01-01', days=365, groups=10, 
+                 open_fraction=0.1, seed=0):
+    """
+    Returns a queue event log with one row per job: a `Created` timestamp, a 
+    `Closed` timestamp (NaT for jobs still in the queue), a `Weight` and a 
+    `Group`.
+
+    :param n: Number of jobs.
+    :param start: First day jobs can be created.
+    :param days: Number of days jobs are created over.
+    :param groups: Number of distinct groups.
+    :param open_fraction: Share of jobs that haven't been closed yet.
+    :param seed: Random seed.
+    """
+
+    rng = np.random.RandomState(seed)
+
+    start = np.datetime64(pd.Timestamp(start).to_datetime64(), 's')
+    created = start + rng.randint(0, days * 86400, n).astype('timedelta64[s]')
+    # wait times are roughly exponential with a mean of 3 days
+    waits = (rng.exponential(3 * 86400, n)).astype('timedelta64[s]')
+    closed = created + waits
+    closed[rng.rand(n) < open_fraction] = np.datetime64('NaT')
+
+    return pd.DataFrame({
+        'Created': created.astype('datetime64[ns]'),
+        'Closed': closed.astype('datetime64[ns]'),
+        'Weight': rng.gamma(2., 2., n),
+        'Group': np.array(['group_%d' % i for i in range(groups)], 
+                          dtype=object)[rng.randint(0, groups, n)],
+    })
+
+def grouped_tseries(n, groups=10, start='2013-01-01', days=365, seed=0):
+    """
+    Returns a long DataFrame of timestamped values belonging to groups, the
+    input shape of :func:`grigri.tseries.group_resample`.
+
+    :param n: Number of rows.
+    :param groups: Number of distinct groups.
+    :param start: First day of the time-series.
+    :param days: Number of days the rows are spread over.
+    :param seed: Random seed.
+    """
+
+    events = queue_events(n, start=start, days=days, groups=groups, 
+                          open_fraction=0., seed=seed)
+
+    return pd.DataFrame({
+        'Group': events['Group'],
+        'Date': events['Created'],
+        'Value': events['Weight'],
+    })
+
+def wide_frame(rows, columns=50, seed=0):
+    """
+    Returns a DataFrame mixing float, integer, string and datetime columns, 
+    cycling through the types until there are `columns` columns.
+
+    :param rows: Number of rows.
+    :param columns: Number of columns.
+    :param seed: Random seed.
+    """
+
+    rng = np.random.RandomState(seed)
+    start = np.datetime64('2013-01-01T00:00:00')
+
+    data = {}
+    for i in range(columns):
+        kind = i % 4
+        if kind == 0:
+            values = rng.randn(rows)
+        elif kind == 1:
+            values = rng.randint(0, 1000000, rows)
+        elif kind == 2:
+            values = np.array(['value_%d' % x for x in rng.randint(0, 1000, rows)],
+                              dtype=object)
+        else:
+            values = (start + rng.randint(0, 365 * 86400, rows)
+                      .astype('timedelta64[s]')).astype('datetime64[ns]')
+        data['Column%d' % i] = values
+
+    return pd.DataFrame(data, columns=['Column%d' % i for i in range(columns)])
+
+def sqlite_result_set(rows, columns=50, seed=0):
+    """
+    Returns an in-memory sqlite3 connection with a `results` table filled by
+    :func:`wide_frame`, and the SQL statement to read it back. This stands 
+    in for a SQL Server connection when timing :func:`read_frame`.
+
+    :param rows: Number of rows.
+    :param columns: Number of columns.
+    :param seed: Random seed.
+    """
+
+    frame = wide_frame(rows, columns=columns, seed=seed)
+
+    conn = sqlite3.connect(':memory:')
+    conn.execute(empty_table_sql('results', frame))
+
+    records = frame.astype(object).values.tolist()
+    wildcards = ','.join(['?'] * len(frame.columns))
+    conn.executemany('INSERT INTO results VALUES (%s)' % wildcards, 
+                     [[str(v) if isinstance(v, pd.Timestamp) else v 
+                       for v in row] for row in records])
+    conn.commit()
+
+    return conn, 'SELECT * FROM results'
+
+def empty_table_sql(table, frame):
+    """Returns a CREATE TABLE statement with one column per frame column."""
+
+    types = {'f': 'REAL', 'i': 'INTEGER', 'M': 'TIMESTAMP'}
+    columns = ['[%s] %s' % (col, types.get(frame[col].dtype.kind, 'TEXT'))
+               for col in frame.columns]
+
+    return 'CREATE TABLE [%s] (%s)' % (table, ', '.join(columns))
@@ -0,0 +1,173 @@
+"""
+benchmarks.harness
+~~~~~~~~~~~~~~~~~~
+
+Registry, timer and JSON reporting for the benchmarks.
+
+A benchmark is a function that takes a scale multiplier, builds its input and
+returns a zero-argument callable doing the work to be timed::
+
+    @benchmark('queues.flow_extract')
+    def flow_extract(scale):
+        events = generators.queue_events(10000 * scale)
+        return lambda: queues.flow_extract(events, 'Created')
+
+Only the returned callable is measured, so generating data never counts
+towards the timings.
+"""
+
+import gc
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from collections import OrderedDict
+
+
+SCALES = OrderedDict([
+    ('small', 1),
+    ('medium', 10),
+    ('large', 100),
+])
+
+_registry = OrderedDict()
+
+
+def benchmark(name):
+    """Registers a benchmark setup function under `name`."""
+
+    def decorator(setup):
+        _registry[name] = setup
+        return setup
+
+    return decorator
+
+def measure(func, repeat=5):
+    """
+    Times `func` and returns a dictionary with the best and median wall time
+    in seconds over `repeat` runs plus the peak memory, in bytes, allocated 
+    during one extra run.
+
+    Peak memory is measured on its own run because tracing allocations slows
+    everything down.
+    """
+
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+
+    return {
+        'seconds': timings[0],
+        'median': timings[len(timings) // 2],
+        'repeat': repeat,
+        'peak_memory': peak,
+    }
+
+def run(scale='small', match=None, repeat=5, log=None):
+    """
+    Runs every registered benchmark (or the ones whose name contains `match`)
+    and returns the results along with details about the environment.
+
+    A benchmark that raises is recorded with its error instead of stopping 
+    the run.
+    """
+
+    multiplier = SCALES[scale]
+    results = OrderedDict()
+
+    for name, setup in _registry.items():
+        if match and match not in name:
+            continue
+
+        try:
+            results[name] = measure(setup(multiplier), repeat=repeat)
+        except Exception as e:
+            results[name] = {'error': '%s: %s' % (type(e).__name__, e)}
+
+        if log is not None:
+            log(name, results[name])
+
+    return {'environment': environment(scale), 'results': results}
+
+def environment(scale):
+    """Versions and commit the benchmarks ran against."""
+
+    import numpy
+    import pandas
+
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], 
+                                         stderr=subprocess.DEVNULL)
+        commit = commit.decode('ascii').strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'scale': scale,
+        'python': platform.python_version(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'machine': platform.machine(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+def save(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def compare(before, after, threshold=0.1):
+    """
+    Compares two reports and returns a list of ``(name, before, after, 
+    ratio, status)`` rows, where `status` is 'slower' or 'faster' if the 
+    best time changed by more than `threshold` (a fraction), and 'same' 
+    otherwise.
+
+    A benchmark that raised in `after` has status 'error' (and None for its
+    time and ratio): a code path that stopped running is a regression, not
+    something to skip. One that raised in `before` only is 'fixed'.
+    """
+
+    rows = []
+    for name, new in after['results'].items():
+        old = before['results'].get(name)
+        if old is None:
+            continue
+
+        old_seconds = old.get('seconds')
+        if 'error' in new:
+            rows.append((name, old_seconds, None, None, 'error'))
+            continue
+        if 'error' in old:
+            rows.append((name, None, new['seconds'], None, 'fixed'))
+            continue
+
+        ratio = new['seconds'] / old['seconds'] if old['seconds'] else float('inf')
+        if ratio > 1 + threshold:
+            status = 'slower'
+        elif ratio < 1 - threshold:
+            status = 'faster'
+        else:
+            status = 'same'
+
+        rows.append((name, old['seconds'], new['seconds'], ratio, status))
+
+    return rows
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+    grigri._lazy
+    ~~~~~~~~~~~~~~~~~~
+
+    Deferred imports. Importing pandas (and numpy and dateutil with it) takes
+    a good fraction of a second, which is wasted on short-lived jobs that only
+    need e.g. :mod:`grigri.math`. Modules bind their heavy dependencies with
+    :class:`LazyModule` instead::
+
+        pd = LazyModule('pandas')
+
+    and the real import only happens the first time an attribute like
+    ``pd.Series`` is looked up.
+"""
+
+import importlib
+
+
+class LazyModule(object):
+    """
+    Stand-in for a module that imports it on first attribute access. After
+    that the module's attributes are copied onto the stand-in so lookups are
+    as fast as on the module itself.
+
+    :param name: Absolute name of the module e.g. 'pandas.tseries.offsets'.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_lazy_name'] = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__dict__['_lazy_name'])
+        self.__dict__.update(module.__dict__)
+        # attributes handled by a module-level __getattr__ aren't in its
+        # __dict__, so always answer from the module itself
+        return getattr(module, attr)
+
+    def __repr__(self):
+        return '<LazyModule %r>' % self.__dict__['_lazy_name']
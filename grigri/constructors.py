@@ -9,9 +9,15 @@
 
 import itertools
 
-import pandas as pd
+from ._lazy import LazyModule
+from .dates.ordinal import period_ordinals, ordinal_dates
+from .instrument import instrumented
 
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
 
+
+@instrumented
 def straight_line(value, date_range, cumsum=True):
     """
     Amortizes a value across a date range using a straight-line method.
@@ -36,21 +42,333 @@ def straight_line(value, date_range, cumsum=True):
 
     return straight_line
 
-def cartesion_index(*args, names=None):
+@instrumented
+def amortize(values, starts, ends, groups=None, freq='d', 
+             method='straight_line', cumsum=False, label='end'):
+    """
+    Bulk version of :func:`straight_line`. Amortizes many values, each over 
+    its own date range, and returns the combined schedule.
+
+    :param values: Array-like of amounts to amortize.
+    :param starts: Array-like of first dates of each amortization period.
+    :param ends: Array-like of last dates (inclusive) of each amortization 
+                 period. Neither `starts` nor `ends` may contain nulls.
+    :param groups: Optional array-like of group keys e.g. product line. If 
+                   given, returns a DataFrame with one column per group.
+    :param freq: Frequency of the returned schedule: 'd', 'w', 'm', 'q' or 
+                 'y'.
+    :param method: 'straight_line' spreads each value evenly over the 
+                   periods it touches, the same as calling 
+                   :func:`straight_line` with a date range of frequency 
+                   `freq`. 'prorata' spreads each value evenly over its days
+                   and totals them per period, so e.g. a partial month only 
+                   gets its share of days.
+    :param cumsum: If `True` return the schedule as a cumulative sum.
+    :param label: Label each period by its 'start' or 'end' day.
+
+    >>> amortize([1200, 310], ['2013-01-01', '2013-03-01'], 
+    ...          ['2013-12-31', '2013-03-31'], freq='m').head(3)
+    2013-01-31    100
+    2013-02-28    100
+    2013-03-31    410
+    Freq: M, dtype: float64
+
+    .. note::
+        Rather than building one Series per value, each value adds its 
+        per-period amount at its first period and subtracts it after its 
+        last in a difference array, which is then cumulatively summed. This
+        takes O(values + periods) time no matter how long each range is.
+    """
+
+    if method not in ('straight_line', 'prorata'):
+        raise ValueError("Method not recognized: {}".format(method))
+
+    values = np.asarray(values, dtype=float)
+    starts = pd.to_datetime(starts)
+    ends = pd.to_datetime(ends)
+
+    # a NaT would turn into a period billions of days away and the schedule
+    # into an array nobody has the memory for
+    if pd.isnull(starts).any() or pd.isnull(ends).any():
+        raise ValueError("Amortization periods must have a start and end "
+                         "date, got a null")
+
+    # pro-rata works out a daily schedule first and totals it up by period
+    unit = 'd' if method == 'prorata' else freq
+
+    first = period_ordinals(starts, unit)
+    last = period_ordinals(ends, unit)
+
+    if (last < first).any():
+        raise ValueError("Amortization periods must end on or after their "
+                         "start date")
+
+    if groups is None:
+        codes, keys = np.zeros(len(values), dtype=np.int64), None
+    else:
+        codes, keys = pd.factorize(np.asarray(groups), sort=True)
+
+    n_groups = 1 if keys is None else len(keys)
+
+    if not len(values):
+        index = pd.DatetimeIndex([])
+        if keys is None:
+            return pd.Series([], index=index, dtype=float)
+        return pd.DataFrame(index=index, columns=keys, dtype=float)
+
+    origin = first.min()
+    n = last.max() - origin + 1
+
+    # one row per group of the difference array, with an extra column for 
+    # amounts stopping after the last period
+    rate = values / (last - first + 1)
+    offset = codes * (n + 1)
+    diff = (np.bincount(offset + first - origin, weights=rate, 
+                        minlength=n_groups * (n + 1)) -
+            np.bincount(offset + last - origin + 1, weights=rate, 
+                        minlength=n_groups * (n + 1)))
+
+    schedule = diff.reshape(n_groups, n + 1).cumsum(axis=1)[:, :n]
+    periods = np.arange(origin, origin + n)
+
+    if unit != freq:
+        days = ordinal_dates(periods, 'd')
+        ordinals = period_ordinals(days, freq)
+
+        # days are consecutive, so each period is a contiguous run of days
+        boundaries = np.flatnonzero(np.diff(ordinals)) + 1
+        boundaries = np.concatenate([[0], boundaries])
+        schedule = np.add.reduceat(schedule, boundaries, axis=1)
+        periods = ordinals[boundaries]
+
+    if cumsum:
+        schedule = schedule.cumsum(axis=1)
+
+    index = ordinal_dates(periods, freq, label=label)
+
+    if keys is None:
+        return pd.Series(schedule[0], index=index)
+
+    return pd.DataFrame(schedule.T, index=index, columns=keys)
+
+def _product_codes(sizes):
+    """
+    Returns one integer array per level numbering the position of each 
+    level's value in every row of the cartesian product of `sizes`.
+    """
+
+    total = int(np.prod(sizes)) if len(sizes) else 0
+    if total == 0:
+        return [np.zeros(0, dtype=np.int64) for _ in sizes]
+
+    codes = []
+    repeats = total
+    for size in sizes:
+        # each value of this level repeats once for every combination of 
+        # the levels after it, and that block tiles across the levels before
+        repeats //= size
+        block = np.repeat(np.arange(size), repeats)
+        codes.append(np.tile(block, total // (size * repeats)))
+
+    return codes
+
+def _multi_index(levels, codes, names=None):
+    """Builds a MultiIndex from levels and codes without checking them."""
+
+    try:
+        return pd.MultiIndex(levels=levels, codes=codes, names=names,
+                             verify_integrity=False)
+    except TypeError:
+        # pandas < 0.24 calls codes labels
+        return pd.MultiIndex(levels=levels, labels=codes, names=names,
+                             verify_integrity=False)
+
+def _factorize_level(values):
+    """
+    Codes and unique values of one level. The uniques keep the level's dtype
+    (datetimes stay datetimes) and a null is a value like any other rather
+    than factorize's -1.
+    """
+
+    values = pd.Index(values)
+    codes, uniques = pd.factorize(values)
+
+    missing = codes < 0
+    if missing.any():
+        codes[missing] = len(uniques)
+        uniques = uniques.insert(len(uniques), values[missing][0])
+
+    return codes, uniques
+
+@instrumented
+def cartesion_index(*args, names=None, lazy=False):
     """
     Generates a `MultiIndex` from the cartesian product of multiple lists. 
 
-    >>> make_index(['Los Angeles', 'San Diego', 'Bakersfield'], 
-                   ['Residential', 'Commercial'])
+    :param args: Lists of values for each level.
+    :param names: Names for each level.
+    :param lazy: If `True` return a :class:`CartesianIndex` that doesn't 
+                 build the product until it's needed. Both build the same 
+                 product, repeated values included.
+
+    >>> cartesion_index(['Los Angeles', 'San Diego', 'Bakersfield'], 
+                        ['Residential', 'Commercial'])
     MultiIndex
     [(u'Los Angeles', u'Residential'), (u'Los Angeles', u'Commercial'), 
      (u'San Diego', u'Residential'), (u'San Diego', u'Commercial'), 
      (u'Bakersfield', u'Residential'), (u'Bakersfield', u'Commercial')]
 
+    .. note::
+        The index is assembled from integer codes per level rather than from
+        tuples, so no Python object is created per row of the product.
+    """
+
+    index = CartesianIndex(args, names=names)
+
+    return index if lazy else index.to_index()
+
+
+class CartesianIndex(object):
+    """
+    Lazily evaluated cartesian product of several levels. Only the levels 
+    are stored; :meth:`to_index` builds the actual `MultiIndex` and 
+    :meth:`get_indexer` finds positions by arithmetic on each level, without
+    materializing anything.
+
+    :param levels: Lists of values for each level. Repeated values repeat in
+                   the product, just like :func:`itertools.product`, and 
+                   lookups find the first of them.
+    :param names: Names for each level.
     """
-    cartesian_product = list(itertools.product(*args))
 
-    return pd.MultiIndex.from_tuples(cartesian_product, names=names)
+    def __init__(self, levels, names=None):
+        self.values = [pd.Index(level) for level in levels]
+        self.names = list(names) if names is not None else [None] * len(levels)
+
+        # factorizing keeps any repeated values in the product
+        factorized = [_factorize_level(level) for level in self.values]
+        self.levels = [uniques for _, uniques in factorized]
+        self.codes = [codes for codes, _ in factorized]
+        # position of the first occurrence of each unique value, codes are
+        # numbered in order of appearance
+        self._first = [np.unique(codes, return_index=True)[1] 
+                       for codes in self.codes]
+
+        sizes = [len(level) for level in self.values]
+        # number of rows skipped by moving one step along each level
+        self.strides = [int(np.prod(sizes[i + 1:])) for i in range(len(sizes))]
+        self.shape = tuple(sizes)
+
+    def __len__(self):
+        return int(np.prod(self.shape)) if self.shape else 0
+
+    def __iter__(self):
+        return itertools.product(*self.values)
+
+    def __repr__(self):
+        return '<CartesianIndex: %s>' % ' x '.join(map(str, self.shape))
+
+    def get_loc(self, key):
+        """Position of a single tuple in the product."""
+
+        return sum(int(first[level.get_loc(k)]) * stride 
+                   for level, first, k, stride 
+                   in zip(self.levels, self._first, key, self.strides))
+
+    def get_indexer(self, index):
+        """
+        Positions of every entry of a `MultiIndex` in the product, or -1 if 
+        an entry isn't part of it.
+        """
+
+        positions = np.zeros(len(index), dtype=np.int64)
+        missing = np.zeros(len(index), dtype=bool)
+
+        for i, (level, first, stride) in enumerate(zip(self.levels, 
+                                                       self._first, 
+                                                       self.strides)):
+            codes = level.get_indexer(index.get_level_values(i))
+            found = codes >= 0
+            missing |= ~found
+            positions[found] += first[codes[found]] * stride
+
+        positions[missing] = -1
+        return positions
+
+    def to_index(self):
+        """Materializes the product as a `MultiIndex`."""
+
+        positions = _product_codes(list(self.shape))
+        codes = [level_codes[position] for level_codes, position 
+                 in zip(self.codes, positions)]
+        return _multi_index(self.levels, codes, names=self.names)
+
+
+@instrumented
+def complete_frame(data, levels=None, fill_value=float('nan')):
+    """
+    Fills in a DataFrame or Series with a `MultiIndex` so that it has a row 
+    for every combination of its levels, e.g. every region x product x day.
+    Equivalent to reindexing by the full cartesian product.
+
+    :param data: DataFrame or Series with a (unique) `MultiIndex`.
+    :param levels: Lists of values for each level, or a 
+                   :class:`CartesianIndex`. Defaults to every value in each 
+                   level of the index of `data`.
+    :param fill_value: Value for the added rows.
+
+    .. note::
+        Rows are placed by computing their position in the product directly
+        from each level, so the full grid is never hashed or looked up.
+    """
+
+    if isinstance(levels, CartesianIndex):
+        grid = levels
+    else:
+        if levels is None:
+            levels = data.index.levels
+        grid = CartesianIndex(levels, names=data.index.names)
+
+    positions = grid.get_indexer(data.index)
+    found = positions >= 0
+
+    # row of `data` that goes in each position of the grid
+    source = np.full(len(grid), -1, dtype=np.int64)
+    source[positions[found]] = np.flatnonzero(found)
+    filled = source >= 0
+
+    def complete(values):
+        values = np.asarray(values)
+        dtype = values.dtype
+        if not filled.all():
+            fill_dtype = np.asarray(fill_value).dtype
+            if dtype.kind in 'mM' and pd.isnull(fill_value):
+                pass
+            elif dtype.kind in 'biufc' and fill_dtype.kind in 'biufc':
+                dtype = np.result_type(dtype, fill_dtype)
+            else:
+                dtype = np.dtype(object)
+
+        result = np.empty(len(grid), dtype=dtype)
+        if dtype.kind in 'mM' and pd.isnull(fill_value):
+            result[:] = np.datetime64('NaT')
+        else:
+            result[:] = fill_value
+        result[filled] = values[source[filled]]
+
+        return result
+
+    index = grid.to_index()
+
+    if isinstance(data, pd.Series):
+        return pd.Series(complete(data.values), index=index, name=data.name)
+
+    columns = [complete(data.iloc[:, i].values) for i in range(data.shape[1])]
+    result = pd.DataFrame(dict(enumerate(columns)), index=index, 
+                          columns=range(len(columns)))
+    result.columns = data.columns
+
+    return result
 
 def empty_date_range():
     """Returns a :class:`DatetimeIndex` object with length zero."""
@@ -17,4 +17,5 @@ WEEKDAY_MAP = {
 }
 
 from .scalar import *
-from .range import *
\ No newline at end of file
+from .range import *
+from .ordinal import *
\ No newline at end of file
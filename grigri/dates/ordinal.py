@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+    grigri.dates.ordinal
+    ~~~~~~~~~~~~~~~~~~
+
+    Vectorized conversions between arrays of timestamps and integer period
+    numbers (ordinals). Periods follow the same conventions as
+    :func:`grigri.dates.scalar.first_of`: weeks start on Monday and quarters
+    start on 1/1, 4/1, 7/1 and 10/1.
+
+    Consecutive periods have consecutive ordinals, so an ordinal minus the
+    ordinal of the first period in a range is a position in that range. This
+    is what lets timestamps be binned with plain integer arithmetic instead
+    of a resample.
+"""
+
+from .._lazy import LazyModule
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+__all__ = ['period_ordinals', 'ordinal_dates']
+
+# normalize pandas-style offset aliases
+_freq_aliases = {
+    'd': 'd',
+    'w': 'w',
+    'm': 'm',
+    'q': 'q',
+    'y': 'y',
+    'a': 'y',
+    'h': 'h',
+    't': 't',
+    'min': 't',
+    's': 's',
+}
+
+# numpy datetime units for frequencies that map straight onto one
+_numpy_units = {
+    'd': 'D',
+    'm': 'M',
+    'y': 'Y',
+    'h': 'h',
+    't': 'm',
+    's': 's',
+}
+
+def _normalize_freq(freq):
+    try:
+        return _freq_aliases[freq.lower()]
+    except (KeyError, AttributeError):
+        raise ValueError("Frequency not recognized: {}".format(freq))
+
+def period_ordinals(values, freq='d'):
+    """
+    Returns an int64 array numbering the period each timestamp falls in.
+
+    :param values: Array-like of timestamps e.g. a :class:`DatetimeIndex` or
+                   datetime64 Series. Must not contain NaT.
+    :param freq: One of 'd', 'w', 'm', 'q', 'y' (or 'a'), 'h', 't' or 's'.
+
+    >>> period_ordinals(pd.DatetimeIndex(['2013-09-01', '2013-09-30']), 'm')
+    array([524, 524])
+    """
+
+    freq = _normalize_freq(freq)
+    values = np.asarray(values, dtype='datetime64[ns]')
+
+    if freq == 'w':
+        # 1970-01-01 was a Thursday, so shifting by 3 days makes every
+        # Monday start a new multiple of 7
+        days = values.astype('datetime64[D]').astype(np.int64)
+        return (days + 3) // 7
+
+    if freq == 'q':
+        months = values.astype('datetime64[M]').astype(np.int64)
+        return months // 3
+
+    unit = _numpy_units[freq]
+    return values.astype('datetime64[%s]' % unit).astype(np.int64)
+
+def ordinal_dates(ordinals, freq='d', label='start'):
+    """
+    Inverse of :func:`period_ordinals`. Returns a :class:`DatetimeIndex` with
+    the first (or last) day of each period.
+
+    :param ordinals: Array-like of period ordinals.
+    :param freq: Frequency the ordinals were computed with.
+    :param label: 'start' for the first day of each period, matching
+                  :func:`first_of`, or 'end' for the last day, which matches
+                  how pandas labels weekly, monthly, quarterly and yearly
+                  resamples. Periods shorter than a day are always labeled by
+                  their start.
+    """
+
+    freq = _normalize_freq(freq)
+    ordinals = np.asarray(ordinals, dtype=np.int64)
+
+    if label not in ('start', 'end'):
+        raise ValueError("Label not recognized: {}".format(label))
+
+    end = label == 'end'
+
+    if freq == 'w':
+        days = ordinals * 7 - 3 + (6 if end else 0)
+        dates = days.astype('datetime64[D]')
+    elif freq in ('m', 'q', 'y'):
+        if freq == 'q':
+            months, unit = ordinals * 3, 'M'
+            step = 3
+        else:
+            months, unit = ordinals, _numpy_units[freq]
+            step = 1
+        if end:
+            # last day of the period is the day before the next one starts
+            dates = ((months + step).astype('datetime64[%s]' % unit)
+                     .astype('datetime64[D]') - np.timedelta64(1, 'D'))
+        else:
+            dates = months.astype('datetime64[%s]' % unit)
+    else:
+        dates = ordinals.astype('datetime64[%s]' % _numpy_units[freq])
+
+    return pd.DatetimeIndex(dates.astype('datetime64[ns]'))
@@ -8,13 +8,14 @@
 """
 
 from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
 from functools import partial
 
-import pandas as pd
-
+from .._lazy import LazyModule
 from .scalar import first_of, end_of
 
+pd = LazyModule('pandas')
+dateutil_relativedelta = LazyModule('dateutil.relativedelta')
+
 __all__ = [
     'date_range', 'week_range', 'month_range','quarter_range', 'year_range',
     'swing_range', 'day_swing', 'week_swing', 'month_swing', 'year_swing'
@@ -79,9 +80,9 @@ def swing_range(periods, anchor_date=None, freq='d', inclusive=True):
     shift = 1 if periods > 0 else -1
     
     if not inclusive:
-        anchor_date += relativedelta(**{freq_name: shift})
+        anchor_date += dateutil_relativedelta.relativedelta(**{freq_name: shift})
     
-    swing_date = anchor_date + relativedelta(**{freq_name: periods})
+    swing_date = anchor_date + dateutil_relativedelta.relativedelta(**{freq_name: periods})
 
     # For weeks, months, yrs, you have to deal with
     # the end or the beginning of the interval depending on
@@ -10,16 +10,14 @@
 from datetime import datetime, timedelta
 from functools import partial
 
-from dateutil.parser import parse
-from dateutil.relativedelta import relativedelta
-
-import pandas as pd
-from pandas.tseries.offsets import (Week, MonthEnd, QuarterEnd, YearEnd, 
-                                    DateOffset, MonthBegin, QuarterBegin,
-                                    YearBegin)
-
+from .._lazy import LazyModule
 from . import FREQUENCY_MAP
 
+pd = LazyModule('pandas')
+offsets = LazyModule('pandas.tseries.offsets')
+dateutil_parser = LazyModule('dateutil.parser')
+dateutil_relativedelta = LazyModule('dateutil.relativedelta')
+
 
 __all__ = [
     'strip_time',
@@ -41,12 +39,33 @@ def strip_time(dt):
 
     return datetime(dt.year, dt.month, dt.day)
 
-_offset_begin_map = {
-    'w': Week(weekday=0),
-    'm': MonthBegin(),
-    'q': QuarterBegin(startingMonth=1),  # FOQ = 1/1, 4/1, 7/1, 10/1
-    'y': YearBegin(),
-}
+# offset maps are built on first use so importing this module doesn't
+# import pandas
+_offset_maps = {}
+
+def _offset_map(kind):
+    try:
+        return _offset_maps[kind]
+    except KeyError:
+        pass
+
+    if kind == 'begin':
+        offset_map = {
+            'w': offsets.Week(weekday=0),
+            'm': offsets.MonthBegin(),
+            'q': offsets.QuarterBegin(startingMonth=1),  # FOQ = 1/1, 4/1, 7/1, 10/1
+            'y': offsets.YearBegin(),
+        }
+    else:
+        offset_map = {
+            'w': offsets.Week(weekday=0),  # weekday: specific day of week. 0 for Monday
+            'm': offsets.MonthEnd(),
+            'q': offsets.QuarterEnd(startingMonth=12),  #startingMonth: EOQ = 12/31, 3/31, 6/30, 9/30
+            'y': offsets.YearEnd(),
+        }
+
+    _offset_maps[kind] = offset_map
+    return offset_map
 
 def first_of(dt=None, freq='m'):
     """
@@ -65,7 +84,7 @@ def first_of(dt=None, freq='m'):
         dt = datetime.now()
 
     try:
-        offset = _offset_begin_map[freq.lower()]
+        offset = _offset_map('begin')[freq.lower()]
     except KeyError:
         raise ValueError("Frequency not recognized: {}".format(freq)) 
 
@@ -80,13 +99,6 @@ first_of_month = partial(first_of, freq='m')
 first_of_quarter = partial(first_of, freq='q')
 first_of_year = partial(first_of, freq='y')
 
-_offset_end_map = {
-    'w': Week(weekday=0),  # weekday: specific day of week. 0 for Monday
-    'm': MonthEnd(),
-    'q': QuarterEnd(startingMonth=12),  #startingMonth: EOQ = 12/31, 3/31, 6/30, 9/30
-    'y': YearEnd(),
-}
-
 
 def end_of(dt=None, freq='m'):
     """
@@ -105,7 +117,7 @@ def end_of(dt=None, freq='m'):
         dt = datetime.now()
 
     try:
-        offset = _offset_end_map[freq.lower()]
+        offset = _offset_map('end')[freq.lower()]
     except KeyError:
         raise ValueError("Frequency not recognized: {}".format(freq)) 
 
@@ -163,13 +175,13 @@ def date_diff(dt1, dt2, freq='d'):
     """
 
     if isinstance(dt1, str):
-        dt1 = parse(dt1)
+        dt1 = dateutil_parser.parse(dt1)
     if isinstance(dt2, str):
-        dt2 = parse(dt2)
+        dt2 = dateutil_parser.parse(dt2)
 
     # timedelta in datetime module doesn't have a nice datediff for months
     # so I use dateutil.relativedelta library here:
-    diff = relativedelta(dt1, dt2)
+    diff = dateutil_relativedelta.relativedelta(dt1, dt2)
 
     if freq == 'd':
         return diff.days
@@ -210,7 +222,7 @@ def date_add(periods, freq='d', anchor_date=None):
 
     frequency_name = FREQUENCY_MAP[freq]
 
-    return anchor_date + relativedelta(**{frequency_name: periods})
+    return anchor_date + dateutil_relativedelta.relativedelta(**{frequency_name: periods})
 
 def is_current(dt, freq='m'):
     """
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+    grigri.instrument
+    ~~~~~~~~~~~~~~~~~~
+
+    Opt-in instrumentation for grigri's public functions. Every instrumented
+    call can be recorded with its wall time, rows in and out, bytes in and
+    out and (optionally) peak memory, and handed to one or more sinks.
+
+    >>> with collect() as stats:
+    ...     frame = read_frame(sql, conn)
+    ...     write_frame(frame, conn, 'Output')
+    >>> stats.summary()['grigri.io.sql.read_frame']
+    {'calls': 1, 'seconds': 12.7, 'rows_in': 0, 'rows_out': 250000, ...}
+
+    When nothing is collecting, an instrumented function only checks one
+    context variable before calling straight through, so leaving the hooks 
+    in production code costs next to nothing. Sinks belong to the context
+    (thread or asyncio task) that enabled them, so concurrent 
+    :func:`collect` blocks don't see each other's calls. Calls that raise
+    are recorded too, with `error` set.
+
+    A sink is any callable taking a :class:`Call`, or an object with a
+    ``record(call)`` method like :class:`MemorySink` and :class:`LoggingSink`.
+"""
+
+import contextvars
+import functools
+import logging
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from contextlib import contextmanager
+
+__all__ = [
+    'Call', 'MemorySink', 'LoggingSink', 'instrumented', 'collect',
+    'enable', 'disable'
+]
+
+Call = namedtuple('Call', ['name', 'seconds', 'rows_in', 'rows_out',
+                           'bytes_in', 'bytes_out', 'peak_memory', 'error'])
+
+# tuple of callables receiving each Call in the current context; 
+# instrumentation is off while this is empty
+_sinks = contextvars.ContextVar('grigri_instrument_sinks', default=())
+
+# number of active scopes that asked for peak memory
+_memory_scopes = [0]
+
+# per-thread stack of calls in progress, for attributing peak memory to
+# nested calls
+_local = threading.local()
+
+
+class MemorySink(object):
+    """
+    Keeps running totals per function: number of calls (and of calls that
+    raised), seconds, rows and bytes in and out, and the largest peak memory
+    seen. Set `keep_calls` to also keep every individual :class:`Call`.
+    """
+
+    def __init__(self, keep_calls=False):
+        self.totals = {}
+        self.calls = [] if keep_calls else None
+        self._lock = threading.Lock()
+
+    def record(self, call):
+        with self._lock:
+            if self.calls is not None:
+                self.calls.append(call)
+
+            totals = self.totals.setdefault(call.name, {
+                'calls': 0, 'errors': 0, 'seconds': 0., 'rows_in': 0, 
+                'rows_out': 0, 'bytes_in': 0, 'bytes_out': 0, 
+                'peak_memory': None,
+            })
+            totals['calls'] += 1
+            totals['errors'] += bool(call.error)
+            totals['seconds'] += call.seconds
+            for key in ('rows_in', 'rows_out', 'bytes_in', 'bytes_out'):
+                totals[key] += getattr(call, key) or 0
+            if call.peak_memory is not None:
+                totals['peak_memory'] = max(totals['peak_memory'] or 0,
+                                            call.peak_memory)
+
+    def summary(self):
+        """Returns a copy of the totals keyed by function name."""
+
+        with self._lock:
+            return {name: dict(totals) for name, totals in self.totals.items()}
+
+    def to_frame(self):
+        """Returns the totals as a DataFrame sorted by total seconds."""
+
+        import pandas as pd
+
+        frame = pd.DataFrame.from_dict(self.summary(), orient='index')
+        try:
+            return frame.sort_values('seconds', ascending=False)
+        except AttributeError:
+            # pandas < 0.17
+            return frame.sort('seconds', ascending=False)
+
+
+class LoggingSink(object):
+    """Writes one log line per call."""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger('grigri.instrument')
+        self.level = level
+
+    def record(self, call):
+        self.logger.log(self.level,
+                        '%s: %.4fs, rows %s -> %s, bytes %s -> %s, peak %s, '
+                        'error %s', *call)
+
+
+def _as_callback(sink):
+    return getattr(sink, 'record', sink)
+
+def enable(sink):
+    """
+    Starts sending calls made in the current context to `sink` until 
+    :func:`disable` is called.
+    """
+
+    _sinks.set(_sinks.get() + (_as_callback(sink),))
+
+def disable(sink):
+    """Stops sending calls to `sink`."""
+
+    sinks = list(_sinks.get())
+    sinks.remove(_as_callback(sink))
+    _sinks.set(tuple(sinks))
+
+@contextmanager
+def collect(sink=None, memory=False):
+    """
+    Context manager that records every instrumented call made inside it.
+
+    :param sink: Where to send calls. Defaults to a new :class:`MemorySink`,
+                 which is what the context manager yields.
+    :param memory: If `True` also measure peak memory per call with
+                   :mod:`tracemalloc`. Tracing allocations makes everything
+                   slower, so it is off by default.
+    """
+
+    if sink is None:
+        sink = MemorySink()
+
+    started_tracing = False
+    if memory:
+        _memory_scopes[0] += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+
+    enable(sink)
+    try:
+        yield sink
+    finally:
+        disable(sink)
+        if memory:
+            _memory_scopes[0] -= 1
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _rows(obj):
+    """Number of rows in a DataFrame, Series or array (or a tuple of them)."""
+
+    if isinstance(obj, (tuple, list)):
+        counts = [_rows(item) for item in obj]
+        counts = [c for c in counts if c is not None]
+        return sum(counts) if counts else None
+
+    shape = getattr(obj, 'shape', None)
+    if shape:
+        return shape[0]
+
+    return None
+
+def _nbytes(obj):
+    """
+    Shallow size of the values in a DataFrame, Series or array. Object
+    columns only count their pointers.
+    """
+
+    if isinstance(obj, (tuple, list)):
+        sizes = [_nbytes(item) for item in obj]
+        sizes = [s for s in sizes if s is not None]
+        return sum(sizes) if sizes else None
+
+    nbytes = getattr(obj, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+
+    # DataFrames don't have nbytes in older pandas
+    if hasattr(obj, 'columns') and hasattr(obj, 'iloc'):
+        return sum(obj.iloc[:, i].values.nbytes for i in range(obj.shape[1]))
+
+    return None
+
+def _call_stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def _record(name, func, args, kwargs, rows_out):
+    first = args[0] if args else None
+
+    trace_memory = _memory_scopes[0] and tracemalloc.is_tracing()
+    if trace_memory:
+        stack = _call_stack()
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            # remember the caller's peak before resetting it for this call
+            stack[-1][1] = max(stack[-1][1], peak)
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        stack.append([current, 0])
+
+    result = error = None
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+        return result
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+
+        peak_memory = None
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            baseline, inner_peak = stack.pop()
+            peak = max(peak, inner_peak)
+            peak_memory = max(peak - baseline, 0)
+            if stack:
+                stack[-1][1] = max(stack[-1][1], peak)
+
+        if error is None:
+            call = Call(name, seconds, _rows(first), rows_out(result),
+                        _nbytes(first), _nbytes(result), peak_memory, None)
+        else:
+            call = Call(name, seconds, _rows(first), None, _nbytes(first), 
+                        None, peak_memory, error)
+
+        for sink in _sinks.get():
+            sink(call)
+
+def instrumented(func=None, name=None, rows_out=_rows):
+    """
+    Decorator that makes a function report its calls to the active sinks.
+
+    :param name: Name to record calls under. Defaults to the module and
+                 function name e.g. ``grigri.io.sql.read_frame``.
+    :param rows_out: Function computing the number of rows in the result.
+
+    >>> @instrumented
+    ... def flow_extract(df, ...):
+    """
+
+    if func is None:
+        return functools.partial(instrumented, name=name, rows_out=rows_out)
+
+    if name is None:
+        name = '%s.%s' % (func.__module__, func.__name__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _sinks.get():
+            return func(*args, **kwargs)
+        return _record(name, func, args, kwargs, rows_out)
+
+    return wrapper
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+    grigri.io.incremental
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Incremental extracts. Instead of re-pulling a whole table on every
+    refresh, :func:`incremental_extract` remembers the highest value seen in
+    a column that only ever goes up (a modified date or an identity key),
+    only asks the database for rows past that high-water mark and adds
+    them to a copy of the table kept on disk::
+
+        extracts/tickets/
+            _state.json     # watermark, key and segments
+            1/c0.npy        # first extract
+            1/c1.pkl
+            2/c0.npy        # rows of the next refresh
+            ...
+
+    A refresh only writes the rows it pulled, as a new segment, and then the
+    state file. New versions of a row are dropped in favour of the later 
+    segment when the extract is read, and once there are more than 
+    ``_max_segments`` segments they are merged back into one.
+
+    >>> tickets = incremental_extract('SELECT * FROM Tickets', conn,
+    ...                               'extracts/tickets', 'ModifiedDate',
+    ...                               key='TicketID')
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+
+from .._lazy import LazyModule
+from ..instrument import instrumented
+from .sql import read_frame
+from .store import _save_columns, _load_columns
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+__all__ = ['incremental_extract', 'read_extract', 'extract_watermark']
+
+_state_file = '_state.json'
+
+# segments an extract can grow to before a refresh merges them into one
+_max_segments = 32
+
+
+def _read_state(path):
+    try:
+        with open(os.path.join(path, _state_file)) as f:
+            return json.load(f)
+    except IOError:
+        return None
+
+def _write_state(path, state):
+    # replace the file in one step, a crash leaves the old state in place
+    target = os.path.join(path, _state_file)
+    with open(target + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(target + '.tmp', target)
+
+def _segments(state):
+    # extracts written before there were segments keep their columns next
+    # to the state file
+    if 'segments' in state:
+        return state['segments']
+    return [{'directory': '', 'rows': None, 'columns': state['columns']}]
+
+def _encode_watermark(value):
+    """Turns a watermark into something JSON can hold, tagged with its type."""
+
+    if value is None:
+        return None
+
+    if isinstance(value, (datetime, np.datetime64)):
+        return ['datetime', pd.Timestamp(value).to_pydatetime().isoformat()]
+    if isinstance(value, (int, np.integer)):
+        return ['int', int(value)]
+    if isinstance(value, (float, np.floating)):
+        return ['float', float(value)]
+
+    return ['str', str(value)]
+
+def _decode_watermark(encoded):
+    if encoded is None:
+        return None
+
+    kind, value = encoded
+    if kind == 'datetime':
+        return pd.Timestamp(value).to_pydatetime()
+
+    return value
+
+def extract_watermark(path):
+    """Returns the high-water mark of the extract at `path`, or `None`."""
+
+    state = _read_state(path)
+    return _decode_watermark(state['watermark']) if state else None
+
+def read_extract(path, columns=None, mmap=False):
+    """
+    Returns the frame stored by :func:`incremental_extract` without
+    querying the database.
+
+    :param columns: Names of the columns to read. Defaults to all of them.
+    :param mmap: Memory-map the column files instead of reading them.
+    """
+
+    state = _read_state(path)
+    if state is None:
+        raise IOError("No extract at {}".format(path))
+
+    key = state.get('key')
+    pieces = []
+    for segment in _segments(state):
+        names = [name for name, _ in segment['columns']]
+        if columns is not None:
+            # the key is needed to drop the older versions of rows
+            names = [name for name in names if name in columns 
+                     or key is not None and name in _as_list(key)]
+        data = _load_columns(os.path.join(path, segment['directory']), 
+                             segment['columns'], names, mmap)
+        pieces.append(pd.DataFrame(data, columns=names, copy=False))
+
+    if len(pieces) == 1:
+        frame = pieces[0]
+    else:
+        frame = pd.concat(pieces, ignore_index=True)
+
+    if key is not None:
+        deduplicated = _drop_duplicates(frame, key)
+        if deduplicated is not frame:
+            frame = deduplicated
+            frame.index = np.arange(len(frame))
+
+    if columns is not None:
+        frame = frame[[name for name in frame.columns if name in columns]]
+
+    return frame
+
+def _as_list(key):
+    return key if isinstance(key, list) else [key]
+
+def _add_segment(path, state, frame, segments):
+    """
+    Writes `frame` as a new segment after `segments` and commits them with
+    `state`.
+    """
+
+    generation = state.get('generation', 0) + 1
+    state['generation'] = generation
+
+    # a directory by that name was left by a refresh that crashed before
+    # committing its state
+    directory = os.path.join(path, str(generation))
+    if os.path.isdir(directory):
+        shutil.rmtree(directory)
+
+    segment = {'directory': str(generation), 'rows': len(frame),
+               'columns': _save_columns(frame, directory)}
+    state['segments'] = segments + [segment]
+    _write_state(path, state)
+
+def _remove_segments(path, segments):
+    for segment in segments:
+        if segment['directory']:
+            shutil.rmtree(os.path.join(path, segment['directory']),
+                          ignore_errors=True)
+            continue
+
+        # column files of extracts from before there were segments
+        for position in range(len(segment['columns'])):
+            for extension in ('.npy', '.pkl'):
+                target = os.path.join(path, 'c%d%s' % (position, extension))
+                if os.path.exists(target):
+                    os.remove(target)
+
+def _drop_duplicates(frame, key):
+    """Keeps the last row for every key."""
+
+    # `duplicated` flags everything after the first occurrence, so run it on
+    # the reversed frame to keep the last one instead
+    duplicated = frame.iloc[::-1].duplicated(key).values[::-1]
+    if not duplicated.any():
+        return frame
+    return frame.iloc[np.flatnonzero(~duplicated)]
+
+def _unchanged_rows(new, stored, key):
+    """
+    Mask of the rows of `new` that are identical to the stored row with the
+    same key, e.g. the rows at the watermark a keyed refresh pulls again.
+    """
+
+    keys = key if isinstance(key, list) else [key]
+    unchanged = np.zeros(len(new), dtype=bool)
+    if any(col not in stored.columns for col in new.columns):
+        return unchanged
+
+    stored_keys = pd.MultiIndex.from_arrays([stored[col].values 
+                                             for col in keys])
+    if not stored_keys.is_unique:
+        return unchanged
+    positions = stored_keys.get_indexer(
+        pd.MultiIndex.from_arrays([new[col].values for col in keys]))
+
+    found = np.flatnonzero(positions >= 0)
+    same = np.ones(len(found), dtype=bool)
+    for col in new.columns:
+        a = np.asarray(new[col].values)[found]
+        b = np.asarray(stored[col].values)[positions[found]]
+        same &= np.asarray((a == b) | (pd.isnull(a) & pd.isnull(b)), 
+                           dtype=bool)
+
+    unchanged[found[same]] = True
+    return unchanged
+
+@instrumented
+def incremental_extract(sql, conn, path, watermark_column, key=None,
+                        params=None, placeholder='?', **kwargs):
+    """
+    Refreshes a locally stored extract with the rows of `sql` that are newer
+    than the last refresh and returns the whole extract as a DataFrame.
+
+    The first call runs `sql` as-is. Later calls wrap it as::
+
+        SELECT * FROM (<sql>) AS _src WHERE _src.[<watermark_column>] > ?
+
+    so the statement can't end with an ORDER BY (on SQL Server) and must
+    select `watermark_column`. The new rows are written on their own, next
+    to the ones already stored, and the watermark is only saved once they 
+    are, so a failed refresh is simply retried next time.
+
+    :param sql: SQL statement returning the full table.
+    :param conn: Valid database connection.
+    :param path: Directory to keep the extract and its watermark in.
+    :param watermark_column: Column that increases whenever a row is added
+                             or changed e.g. a modified date or identity.
+    :param key: Column or list of columns identifying a row. New versions of
+                a row replace the stored one. With a key, rows equal to the
+                watermark are pulled again (``>=``) so rows committed with
+                the same timestamp after the last refresh aren't missed.
+    :param params: List of parameters for a parameterized `sql`.
+    :param placeholder: Parameter marker of the database driver.
+    :param kwargs: Passed to :func:`grigri.io.sql.read_frame`.
+    """
+
+    state = _read_state(path)
+    watermark = _decode_watermark(state['watermark']) if state else None
+
+    params = list(params or [])
+    if watermark is None:
+        new = read_frame(sql, conn, params=params or None, **kwargs)
+    else:
+        operator = '>=' if key is not None else '>'
+        bounded = 'SELECT * FROM ({}) AS _src WHERE _src.[{}] {} {}'.format(
+                  sql, watermark_column, operator, placeholder)
+        new = read_frame(bounded, conn, params=params + [watermark], **kwargs)
+
+    if state is not None:
+        stored = read_extract(path)
+        if key is not None and len(new):
+            # rows pulled again without having changed would otherwise make
+            # every refresh write a segment
+            new = new.iloc[np.flatnonzero(~_unchanged_rows(new, stored, key))]
+        if len(new) == 0:
+            return stored
+        merged = pd.concat([stored, new], ignore_index=True)
+    else:
+        merged = new
+
+    if key is not None:
+        merged = _drop_duplicates(merged, key)
+        merged.index = np.arange(len(merged))
+
+    latest = new[watermark_column].max() if len(new) else None
+    if latest is not None and not pd.isnull(latest):
+        if watermark is None or latest > watermark:
+            watermark = latest
+
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    new_state = {
+        'watermark_column': watermark_column,
+        'watermark': _encode_watermark(watermark),
+        'key': key,
+        'refreshed': datetime.now().isoformat(),
+        'generation': state.get('generation', 0) if state else 0,
+    }
+
+    segments = _segments(state) if state is not None else []
+    if len(segments) < _max_segments:
+        _add_segment(path, new_state, new, segments)
+    else:
+        # too many segments to read quickly, store the merged rows as one
+        _add_segment(path, new_state, merged, [])
+        _remove_segments(path, segments)
+
+    return merged
@@ -8,14 +8,33 @@
 """
 
 from datetime import datetime, date
+import contextvars
 import decimal
+import hashlib
+import json
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+import warnings
 
-import numpy as np
-import pandas as pd
+from .._lazy import LazyModule
+from ..instrument import instrumented
+from ..sketch import hash_values
+from .store import _save_columns, _load_columns
 
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+concurrent_futures = LazyModule('concurrent.futures')
 
+
+@instrumented
 def read_frame(sql, conn, params=None, coerce_default=True, coerce_ascii=False,
-               squeeze=False):
+               squeeze=False, memory_budget=None, batch_size=10000):
     """
     Returns a DataFrame from the result set of a SQL statement.
 
@@ -24,8 +43,18 @@ def read_frame(sql, conn, params=None, coerce_default=True, coerce_ascii=False,
     :param params: List of parameters to feed into a parameterized query.
     :param coerce_default: Coerce columns to the default datatype specified in 
                            the metadata of the SQL table.
-    :param coerce_ascii: Remove non-ascii charaters from string type columns.
+    :param coerce_ascii: Remove non-ascii charaters from string type columns,
+                         see :func:`coerce_to_ascii`. Pass 
+                         ``'transliterate'`` to turn accented characters into
+                         their ascii letter instead.
     :param squeeze: Attempt to reduce DataFrame into a Series if possible.
+    :param memory_budget: Maximum number of bytes the result may take up in
+                          memory. Rows are then fetched `batch_size` at a
+                          time and once the result is estimated to go over
+                          the budget, batches are spilled to a temporary 
+                          directory and a :class:`SpilledFrame` is returned
+                          instead of a DataFrame.
+    :param batch_size: Number of rows per fetch when `memory_budget` is set.
 
     .. note ::
         The `pandas` library has its own `read_frame` function that you can 
@@ -33,6 +62,31 @@ def read_frame(sql, conn, params=None, coerce_default=True, coerce_ascii=False,
         data type, by inspecting the data type of the column in SQL.
     """
 
+    if memory_budget is not None:
+        return _read_budgeted(sql, conn, params, memory_budget, batch_size,
+                              coerce_default, coerce_ascii)
+
+    rows, description = _fetch(sql, conn, params)
+
+    return _build_frame(rows, description, coerce_default=coerce_default,
+                        coerce_ascii=coerce_ascii)
+
+@instrumented(name='grigri.io.sql.fetch', rows_out=lambda result: len(result[0]))
+def _fetch(sql, conn, params=None):
+    """Executes `sql` and returns all rows along with the cursor description."""
+
+    cursor, description = _execute(sql, conn, params)
+    
+    rows = cursor.fetchall()
+
+    cursor.close()
+    conn.commit()
+
+    return rows, description
+
+def _execute(sql, conn, params=None):
+    """Executes `sql` and returns the open cursor and its description."""
+
     cursor = conn.cursor()
     if params:
         if not isinstance(params, list):
@@ -43,29 +97,228 @@ def read_frame(sql, conn, params=None, coerce_default=True, coerce_ascii=False,
         cursor.execute(sql)
     
     description = cursor.description
-    
-    rows = cursor.fetchall()
     columns = [col[0] for col in description]
 
     # https://github.com/jephdo/grigri/issues/1
     assert len(list(columns)) == len(set(columns)), 'There are duplicate column names in the SQL statement.'
 
-    cursor.close()
-    conn.commit()
+    return cursor, description
+
+def _fetch_batches(sql, conn, params, batch_size):
+    """
+    Executes `sql` and returns the cursor description along with a 
+    generator of lists of at most `batch_size` rows.
+    """
+
+    cursor, description = _execute(sql, conn, params)
+
+    def batches():
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+            conn.commit()
+
+    return description, batches()
+
+def _estimate_row_size(frame, description):
+    """
+    Estimated bytes per row of a batch: the buffer size of fixed width 
+    columns plus the sizes of a sample of the Python objects in the others.
+    Object columns without any values fall back to the column size in the
+    cursor description.
+    """
+
+    if not len(frame):
+        return 0.
+
+    sizes = {col[0]: col[3] for col in description if len(col) > 3}
+
+    total = 0.
+    for i, col in enumerate(frame.columns):
+        values = frame.iloc[:, i].values
+        if values.dtype.kind != 'O':
+            total += values.dtype.itemsize
+            continue
+
+        sample = [value for value in values[:1000] if value is not None]
+        if sample:
+            average = sum(sys.getsizeof(value) for value in sample) / len(sample)
+        else:
+            average = sizes.get(col) or 64
+        # the object pointer plus the object
+        total += 8 + average
+
+    return total
+
+def _read_budgeted(sql, conn, params, memory_budget, batch_size, 
+                   coerce_default, coerce_ascii):
+    frames = []
+    spilled = None
+    row_size = None
+    in_memory = 0
+
+    description, batches = _fetch_batches(sql, conn, params, batch_size)
+    try:
+        for rows in batches:
+            frame = _build_frame(rows, description, 
+                                 coerce_default=coerce_default,
+                                 coerce_ascii=coerce_ascii)
+
+            if spilled is not None:
+                spilled.append(frame)
+                continue
+
+            if row_size is None:
+                row_size = _estimate_row_size(frame, description)
 
-    result = pd.DataFrame.from_records(rows, columns=columns)
+            in_memory += len(frame)
+            frames.append(frame)
+
+            # leave room for the next batch and for the copy concatenating
+            # the batches makes at the end
+            projected = (in_memory + batch_size) * row_size * 2
+            if projected > memory_budget:
+                spilled = SpilledFrame()
+                for frame in frames:
+                    spilled.append(frame)
+                frames = []
+    except Exception:
+        if spilled is not None:
+            spilled.close()
+        raise
+    finally:
+        # a generator left suspended by an error would only close its 
+        # cursor once garbage collected
+        batches.close()
+
+    if spilled is not None:
+        return spilled
+
+    if not frames:
+        # keep the columns of an empty result
+        return _build_frame([], description, coerce_default=coerce_default,
+                            coerce_ascii=coerce_ascii)
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
+
+
+class SpilledFrame(object):
+    """
+    A result set too large for its memory budget, kept on disk as one 
+    directory of column files per fetched batch (see :mod:`grigri.io.store`).
+    Returned by :func:`read_frame` when `memory_budget` is exceeded.
+
+    Iterate over it (or :meth:`chunks`) to process one batch at a time, with
+    the columns memory-mapped, or load it whole with :meth:`to_frame`. The 
+    temporary files are deleted by :meth:`close`, which also happens when 
+    used as a context manager or garbage collected.
+
+    >>> result = read_frame(sql, conn, memory_budget=2 * 1024 ** 3)
+    >>> for chunk in result:
+    ...     totals.append(chunk.groupby('Region')['Amount'].sum())
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or tempfile.mkdtemp(prefix='grigri-spill-')
+        self.columns = None
+        self.closed = False
+        self._batches = []
+
+    def append(self, frame):
+        """Writes one more batch of rows to disk."""
+
+        if self.columns is None:
+            self.columns = list(frame.columns)
+
+        path = os.path.join(self.directory, '%06d' % len(self._batches))
+        self._batches.append((path, _save_columns(frame, path), len(frame)))
+
+    def __len__(self):
+        return sum(rows for _, _, rows in self._batches)
+
+    def chunks(self, columns=None, mmap=True):
+        """
+        Yields one DataFrame per fetched batch.
+
+        :param columns: Names of the columns to read. Defaults to all.
+        :param mmap: Memory-map the column files.
+        """
+
+        names = [col for col in self.columns if columns is None or col in columns]
+        for path, schema, _ in self._batches:
+            data = _load_columns(path, schema, names, mmap)
+            yield pd.DataFrame(data, columns=names, copy=False)
+
+    def __iter__(self):
+        return self.chunks()
+
+    def to_frame(self, columns=None):
+        """Loads every batch into a single DataFrame."""
+
+        chunks = list(self.chunks(columns, mmap=False))
+        if len(chunks) == 1:
+            return chunks[0]
+        return pd.concat(chunks, ignore_index=True)
+
+    def close(self):
+        """Deletes the temporary files."""
+
+        if not self.closed:
+            self.closed = True
+            self._batches = []
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+    def __repr__(self):
+        return '<SpilledFrame: %d rows, %d batches in %s>' % (
+               len(self), len(self._batches), self.directory)
+
+def _build_frame(rows, description, exclude=(), coerce_default=True, 
+                 coerce_ascii=False):
+    """
+    Turns fetched rows into a DataFrame. Columns in `exclude` (matched 
+    case-insensitively) are never materialized or coerced.
+    """
+
+    columns = [col[0] for col in description]
+
+    excluded = set(col.lower() for col in exclude)
+    exclude = [col for col in columns if col.lower() in excluded]
+
+    result = pd.DataFrame.from_records(rows, columns=columns, exclude=exclude)
 
     if coerce_default:
         # mapping of column name -> column data type
-        column_types = {col[0]: col[1] for col in description}
+        column_types = {col[0]: col[1] for col in description
+                        if col[0].lower() not in excluded}
         result = coerce_dtypes(result, column_types)
 
-    # TODO: not really sure the best way to encode ascii yet
     if coerce_ascii:
-        pass
+        # only columns the driver says are strings. Some drivers (sqlite3)
+        # don't report types, those columns are checked value by value
+        string_columns = [col[0] for col in description 
+                          if col[1] in (str, None) 
+                          and col[0].lower() not in excluded]
+        result = coerce_to_ascii(result, string_columns, 
+                                 transliterate=coerce_ascii == 'transliterate')
     
     return result
 
+@instrumented
 def coerce_dtypes(frame, columns):
     """
     Forces columns of a DataFrame to be the appropriate datatype. 
@@ -103,7 +356,77 @@ def coerce_dtypes(frame, columns):
 
     return frame
 
-def write_frame(frame, conn, table, clear_table=False):
+# joins the strings of a column so they can be encoded in one call. Has to
+# be ASCII and survive NFKD unchanged.
+_ascii_separator = '\x00'
+
+def _to_ascii(text, transliterate):
+    if transliterate:
+        # decompose accented characters into a base letter plus combining
+        # marks, the marks are then dropped with everything else non-ascii
+        text = unicodedata.normalize('NFKD', text)
+    return text.encode('ascii', 'ignore').decode('ascii')
+
+def _ascii_strings(strings, transliterate):
+    """Drops (or transliterates) the non-ascii characters of a list of str."""
+
+    joined = _ascii_separator.join(strings)
+    if joined.isascii():
+        return strings
+
+    if joined.count(_ascii_separator) != len(strings) - 1:
+        # a value contains the separator itself, go one at a time
+        return [_to_ascii(value, transliterate) for value in strings]
+
+    return _to_ascii(joined, transliterate).split(_ascii_separator)
+
+@instrumented
+def coerce_to_ascii(frame, columns=None, transliterate=False):
+    """
+    Removes non-ascii characters from the string columns of a DataFrame. 
+    Each column is encoded as a whole rather than cell by cell. Nulls and 
+    values that aren't strings are left alone.
+
+    :param frame: DataFrame to adjust. Modified in place and returned.
+    :param columns: Names of the columns to convert. Defaults to every 
+                    object (or string) column.
+    :param transliterate: Replace accented characters by their ascii base 
+                          letter (``'café'`` becomes ``'cafe'``) instead of
+                          dropping them. Characters without an ascii 
+                          decomposition are still dropped.
+    """
+
+    if columns is None:
+        columns = [col for col, dtype in zip(frame.columns, frame.dtypes)
+                   if dtype.kind == 'O']
+
+    for col in columns:
+        if frame[col].dtype.kind != 'O':
+            continue
+        values = np.asarray(frame[col].values, dtype=object)
+
+        is_string = ~pd.isnull(values)
+        strings = values[is_string].tolist()
+        try:
+            converted = _ascii_strings(strings, transliterate)
+        except TypeError:
+            # mixed column, only touch the actual strings
+            is_string = np.fromiter((isinstance(v, str) for v in values),
+                                    dtype=bool, count=len(values))
+            strings = values[is_string].tolist()
+            converted = _ascii_strings(strings, transliterate)
+        if converted is strings:
+            continue
+
+        values = values.copy()
+        values[is_string] = converted
+        frame[col] = values
+
+    return frame
+
+@instrumented
+def write_frame(frame, conn, table, clear_table=False, batch_size=None,
+                journal=None, retries=3, backoff=1.):
     """ 
     Writes a DataFrame object to a SQL database table.
 
@@ -112,6 +435,22 @@ def write_frame(frame, conn, table, clear_table=False):
     :param table: Name of SQL table to write to.
     :param clear_table: If `True`, will delete all rows in `table` before 
                         writing.
+    :param batch_size: If set, insert and commit this many rows at a time,
+                       retrying a failed batch before giving up.
+    :param journal: Path of a local file recording which batches have been
+                    committed. If a load fails, calling :func:`write_frame`
+                    again with the same frame, table, batch size and journal
+                    picks up after the last committed batch instead of
+                    starting over (`clear_table` is ignored when resuming).
+                    The journal is deleted once every batch is written.
+                    Requires `batch_size`. The journal is a local file and
+                    can't be written in the database transaction, so batches
+                    are written at least once: a crash right after a batch
+                    is committed but before it's journalled writes that
+                    batch again on the rerun.
+    :param retries: Number of times to retry a failed batch.
+    :param backoff: Seconds to wait before the first retry, doubling with 
+                    every retry after that.
 
     .. warning ::
         Be careful which ODBC library you use when feeding in `conn`. It is 
@@ -124,29 +463,301 @@ def write_frame(frame, conn, table, clear_table=False):
     """
     # assert isinstance(conn, ceODBC.Connection), 'Connection object must use the ceODBC module for writing'
 
-    cursor = conn.cursor()
-    try:
+    safe_columns = ['[' + str(col).replace(' ','_').strip() + ']' 
+                    for col in frame.columns]
+    columns = ','.join(safe_columns)
+    wildcards = ','.join(['?'] * len(safe_columns))
+
+    insert_query = 'INSERT INTO %s (%s) VALUES (%s)' % (table, columns, wildcards)
+
+    if batch_size is None:
+        if journal is not None:
+            raise ValueError('A journal needs a batch_size')
+
+        cursor = conn.cursor()
         if clear_table:
             cursor.execute('TRUNCATE TABLE [%s]' % table)
 
-        safe_columns = ['[' + col.replace(' ','_').strip() + ']' 
-                        for col in frame.columns]
-        columns = ','.join(safe_columns)
-        wildcards = ','.join(['?'] * len(safe_columns))
+        cursor.executemany(insert_query, _native_rows(frame))
+        cursor.close()
+        conn.commit()
+        return
 
-        insert_query = 'INSERT INTO %s (%s) VALUES (%s)' % (table, columns, wildcards)
+    _write_batches(frame, conn, table, insert_query, clear_table, batch_size,
+                   journal, retries, backoff)
 
-        # Have to replace any kind of NaN types to None because SQL
-        # only understands how to interpret None.
-        data = []
-        for x in frame.values:
-            row = [None if pd.isnull(i) else i for i in x]
-            data.append(row)
-            # cursor.execute(insert_query, row)
+def _native_rows(frame):
+    """
+    Returns the rows of a DataFrame as lists of native Python values, with 
+    every kind of NaN replaced by `None` because SQL only understands how to
+    interpret None. Database drivers can't bind numpy scalars or pandas 
+    Timestamps.
+    """
 
-        cursor.executemany(insert_query, data)
-    except Exception:
-        raise
-    else:
+    columns = []
+    for i in range(frame.shape[1]):
+        values = frame.iloc[:, i].values
+        kind = values.dtype.kind
+        if kind == 'M':
+            _check_datetimes(frame.columns[i], frame.dtypes.iloc[i], values)
+            # datetime64[us] turns into datetime objects, and NaT into None
+            values = np.asarray(values, dtype='datetime64[us]').astype(object)
+        elif kind in 'biu':
+            values = np.asarray(values).astype(object)
+        else:
+            values = np.array(values, dtype=object)
+            values[pd.isnull(values)] = None
+        columns.append(values.tolist())
+
+    return [list(row) for row in zip(*columns)]
+
+def _check_datetimes(column, dtype, values):
+    """
+    Warns about what datetime objects can't hold: the time zone of an aware
+    column, which is written as naive UTC, and nanoseconds, which are
+    truncated to microseconds.
+    """
+
+    if getattr(dtype, 'tz', None) is not None:
+        warnings.warn('Column %r is timezone-aware (%s), writing it as naive '
+                      'UTC' % (column, dtype.tz))
+
+    nanos = np.asarray(values, dtype='datetime64[ns]').view(np.int64)
+    nanos = nanos[nanos != np.iinfo(np.int64).min]
+    if (nanos % 1000 != 0).any():
+        warnings.warn('Column %r has nanoseconds, truncating them to '
+                      'microseconds' % (column,))
+
+def _fingerprint(frame):
+    """Digest of every value of a frame, in order."""
+
+    digest = hashlib.blake2b(digest_size=16)
+    for i in range(frame.shape[1]):
+        hashes, valid = hash_values(frame.iloc[:, i].values)
+        digest.update(hashes.tobytes())
+        digest.update(valid.tobytes())
+    return digest.hexdigest()
+
+def _read_journal(journal):
+    try:
+        with open(journal) as f:
+            return json.load(f)
+    except IOError:
+        return None
+
+def _write_journal(journal, entry):
+    # replace the journal in one step so it's never half written
+    with open(journal + '.tmp', 'w') as f:
+        json.dump(entry, f)
+    os.replace(journal + '.tmp', journal)
+
+def _write_batches(frame, conn, table, insert_query, clear_table, batch_size,
+                   journal, retries, backoff):
+    load = {
+        'table': table,
+        'rows': len(frame),
+        'batch_size': batch_size,
+        'columns': [str(col) for col in frame.columns],
+    }
+
+    completed = set()
+    resuming = False
+    if journal is not None:
+        # a rerun with different data under the same shape must not skip
+        # the batches the journal says are done
+        load['fingerprint'] = _fingerprint(frame)
+        entry = _read_journal(journal)
+        if entry is not None:
+            if {key: entry.get(key) for key in load} != load:
+                raise ValueError('Journal %s belongs to a different load' 
+                                 % journal)
+            completed = set(entry['completed'])
+            resuming = True
+
+    if clear_table and not resuming:
+        cursor = conn.cursor()
+        cursor.execute('TRUNCATE TABLE [%s]' % table)
         cursor.close()
-        conn.commit()
\ No newline at end of file
+        conn.commit()
+
+    for batch, start in enumerate(range(0, len(frame), batch_size)):
+        if batch in completed:
+            continue
+
+        rows = _native_rows(frame.iloc[start:start + batch_size])
+
+        for attempt in range(retries + 1):
+            cursor = conn.cursor()
+            try:
+                cursor.executemany(insert_query, rows)
+                cursor.close()
+                conn.commit()
+                break
+            except Exception:
+                try:
+                    conn.rollback()
+                except Exception:
+                    # the connection itself may be gone
+                    pass
+                if attempt == retries:
+                    raise
+                time.sleep(backoff * 2 ** attempt)
+
+        completed.add(batch)
+        if journal is not None:
+            entry = dict(load, completed=sorted(completed))
+            _write_journal(journal, entry)
+
+    # the load is finished, a rerun should start from scratch
+    if journal is not None and os.path.exists(journal):
+        os.remove(journal)
+
+def _split_frame(frame, split_rows):
+    """Row ranges of at most `split_rows` rows covering `frame`."""
+
+    if not split_rows or len(frame) <= split_rows:
+        return [(0, len(frame))]
+    return [(start, min(start + split_rows, len(frame)))
+            for start in range(0, len(frame), split_rows)]
+
+@instrumented
+def write_frames(frames, conn_factory, workers=4, clear_table=False,
+                 split_rows=None, batch_size=None, retries=3, backoff=1.):
+    """
+    Writes several DataFrames to their own tables at the same time, with one
+    database connection per worker thread. Database drivers release the GIL
+    while waiting on the server, so independent inserts overlap.
+
+    Returns a dictionary of table -> ``{'rows', 'parts', 'seconds'}`` where
+    `seconds` is the wall time from the first part of a table starting to
+    the last one finishing.
+
+    :param frames: Dictionary of table name -> DataFrame.
+    :param conn_factory: Function taking no arguments that returns a new
+                         database connection. Called once per worker.
+    :param workers: Number of worker threads (and connections).
+    :param clear_table: If `True`, delete all rows of every table before any
+                        rows are written.
+    :param split_rows: Frames longer than this are split into parts of this
+                       many rows, written by different workers as separate
+                       transactions, so one big table doesn't hold up the
+                       whole publish. If a part fails the parts already
+                       committed stay in the table.
+    :param batch_size: Passed to :func:`write_frame` for every part.
+    :param retries: Passed to :func:`write_frame`.
+    :param backoff: Passed to :func:`write_frame`.
+
+    If any part fails the other parts are still written, and once every
+    worker is done a :class:`WriteFramesError` is raised with the outcome of
+    every table.
+    """
+
+    if clear_table:
+        conn = conn_factory()
+        try:
+            cursor = conn.cursor()
+            for table in frames:
+                cursor.execute('TRUNCATE TABLE [%s]' % table)
+            cursor.close()
+            conn.commit()
+        finally:
+            conn.close()
+
+    # biggest parts first so the long ones don't start last
+    parts = [(table, start, stop) for table, frame in frames.items()
+             for start, stop in _split_frame(frame, split_rows)]
+    parts.sort(key=lambda part: part[2] - part[1], reverse=True)
+
+    pending = queue.Queue()
+    for part in parts:
+        pending.put(part)
+
+    lock = threading.Lock()
+    timings = {}
+    errors = {}
+
+    def worker():
+        conn = None
+        try:
+            while True:
+                try:
+                    table, start, stop = pending.get_nowait()
+                except queue.Empty:
+                    return
+                started = time.time()
+                try:
+                    if conn is None:
+                        conn = conn_factory()
+                    write_frame(frames[table].iloc[start:stop], conn, table,
+                                batch_size=batch_size, retries=retries,
+                                backoff=backoff)
+                except Exception as e:
+                    with lock:
+                        # the first failed part of a table stands for it
+                        errors.setdefault(table, e)
+                    # the rows of the part inserted before it failed must
+                    # not be committed along with the next part
+                    if conn is not None:
+                        try:
+                            conn.rollback()
+                        except Exception:
+                            conn.close()
+                            conn = None
+                    continue
+                finished = time.time()
+                with lock:
+                    first, last = timings.get(table, (started, finished))
+                    timings[table] = (min(first, started),
+                                      max(last, finished))
+        finally:
+            # connections are closed on the thread that opened them, some
+            # drivers (sqlite3) don't allow anything else
+            if conn is not None:
+                conn.close()
+
+    workers = max(1, min(workers, len(parts)))
+    with concurrent_futures.ThreadPoolExecutor(workers) as executor:
+        # each worker gets a copy of the caller's context so its calls are
+        # instrumented like the caller's
+        futures = [executor.submit(contextvars.copy_context().run, worker) 
+                   for _ in range(workers)]
+        for future in futures:
+            future.result()
+
+    result = {}
+    for table, frame in frames.items():
+        if table in errors:
+            result[table] = errors[table]
+            continue
+        first, last = timings.get(table, (0., 0.))
+        result[table] = {
+            'rows': len(frame),
+            'parts': len(_split_frame(frame, split_rows)),
+            'seconds': last - first,
+        }
+
+    if errors:
+        raise WriteFramesError(result)
+
+    return result
+
+
+class WriteFramesError(Exception):
+    """
+    Raised by :func:`write_frames` when some tables failed to write.
+
+    `results` maps every table to the exception of its first failed part or,
+    if it was written, to its ``{'rows', 'parts', 'seconds'}`` dictionary.
+    `errors` only holds the failed tables.
+    """
+
+    def __init__(self, results):
+        self.results = results
+        self.errors = {table: outcome for table, outcome in results.items()
+                       if isinstance(outcome, Exception)}
+
+        failures = ', '.join('%s (%s: %s)' % (table, type(e).__name__, e)
+                             for table, e in sorted(self.errors.items()))
+        super(WriteFramesError, self).__init__(
+            'Failed to write %d of %d tables: %s'
+            % (len(self.errors), len(results), failures))
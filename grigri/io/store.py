@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+"""
+    grigri.io.store
+    ~~~~~~~~~~~~~~~
+
+    A local dataset store for extracts. A frame is split into partitions by
+    the period (day, week, month, quarter or year) of a date column and each
+    partition is written as one binary file per column::
+
+        extracts/calls/
+            _metadata.json
+            2013-08-01.1/c0.npy
+            2013-08-01.1/c1.npy
+            2013-09-01.1/c0.npy
+            2013-09-01.2/c0.npy
+            ...
+
+    The metadata file lists the columns and, for every partition, its row
+    count, the min and max of the date column and its segments: appending 
+    to a partition writes the new rows as one more segment (``.2`` above) 
+    instead of rewriting the rows already there. Reads only open the
+    partitions overlapping the requested dates and only the requested
+    columns, memory-mapping the files where the dtype allows it.
+
+    Files are never changed once written. A write puts all of its segments
+    in new directories, then commits them with a single update of the 
+    metadata file, and only then removes the segments it replaced. A write
+    that crashes halfway leaves the store as it was, so it can simply be 
+    run again without appending anything twice.
+
+    Timezone-aware date columns are stored, and read back, in UTC without
+    their timezone.
+
+    >>> write_dataset(frame, 'extracts/calls', 'CallDate')
+    >>> read_dataset('extracts/calls', month_range(datetime(2013, 9, 5)),
+    ...              columns=['CallDate', 'Duration'])
+"""
+
+import json
+import os
+import pickle
+import re
+import shutil
+from datetime import datetime, timedelta, timezone
+
+from .._lazy import LazyModule
+from ..dates.ordinal import period_ordinals, ordinal_dates
+from ..instrument import instrumented
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+__all__ = ['write_dataset', 'read_dataset', 'dataset_partitions']
+
+_metadata_file = '_metadata.json'
+
+# partition holding rows whose date is missing
+_null_partition = 'null'
+
+_partition_freqs = ('d', 'w', 'm', 'q', 'y')
+
+
+def _column_file(directory, position, dtype):
+    # flat dtypes go in .npy files that can be memory-mapped, anything else
+    # (strings, mixed objects) is pickled
+    extension = '.pkl' if dtype.kind == 'O' else '.npy'
+    return os.path.join(directory, 'c%d%s' % (position, extension))
+
+def _save_columns(frame, directory):
+    """
+    Writes every column of `frame` to its own file in `directory` and
+    returns a list of ``[name, dtype]`` pairs describing them. Columns are
+    stored by position so any column name is allowed.
+    """
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    schema = []
+    for i, name in enumerate(frame.columns):
+        values = np.asarray(frame.iloc[:, i].values)
+        if values.dtype.kind not in 'biufcmM':
+            values = values.astype(object)
+
+        path = _column_file(directory, i, values.dtype)
+        if values.dtype.kind == 'O':
+            with open(path, 'wb') as f:
+                pickle.dump(values, f, pickle.HIGHEST_PROTOCOL)
+        else:
+            np.save(path, values)
+
+        schema.append([name, values.dtype.str])
+
+    return schema
+
+def _load_columns(directory, schema, columns=None, mmap=True):
+    """
+    Reads the columns written by :func:`_save_columns` back into a dict of
+    arrays keyed by column name.
+
+    :param schema: The list returned by :func:`_save_columns`.
+    :param columns: Names of the columns to read. Defaults to all of them.
+    :param mmap: Memory-map .npy files instead of reading them into memory.
+    """
+
+    positions = [i for i, (name, _) in enumerate(schema)
+                 if columns is None or name in columns]
+
+    data = {}
+    for i in positions:
+        name, dtype = schema[i]
+        path = _column_file(directory, i, np.dtype(dtype))
+        if path.endswith('.pkl'):
+            with open(path, 'rb') as f:
+                data[name] = pickle.load(f)
+        else:
+            data[name] = np.load(path, mmap_mode='r' if mmap else None)
+
+    return data
+
+def _read_metadata(path):
+    try:
+        with open(os.path.join(path, _metadata_file)) as f:
+            return json.load(f)
+    except IOError:
+        return None
+
+def _write_metadata(path, metadata):
+    # write to a temporary file first so a crash can't leave a truncated
+    # index behind
+    target = os.path.join(path, _metadata_file)
+    with open(target + '.tmp', 'w') as f:
+        json.dump(metadata, f, indent=2, sort_keys=True)
+    os.replace(target + '.tmp', target)
+
+# directory of a segment: partition key and the write that made it
+_segment_pattern = re.compile(r'^(\d{4}-\d{2}-\d{2}|%s)\.\d+$' % _null_partition)
+
+def _segments(part, key):
+    """
+    Segments of a partition. Stores written before partitions had segments
+    keep the partition's files in one directory named after it.
+    """
+
+    if 'segments' in part:
+        return part['segments']
+    return [{'directory': key, 'rows': part['rows'], 'dtypes': part['dtypes']}]
+
+def _segment_schema(metadata, segment):
+    # dtypes can differ between segments e.g. an int column that has
+    # nulls in one month only
+    names = [name for name, _ in metadata['columns']]
+    return [list(pair) for pair in zip(names, segment['dtypes'])]
+
+def _naive_utc(value):
+    """A datetime without timezone, converted to UTC first if it had one."""
+
+    value = pd.Timestamp(value).to_pydatetime()
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _isoformat(value):
+    return _naive_utc(value).isoformat()
+
+def _parse_iso(value):
+    # offsets are only found in stores written before tz-aware dates were
+    # converted to UTC
+    for fmt in ('%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S',
+                '%Y-%m-%dT%H:%M:%S.%f%z', '%Y-%m-%dT%H:%M:%S%z'):
+        try:
+            return _naive_utc(datetime.strptime(value, fmt))
+        except ValueError:
+            pass
+    raise ValueError("Not an ISO 8601 timestamp: {!r}".format(value))
+
+@instrumented
+def write_dataset(frame, path, date_column, freq='m', append=False):
+    """
+    Writes a DataFrame to a dataset store partitioned by `date_column`.
+
+    Partitions that already exist for the periods in `frame` are replaced
+    (or appended to if `append` is `True`); all other partitions are left
+    alone, so a store can be refreshed one month at a time. Nothing is 
+    visible to readers until every partition is written.
+
+    :param frame: DataFrame to write. The index is not stored.
+    :param path: Directory of the store. Created if it doesn't exist.
+    :param date_column: Name of the datetime column to partition on.
+    :param freq: Period of each partition, one of 'd', 'w', 'm', 'q' or 'y'.
+    :param append: Add the rows to existing partitions instead of replacing
+                   them.
+    """
+
+    freq = freq.lower()
+    if freq not in _partition_freqs:
+        raise ValueError("Frequency not recognized: {}".format(freq))
+
+    metadata = _read_metadata(path)
+    if metadata is None:
+        metadata = {'date_column': date_column, 'freq': freq,
+                    'columns': None, 'partitions': {}}
+    elif (metadata['date_column'] != date_column
+          or metadata['freq'] != freq):
+        raise ValueError("Store at {} is partitioned on {!r} by {!r}".format(
+                         path, metadata['date_column'], metadata['freq']))
+    elif (metadata['columns'] is not None
+          and [name for name, _ in metadata['columns']] != list(frame.columns)):
+        raise ValueError("Columns don't match the store at {}".format(path))
+
+    if not os.path.isdir(path):
+        os.makedirs(path)
+
+    dates = pd.to_datetime(frame[date_column])
+    if getattr(dates.dtype, 'tz', None) is not None:
+        dates = dates.dt.tz_convert('UTC').dt.tz_localize(None)
+    frame = frame.copy()
+    frame[date_column] = dates
+
+    missing = pd.isnull(dates).values
+    keys = np.empty(len(frame), dtype=object)
+    keys[missing] = _null_partition
+    if (~missing).any():
+        ordinals = period_ordinals(dates.values[~missing], freq)
+        unique_ordinals, inverse = np.unique(ordinals, return_inverse=True)
+        starts = ordinal_dates(unique_ordinals, freq)
+        keys[~missing] = np.asarray(starts.strftime('%Y-%m-%d'))[inverse]
+
+    # every write puts its files in new directories numbered after it. A
+    # directory with this number is left over from a write that crashed 
+    # before committing, and is not in the metadata
+    generation = metadata.get('generation', 0) + 1
+    metadata['generation'] = generation
+
+    replaced = []
+    for key in pd.unique(keys):
+        part = frame.iloc[np.flatnonzero(keys == key)]
+        existing = metadata['partitions'].get(key)
+
+        name = '%s.%d' % (key, generation)
+        directory = os.path.join(path, name)
+        if os.path.isdir(directory):
+            shutil.rmtree(directory)
+        schema = _save_columns(part, directory)
+        if metadata['columns'] is None:
+            metadata['columns'] = schema
+
+        segment = {'directory': name, 'rows': len(part),
+                   'dtypes': [dtype for _, dtype in schema]}
+        bounds = [None, None]
+        if key != _null_partition:
+            bounds = [_isoformat(part[date_column].min()), 
+                      _isoformat(part[date_column].max())]
+
+        if existing is None:
+            segments = [segment]
+        elif append:
+            segments = _segments(existing, key) + [segment]
+            if key != _null_partition:
+                bounds = [_isoformat(min(_parse_iso(existing['min']), 
+                                         _parse_iso(bounds[0]))),
+                          _isoformat(max(_parse_iso(existing['max']), 
+                                         _parse_iso(bounds[1])))]
+        else:
+            replaced.extend(_segments(existing, key))
+            segments = [segment]
+
+        metadata['partitions'][key] = {
+            'rows': sum(segment['rows'] for segment in segments),
+            'min': bounds[0],
+            'max': bounds[1],
+            'segments': segments,
+        }
+
+    _write_metadata(path, metadata)
+
+    # the replaced segments are unreachable now. Memory-mapped files can't 
+    # be deleted on Windows while a reader has them open, those are removed
+    # by a later write
+    for segment in replaced:
+        shutil.rmtree(os.path.join(path, segment['directory']), 
+                      ignore_errors=True)
+    _remove_orphans(path, metadata)
+
+def _remove_orphans(path, metadata):
+    """Removes segment directories the metadata doesn't point to."""
+
+    referenced = set(segment['directory'] 
+                     for key, part in metadata['partitions'].items()
+                     for segment in _segments(part, key))
+    for name in os.listdir(path):
+        if _segment_pattern.match(name) and name not in referenced:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+def _date_bounds(dates):
+    """
+    Returns an inclusive start and exclusive end from either a DatetimeIndex
+    (e.g. from :func:`month_range`) or a ``(start, end)`` pair. Ranges of
+    whole days include all of their last day.
+    """
+
+    if isinstance(dates, tuple):
+        start, end = [_naive_utc(dt) for dt in dates]
+    else:
+        dates = pd.DatetimeIndex(dates)
+        start, end = _naive_utc(dates.min()), _naive_utc(dates.max())
+
+    if end == datetime(end.year, end.month, end.day):
+        end += timedelta(days=1)
+    else:
+        end += timedelta(microseconds=1)
+
+    return start, end
+
+def dataset_partitions(path, dates=None):
+    """
+    Returns the names of the partitions of a store overlapping `dates`, in
+    chronological order.
+
+    :param dates: DatetimeIndex such as ``month_range(dt)`` or a
+                  ``(start, end)`` pair. `None` returns every partition.
+    """
+
+    metadata = _read_metadata(path)
+    if metadata is None:
+        raise IOError("No dataset store at {}".format(path))
+
+    partitions = metadata['partitions']
+    if dates is None:
+        return sorted(partitions)
+
+    start, end = _date_bounds(dates)
+
+    return sorted(key for key, part in partitions.items()
+                  if part['min'] is not None
+                  and _parse_iso(part['min']) < end
+                  and _parse_iso(part['max']) >= start)
+
+@instrumented
+def read_dataset(path, dates=None, columns=None, mmap=True):
+    """
+    Reads a DataFrame back from a dataset store written by
+    :func:`write_dataset`.
+
+    :param path: Directory of the store.
+    :param dates: Only return rows whose date falls within these dates.
+                  Either a DatetimeIndex like ``month_range(dt)`` or
+                  ``swing_range(-30)`` or a ``(start, end)`` pair. `None`
+                  returns everything, including rows with a missing date.
+    :param columns: Names of the columns to read. Defaults to all of them.
+    :param mmap: Memory-map the column files. The frame then uses the 
+                 mapped files without copying them, unless it spans several
+                 partitions or segments, or the date filter cuts through a
+                 partition.
+    """
+
+    metadata = _read_metadata(path)
+    if metadata is None:
+        raise IOError("No dataset store at {}".format(path))
+
+    schema = metadata['columns'] or []
+    names = [name for name, _ in schema]
+    if columns is None:
+        columns = names
+    else:
+        unknown = [col for col in columns if col not in names]
+        if unknown:
+            raise KeyError("Columns not in the store: {}".format(unknown))
+
+    date_column = metadata['date_column']
+    load = list(columns)
+    if dates is not None and date_column not in load:
+        load.append(date_column)
+
+    if dates is not None:
+        start, end = _date_bounds(dates)
+
+    pieces = []
+    for key in dataset_partitions(path, dates):
+        part = metadata['partitions'][key]
+        # only partitions straddling the range need filtering
+        inside = dates is None or (_parse_iso(part['min']) >= start
+                                   and _parse_iso(part['max']) < end)
+
+        for segment in _segments(part, key):
+            data = _load_columns(os.path.join(path, segment['directory']),
+                                 _segment_schema(metadata, segment), load, 
+                                 mmap)
+
+            if not inside:
+                values = data[date_column]
+                mask = ((values >= np.datetime64(start))
+                        & (values < np.datetime64(end)))
+                data = {name: values[mask] for name, values in data.items()}
+
+            # no copy, so memory-mapped columns stay memory-mapped
+            pieces.append(pd.DataFrame(data, columns=load, copy=False))
+
+    if not pieces:
+        empty = {name: np.empty(0, dtype=np.dtype(dtype))
+                 for name, dtype in schema if name in columns}
+        return pd.DataFrame(empty, columns=list(columns))
+
+    if len(pieces) == 1:
+        frame = pieces[0]
+    else:
+        frame = pd.concat(pieces, ignore_index=True)
+
+    if list(frame.columns) != list(columns):
+        frame = frame[list(columns)]
+
+    return frame
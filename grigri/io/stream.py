@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+    grigri.io.stream
+    ~~~~~~~~~~~~~~~~
+
+    Chunked reading and writing of DataFrames as newline-delimited JSON
+    (one object per row) and CSV. Only one chunk of rows is ever turned into
+    text at a time, so exports don't build one enormous string the way
+    :meth:`DataFrame.to_json` does.
+
+    Datetimes are written as ISO 8601 strings, with their UTC offset if they
+    are timezone-aware (those are read back as UTC), and missing values as
+    ``null`` (or an empty CSV field). Columns come back typed by passing the same
+    kind of column -> Python type mapping that :func:`grigri.io.sql.coerce_dtypes`
+    takes, e.g. from :func:`column_types`::
+
+        >>> types = column_types(frame)
+        >>> write_ndjson(frame, 'export.json')
+        >>> read_ndjson('export.json', types)
+"""
+
+import decimal
+import io
+from contextlib import contextmanager
+from datetime import datetime, date
+
+import json
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+from .._lazy import LazyModule
+from ..instrument import instrumented
+from .sql import coerce_dtypes
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+__all__ = ['column_types', 'write_ndjson', 'read_ndjson', 'write_csv',
+           'read_csv']
+
+_default_chunksize = 10000
+
+# end of an ISO 8601 timestamp with a UTC offset
+_offset_pattern = r'(?:[+-]\d\d:\d\d|Z)$'
+
+# numpy dtype kind -> native type understood by `coerce_dtypes`
+_kind_types = {
+    'b': bool,
+    'i': int,
+    'u': int,
+    'f': float,
+    'M': datetime,
+    'O': str,
+}
+
+
+def column_types(frame):
+    """
+    Returns a dictionary of column -> native Python type for a DataFrame,
+    in the format :func:`grigri.io.sql.coerce_dtypes` expects. Object
+    columns are treated as strings.
+    """
+
+    return {col: _kind_types.get(dtype.kind, str)
+            for col, dtype in zip(frame.columns, frame.dtypes)}
+
+@contextmanager
+def _open(path_or_buf, mode):
+    """Opens a path as utf-8 text, or passes an open file through."""
+
+    if hasattr(path_or_buf, 'write' if 'w' in mode else 'read'):
+        yield path_or_buf
+    else:
+        with io.open(path_or_buf, mode, encoding='utf-8') as f:
+            yield f
+
+def _chunks(frames, chunksize):
+    """Yields pieces of at most `chunksize` rows from a frame or frames."""
+
+    if isinstance(frames, pd.DataFrame):
+        frames = [frames]
+
+    for frame in frames:
+        for start in range(0, len(frame), chunksize):
+            yield frame.iloc[start:start + chunksize]
+
+def _iso_strings(values):
+    """ISO 8601 strings for datetime64 values, `None` for NaT."""
+
+    values = values.astype('datetime64[ns]')
+    missing = pd.isnull(values)
+
+    # only write fractions of seconds if there are any
+    whole_seconds = (values[~missing].astype(np.int64) % 10 ** 9 == 0).all()
+    strings = np.datetime_as_string(values, unit='s' if whole_seconds else 'us')
+
+    strings = strings.astype(object)
+    strings[missing] = None
+    return strings
+
+def _iso_column(column):
+    """
+    ISO 8601 strings for a datetime Series. Timezone-aware timestamps keep
+    their UTC offset, `.values` would turn them into naive UTC.
+    """
+
+    if getattr(column.dtype, 'tz', None) is None:
+        return _iso_strings(column.values)
+
+    strings = np.empty(len(column), dtype=object)
+    for i, value in enumerate(column):
+        strings[i] = None if pd.isnull(value) else value.isoformat()
+    return strings
+
+def _json_column(column):
+    """Turns a Series into a list of values the json encoder understands."""
+
+    values = column.values
+    kind = column.dtype.kind
+    if kind == 'M':
+        return _iso_column(column).tolist()
+    if kind == 'f':
+        # NaN isn't valid JSON
+        values = values.astype(object)
+        values[pd.isnull(values)] = None
+        return values.tolist()
+    if kind in 'biu':
+        return values.tolist()
+
+    result = values.astype(object)
+    missing = pd.isnull(result)
+    result[missing] = None
+    for i in np.flatnonzero(~missing):
+        value = result[i]
+        if isinstance(value, (datetime, date)):
+            result[i] = value.isoformat()
+        elif isinstance(value, decimal.Decimal):
+            result[i] = float(value)
+    return result.tolist()
+
+def _dumps(row):
+    if ujson is not None:
+        # ujson rounds floats to 10 significant digits by default, 17 is
+        # what it takes for every double to read back unchanged
+        return ujson.dumps(row, ensure_ascii=False, double_precision=17)
+    return json.dumps(row, ensure_ascii=False)
+
+@instrumented
+def write_ndjson(frames, path_or_buf, chunksize=_default_chunksize):
+    """
+    Writes a DataFrame, or an iterable of DataFrames with the same columns,
+    as newline-delimited JSON. The index is not written.
+
+    :param frames: DataFrame or iterable of DataFrames e.g. chunks coming
+                   out of a database.
+    :param path_or_buf: File path or open text file.
+    :param chunksize: Number of rows encoded at a time.
+    """
+
+    with _open(path_or_buf, 'w') as f:
+        for chunk in _chunks(frames, chunksize):
+            columns = [str(col) for col in chunk.columns]
+            values = [_json_column(chunk.iloc[:, i])
+                      for i in range(chunk.shape[1])]
+
+            lines = [_dumps(dict(zip(columns, row))) for row in zip(*values)]
+            f.write(u'\n'.join(lines))
+            f.write(u'\n')
+
+def _has_offsets(column):
+    """Whether any of the strings of a column ends in a UTC offset."""
+
+    strings = column.dropna()
+    if not len(strings) or strings.dtype.kind != 'O':
+        return False
+    return strings.astype(str).str.contains(_offset_pattern).any()
+
+def _typed(frame, types):
+    if types:
+        types = {col: dtype for col, dtype in types.items()
+                 if col in frame.columns}
+        for col, dtype in list(types.items()):
+            if dtype is datetime and _has_offsets(frame[col]):
+                # offsets may change with daylight saving time, so bring 
+                # the timestamps to one zone
+                frame[col] = pd.to_datetime(frame[col], utc=True)
+                del types[col]
+        frame = coerce_dtypes(frame, types)
+    return frame
+
+def _read_ndjson_chunks(path_or_buf, types, chunksize, columns):
+    loads = (ujson or json).loads
+    with _open(path_or_buf, 'r') as f:
+        records = []
+        for line in f:
+            if not line.strip():
+                continue
+            records.append(loads(line))
+            if len(records) == chunksize:
+                yield _typed(pd.DataFrame.from_records(records, columns=columns),
+                             types)
+                records = []
+
+        if records:
+            yield _typed(pd.DataFrame.from_records(records, columns=columns),
+                         types)
+
+@instrumented
+def read_ndjson(path_or_buf, types=None, chunksize=None, columns=None):
+    """
+    Reads newline-delimited JSON into a DataFrame.
+
+    :param path_or_buf: File path or open text file.
+    :param types: Dictionary of column -> native Python type (``int``,
+                  ``float``, ``datetime``, ``date``, ``bool`` or ``str``) to
+                  convert columns to, see :func:`column_types`. Datetime
+                  columns become datetime64 and int columns with nulls
+                  become floats.
+    :param chunksize: If set, returns an iterator of DataFrames of this many
+                      rows instead of one DataFrame.
+    :param columns: Order of the columns. Defaults to the keys of the first
+                    row.
+    """
+
+    chunks = _read_ndjson_chunks(path_or_buf, types,
+                                 chunksize or _default_chunksize, columns)
+    if chunksize:
+        return chunks
+
+    chunks = list(chunks)
+    if not chunks:
+        return pd.DataFrame(columns=columns)
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+@instrumented
+def write_csv(frames, path_or_buf, chunksize=_default_chunksize):
+    """
+    Writes a DataFrame, or an iterable of DataFrames with the same columns,
+    as CSV with a header row. The index is not written and datetimes are
+    written as ISO 8601.
+
+    :param frames: DataFrame or iterable of DataFrames.
+    :param path_or_buf: File path or open text file.
+    :param chunksize: Number of rows formatted at a time.
+    """
+
+    with _open(path_or_buf, 'w') as f:
+        header = True
+        for chunk in _chunks(frames, chunksize):
+            if any(dtype.kind == 'M' for dtype in chunk.dtypes):
+                # rebuild by position, column names may repeat
+                data = {}
+                for i in range(chunk.shape[1]):
+                    column = chunk.iloc[:, i]
+                    data[i] = (_iso_column(column) if column.dtype.kind == 'M'
+                               else column.values)
+                columns = chunk.columns
+                chunk = pd.DataFrame(data, columns=range(len(columns)))
+                chunk.columns = columns
+            chunk.to_csv(f, header=header, index=False)
+            header = False
+
+@instrumented
+def read_csv(path_or_buf, types=None, chunksize=None):
+    """
+    Reads a CSV written by :func:`write_csv` (or any CSV with a header row)
+    into a DataFrame.
+
+    :param path_or_buf: File path or open text file.
+    :param types: Dictionary of column -> native Python type, as in
+                  :func:`read_ndjson`.
+    :param chunksize: If set, returns an iterator of DataFrames of this many
+                      rows instead of one DataFrame.
+    """
+
+    # read everything as text so the types mapping decides, not the parser
+    dtype = None
+    if types:
+        dtype = {col: object for col, kind in types.items()
+                 if kind in (str, datetime, date)}
+
+    if chunksize:
+        reader = pd.read_csv(path_or_buf, dtype=dtype, chunksize=chunksize)
+        return (_typed(chunk, types) for chunk in reader)
+
+    return _typed(pd.read_csv(path_or_buf, dtype=dtype), types)
@@ -8,14 +8,239 @@ used on any "queue-like" system.
 """
 
 from datetime import datetime
-from dateutil.parser import parse
-
-import numpy as np
-import pandas as pd
 
+from ._lazy import LazyModule
+from .instrument import instrumented
+from .io.sql import read_frame
 from .tools import is_null
+from .tseries import resample_reindex, _resample, _offset_alias
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+dateutil_parser = LazyModule('dateutil.parser')
+
+
+# offsets marking a missing timestamp e.g. a job that hasn't closed yet
+_missing_offset = -2 ** 31
+
+_event_units = {
+    'd': ('datetime64[D]', 1),
+    'min': ('datetime64[m]', 1440),
+    't': ('datetime64[m]', 1440),
+}
 
 
+class EventLog(object):
+    """
+    Compact, array-backed store of queue events: one created and (possibly
+    missing) closed timestamp per job plus an optional weight and group.
+
+    Timestamps are kept as int32 day (or minute) offsets from an epoch,
+    weights as float32 and groups as int32 codes into an array of the
+    distinct group labels, which takes 4-8 times less memory than a
+    DataFrame with datetime64 and object columns. Every function in this
+    module accepts an :class:`EventLog` where it takes a DataFrame of jobs 
+    or a flow Series.
+
+    >>> log = EventLog.from_frame(tickets, 'Created', 'Closed', 
+    ...                           group_column='Team')
+    >>> backlog(log)
+    >>> arrivals(log.select('Billing'), freq='w')
+
+    :param created: Array-like of timestamps jobs entered the queue.
+    :param closed: Array-like of timestamps jobs left the queue, NaT for
+                   jobs still open.
+    :param weights: Optional array-like of job weights e.g. system size.
+    :param groups: Optional array-like of group labels.
+    :param unit: Resolution of the stored timestamps, 'd' for days or 'min'
+                 for minutes. Anything finer is truncated.
+    :param names: Names the created and closed timestamps go by, so 
+                  functions taking column names like :func:`queues` work,
+                  optionally followed by the names of the weight and group
+                  columns for :meth:`to_frame`.
+    """
+
+    __slots__ = ('unit', 'epoch', 'created', 'closed', 'weights', 'codes',
+                 'groups', 'names')
+
+    def __init__(self, created, closed=None, weights=None, groups=None, 
+                 unit='d', names=('Created', 'Closed', 'Weight', 'Group')):
+        if unit not in _event_units:
+            raise ValueError("Unit not recognized: {}".format(unit))
+
+        self.unit = unit
+        self.names = (tuple(names) 
+                      + ('Created', 'Closed', 'Weight', 'Group')[len(names):])
+
+        dtype, _ = _event_units[unit]
+        created = np.asarray(created, dtype='datetime64[ns]').astype(dtype)
+        valid = created[~pd.isnull(created)]
+        # the epoch is a midnight, so minute offsets divide into calendar
+        # days
+        self.epoch = (valid.min().astype('datetime64[D]') if len(valid) 
+                      else np.datetime64('1970-01-01')).astype(dtype)
+
+        self.created = self._offsets(created)
+        if closed is None:
+            self.closed = np.full(len(created), _missing_offset, dtype=np.int32)
+        else:
+            self.closed = self._offsets(
+                np.asarray(closed, dtype='datetime64[ns]').astype(dtype))
+
+        self.weights = (None if weights is None 
+                        else np.asarray(weights, dtype=np.float32))
+
+        if groups is None:
+            self.codes, self.groups = None, None
+        else:
+            codes, uniques = pd.factorize(np.asarray(groups, dtype=object), 
+                                          sort=True)
+            self.codes = codes.astype(np.int32)
+            self.groups = np.asarray(uniques, dtype=object)
+
+    def _offsets(self, values):
+        offsets = values.astype(np.int64) - self.epoch.astype(np.int64)
+
+        missing = pd.isnull(values)
+        offsets[missing] = _missing_offset
+        if len(offsets) and (offsets[~missing].max() > np.iinfo(np.int32).max
+                             or offsets.min() < _missing_offset):
+            raise OverflowError("Timestamps span too long for int32 offsets")
+
+        return offsets.astype(np.int32)
+
+    @classmethod
+    def from_frame(cls, frame, created_column='Created', closed_column=None,
+                   weight_column=None, group_column=None, unit='d'):
+        """
+        Builds an :class:`EventLog` from a DataFrame with a row per job.
+        """
+
+        return cls(frame[created_column],
+                   frame[closed_column] if closed_column else None,
+                   frame[weight_column] if weight_column else None,
+                   frame[group_column] if group_column else None,
+                   unit=unit, names=(created_column, closed_column or 'Closed',
+                                     weight_column or 'Weight',
+                                     group_column or 'Group'))
+
+    def __len__(self):
+        return len(self.created)
+
+    @property
+    def nbytes(self):
+        """Bytes taken up by the arrays."""
+
+        arrays = [self.created, self.closed, self.weights, self.codes, 
+                  self.groups]
+        return sum(array.nbytes for array in arrays if array is not None)
+
+    def _which(self, name):
+        """Maps a column name or 'created'/'closed' to an offsets array."""
+
+        if name in ('created', self.names[0]):
+            return self.created
+        if name in ('closed', self.names[1]):
+            return self.closed
+        raise KeyError(name)
+
+    def dates(self, name='created'):
+        """Returns created or closed timestamps as datetime64[ns], NaT if 
+        missing."""
+
+        offsets = self._which(name)
+        dtype, _ = _event_units[self.unit]
+        dates = (self.epoch + offsets.astype(np.int64)).astype(dtype)
+        dates = dates.astype('datetime64[ns]')
+        dates[offsets == _missing_offset] = np.datetime64('NaT')
+        return dates
+
+    def select(self, group):
+        """Returns a new :class:`EventLog` with the jobs of one group."""
+
+        if self.codes is None:
+            raise ValueError("EventLog has no groups")
+
+        found = np.flatnonzero(self.groups == group)
+        if not len(found):
+            raise KeyError(group)
+
+        return self._take(np.flatnonzero(self.codes == found[0]))
+
+    def groupby(self):
+        """Yields ``(group, EventLog)`` pairs, one per group."""
+
+        if self.codes is None:
+            raise ValueError("EventLog has no groups")
+
+        order = np.argsort(self.codes, kind='mergesort')
+        bounds = np.searchsorted(self.codes[order], 
+                                 np.arange(len(self.groups) + 1))
+        for code, group in enumerate(self.groups):
+            yield group, self._take(order[bounds[code]:bounds[code + 1]])
+
+    def _take(self, positions):
+        log = EventLog.__new__(EventLog)
+        log.unit, log.epoch, log.names = self.unit, self.epoch, self.names
+        log.created = self.created[positions]
+        log.closed = self.closed[positions]
+        log.weights = None if self.weights is None else self.weights[positions]
+        log.codes = None if self.codes is None else self.codes[positions]
+        log.groups = self.groups
+        return log
+
+    def to_frame(self):
+        """
+        Expands the log back into a DataFrame, with the column names it was
+        built from.
+        """
+
+        created, closed, weight, group = self.names
+        data = {created: self.dates('created'), closed: self.dates('closed')}
+        columns = [created, closed]
+        if self.weights is not None:
+            data[weight] = self.weights
+            columns.append(weight)
+        if self.codes is not None:
+            data[group] = self.groups[self.codes]
+            columns.append(group)
+        return pd.DataFrame(data, columns=columns)
+
+    def daily_flow(self, name='created', weighted=True):
+        """
+        Returns a daily Series of the number (or total weight) of jobs 
+        created or closed, from the first day with a job to the last.
+        """
+
+        offsets = self._which(name)
+        present = offsets != _missing_offset
+
+        _, per_day = _event_units[self.unit]
+        days = offsets[present].astype(np.int64) // per_day
+
+        weights = None
+        if weighted and self.weights is not None:
+            weights = self.weights[present].astype(np.float64)
+
+        if not len(days):
+            return pd.Series([], index=pd.DatetimeIndex([]), dtype=float)
+
+        start = days.min()
+        counts = np.bincount(days - start, weights=weights).astype(float)
+
+        first_day = self.epoch.astype('datetime64[D]') + int(start)
+        index = pd.date_range(pd.Timestamp(first_day), periods=len(counts))
+        return pd.Series(counts, index=index)
+
+
+def _as_flow(flows, name):
+    """Turns an :class:`EventLog` into the flow Series of one column."""
+
+    if isinstance(flows, EventLog):
+        return flows.daily_flow(name)
+    return flows
+
+@instrumented
 def flow_extract(df, flow_date_column, weight_column=None, freq='d'):
     """
     Returns a time-series of all timestamps of a flow column.
@@ -33,31 +258,64 @@ def flow_extract(df, flow_date_column, weight_column=None, freq='d'):
                           each time period.
     :param freq: Frequency to downsample or upsample by. This should almost 
                  always be left as 'd'.
+
+    `df` can also be an :class:`EventLog`, with `flow_date_column` naming 
+    its created or closed timestamps. Any `weight_column` then means its
+    weights.
     """
 
+    if isinstance(df, EventLog):
+        return _event_log_flow(df, flow_date_column, weight_column, freq)
+
     start_date = is_null(df[flow_date_column].min(), datetime.now())
     end_date = is_null(df[flow_date_column].max(), datetime.now())
     original_date_range = pd.date_range(start_date, end_date, normalize=True,
-                                        freq=freq) 
+                                        freq=_offset_alias(freq)) 
 
     if weight_column:
         flow = df[[flow_date_column, weight_column]].dropna()
         flow = flow.set_index(flow_date_column)[weight_column]
 
-        flow = flow.resample(freq, how='sum')
+        flow = _resample(flow, freq, 'sum')
     # if no weight column specified, count the number of dates instead
     # of summing the weight column
     else:
         flow = df.set_index(flow_date_column, drop=False)[flow_date_column]
         flow = flow.dropna()
 
-        flow =flow.resample(freq, how='count')
+        flow = _resample(flow, freq, 'count')
 
     flow = flow.reindex(original_date_range).fillna(0)
 
     return flow
 
+def _dense_flow(flow, start_date, end_date, freq):
+    """
+    Conforms a flow already summed into days (or coarser bins) to the date
+    range :func:`flow_extract` would return for `start_date` to `end_date`.
+    """
+
+    original_date_range = pd.date_range(start_date, end_date, normalize=True,
+                                        freq=_offset_alias(freq))
+    if freq == 'd':
+        return flow.reindex(original_date_range).fillna(0)
+
+    return resample_reindex(flow, original_date_range, freq=freq, how='sum',
+                            fill_value=0)
+
+def _event_log_flow(log, name, weighted, freq):
+    # bin by day straight from the offsets, then coarsen the (short) daily
+    # series instead of the events
+    daily = log.daily_flow(name, weighted=bool(weighted))
+    if not len(daily):
+        start_date = end_date = datetime.now()
+    else:
+        start_date, end_date = daily.index[0], daily.index[-1]
+
+    return _dense_flow(daily, start_date, end_date, freq)
+
 # TODO: fix this function up and properly document it
+@instrumented
 def double_flow_extract(df, inflow_column, outflow_column, flow_date_column, 
                         freq='d'):
     """
@@ -80,6 +338,136 @@ def double_flow_extract(df, inflow_column, outflow_column, flow_date_column,
 
     return inflows, outflows
 
+# expressions truncating a timestamp column to the start of its day or
+# month, by database
+_sql_dialects = {
+    'mssql': {
+        'd': 'CAST({} AS date)',
+        'm': 'DATEADD(month, DATEDIFF(month, 0, {}), 0)',
+    },
+    'sqlite': {
+        'd': 'date({})',
+        'm': "date({}, 'start of month')",
+    },
+}
+
+def _flow_query(sql, flow_date_column, weight_column, freq, dialect, 
+                groupby=None, require_column=None):
+    """
+    Wraps `sql` in a query returning one row per bin (and group) with the
+    number of units, the sum of their weights (only with a `weight_column`)
+    and the first and last timestamp in the bin.
+    """
+
+    if not isinstance(dialect, dict):
+        try:
+            dialect = _sql_dialects[dialect]
+        except KeyError:
+            raise ValueError("SQL dialect not recognized: {}".format(dialect))
+
+    # monthly bins are enough for anything that's a multiple of a month,
+    # everything else is summed by day and coarsened afterwards
+    bin_freq = 'm' if freq.lower() in ('m', 'q', 'y', 'a') and 'm' in dialect else 'd'
+
+    column = '_src.[%s]' % flow_date_column
+    bucket = dialect[bin_freq].format(column)
+
+    select = ['%s AS FlowDate' % bucket]
+    group_by = [bucket]
+    if groupby is not None:
+        select.append('_src.[%s] AS FlowGroup' % groupby)
+        group_by.append('_src.[%s]' % groupby)
+    select.append('COUNT(*) AS Units')
+    if weight_column:
+        select.append('SUM(_src.[%s]) AS Weight' % weight_column)
+    select += ['MIN(%s) AS FirstDate' % column, 'MAX(%s) AS LastDate' % column]
+
+    where = ['%s IS NOT NULL' % column]
+    if require_column is not None:
+        where.append('_src.[%s] IS NOT NULL' % require_column)
+
+    return 'SELECT %s FROM (%s) AS _src WHERE %s GROUP BY %s' % (
+           ', '.join(select), sql, ' AND '.join(where), ', '.join(group_by))
+
+def _bin_range(bins):
+    """First and last timestamp of the rows of a :func:`_flow_query`."""
+
+    if not len(bins):
+        return datetime.now(), datetime.now()
+    return (pd.to_datetime(bins['FirstDate']).min(), 
+            pd.to_datetime(bins['LastDate']).max())
+
+def _binned_flow(bins, weighted, freq, start_date, end_date):
+    """Turns the rows of a :func:`_flow_query` into a dense flow Series."""
+
+    # SUM of nothing but NULL weights is NULL
+    values = bins['Weight'] if weighted else bins['Units']
+    flow = pd.Series(np.asarray(values, dtype=float), 
+                     index=pd.DatetimeIndex(pd.to_datetime(bins['FlowDate'])))
+
+    return _dense_flow(flow.fillna(0), start_date, end_date, freq)
+
+@instrumented
+def sql_flow_extract(sql, conn, flow_date_column, weight_column=None, freq='d',
+                     dialect='mssql', groupby=None, params=None):
+    """
+    Same as :func:`flow_extract`, but sums the flow inside the database 
+    instead of fetching every row of `sql`. Only one row per day (or month)
+    comes back.
+
+    :param sql: SQL statement returning the raw data. It's wrapped as a 
+                subquery, so on SQL Server it can't end with an ORDER BY.
+    :param conn: Valid database connection.
+    :param flow_date_column: Column of `sql` with the timestamps of units 
+                             moving in or out of the queue.
+    :param weight_column: Column of `sql` weighting each unit. If not set,
+                          units are counted.
+    :param freq: Frequency of the flow, as in :func:`flow_extract`.
+    :param dialect: Database the query runs on, 'mssql' or 'sqlite', or a
+                    dictionary of freq ('d' and optionally 'm') -> template
+                    truncating a column to the start of its period e.g. 
+                    ``{'d': 'date({})'}``.
+    :param groupby: Column of `sql` to split the flow by. Returns a 
+                    DataFrame with one flow per group, over the date range
+                    of all groups.
+    :param params: List of parameters for a parameterized `sql`.
+    """
+
+    query = _flow_query(sql, flow_date_column, weight_column, freq, dialect,
+                        groupby=groupby)
+    bins = read_frame(query, conn, params=params, coerce_default=False)
+    start_date, end_date = _bin_range(bins)
+
+    if groupby is None:
+        return _binned_flow(bins, weight_column, freq, start_date, end_date)
+
+    flows = {}
+    for group, group_bins in bins.groupby('FlowGroup'):
+        flows[group] = _binned_flow(group_bins, weight_column, freq, 
+                                    start_date, end_date)
+
+    return pd.DataFrame(flows)
+
+@instrumented
+def sql_double_flow_extract(sql, conn, inflow_column, outflow_column, 
+                            flow_date_column, freq='d', dialect='mssql',
+                            params=None):
+    """
+    Same as :func:`double_flow_extract`, summed inside the database. See
+    :func:`sql_flow_extract`.
+    """
+
+    flows = []
+    for column in (inflow_column, outflow_column):
+        query = _flow_query(sql, flow_date_column, None, freq, dialect,
+                            require_column=column)
+        bins = read_frame(query, conn, params=params, coerce_default=False)
+        flows.append(_binned_flow(bins, False, freq, *_bin_range(bins)))
+
+    inflows, outflows = flows
+    return inflows, outflows
+
+@instrumented
 def queues(inflow, outflow, current_backlog, time_index=None, inflow_column="Created", 
             outflow_column="Closed", weight_column=None, freq='d'):
     """
@@ -102,7 +490,8 @@ def queues(inflow, outflow, current_backlog, time_index=None, inflow_column="Cre
         start_date = min(inflow.index.min(), outflow.index.min())
         end_date = max(inflow.index.max(), outflow.index.max())
 
-        time_index = pd.date_range(start_date, end_date, normalize=True, freq=freq)
+        time_index = pd.date_range(start_date, end_date, normalize=True, 
+                                   freq=_offset_alias(freq))
 
     inflow = inflow.reindex(time_index, fill_value=0)
     outflow = outflow.reindex(time_index, fill_value=0)
@@ -125,6 +514,7 @@ def _cumsum(flow):
 
     return reindexed_flow.cumsum()
 
+@instrumented
 def reverse_backlog(inflows, outflows, backlog_start, date_start=None, 
                     freq='d'):
     """
@@ -153,10 +543,10 @@ def reverse_backlog(inflows, outflows, backlog_start, date_start=None,
         date_start = datetime.now()
 
     if isinstance(date_start, str):
-        date_start = parse(date_start)
+        date_start = dateutil_parser.parse(date_start)
 
-    inflows = inflows[:date_start]
-    outflows = outflows[:date_start]
+    inflows = _as_flow(inflows, 'created')[:date_start]
+    outflows = _as_flow(outflows, 'closed')[:date_start]
     
     # flip order of time series to do reverse cumsum
 
@@ -164,19 +554,24 @@ def reverse_backlog(inflows, outflows, backlog_start, date_start=None,
     cum_outflow = outflows.sort_index(ascending=False).fillna(0).cumsum()
 
     backlog = backlog_start - cum_inflow + cum_outflow
-    backlog = backlog.fillna(method='ffill')
+    try:
+        backlog = backlog.fillna(method='ffill')
+    except TypeError:
+        # pandas 3 dropped fillna's method
+        backlog = backlog.ffill()
 
     # flip result back so timeseries is ascending
     backlog = backlog.sort_index()
 
-    backlog = backlog.resample(freq, how='first')
+    backlog = _resample(backlog, freq, 'first')
 
     # backlog must be a non-negative number
     backlog[backlog < 0 ] = 0
     return backlog
 
 
-def backlog(inflows, outflows, freq='d'):
+@instrumented
+def backlog(inflows, outflows=None, freq='d'):
     """
     Returns a time-series of historical backlog of a queue.
 
@@ -190,10 +585,15 @@ def backlog(inflows, outflows, freq='d'):
         freq: str ['d', 'w', 'm', 'a']
             pandas date offset string which specifies the frequency of the
             returned time-series.
+
+    Either argument can be an :class:`EventLog` instead. If only `inflows`
+    is given it has to be one, and is used for both.
     """
 
-    inflows = _cumsum(inflows)
-    outflows = _cumsum(outflows)
+    if outflows is None:
+        outflows = inflows
+    inflows = _cumsum(_as_flow(inflows, 'created'))
+    outflows = _cumsum(_as_flow(outflows, 'closed'))
 
     L = inflows.sub(outflows, fill_value=0)
 
@@ -201,14 +601,15 @@ def backlog(inflows, outflows, freq='d'):
     # the original time series. This step guarantees the returned
     # time-series is within the original date range
     begin_date, end_date = L.index.min(), L.index.max()
-    return L.resample(freq, how='first')[begin_date: end_date]
+    return _resample(L, freq, 'first')[begin_date: end_date]
 
+@instrumented
 def throughput(outflows, freq='d'):
     """
     Returns a time series of total throughput over a given interval.
     
     Args:
-        outflows: Series
+        outflows: Series or EventLog
             A  time series containing a timestamp for each job that leaves the 
             queue.
         freq: str ['d', 'w', 'm', 'a']
@@ -216,17 +617,18 @@ def throughput(outflows, freq='d'):
             returned time-series.
     """
 
-    outflows = _cumsum(outflows)
+    outflows = _cumsum(_as_flow(outflows, 'closed'))
     result = outflows.sub(outflows.shift(1), fill_value=0)
 
-    return result.resample(freq, how='sum').fillna(0)
+    return _resample(result, freq, 'sum').fillna(0)
 
+@instrumented
 def arrivals(inflows, freq='d'):
     """
     Returns a time series of total arrivals over a given interval.
     
     Args:
-        outflows: Series
+        inflows: Series or EventLog
             A  time series containing a timestamp for each job that enters the 
             queue.
         freq: str ['d', 'w', 'm', 'a']
@@ -234,17 +636,130 @@ def arrivals(inflows, freq='d'):
             returned time-series.
     """
 
-    inflows = _cumsum(inflows)
+    inflows = _cumsum(_as_flow(inflows, 'created'))
     result = inflows.sub(inflows.shift(1), fill_value=0)
 
-    return result.resample(freq, how='sum').fillna(0)
+    return _resample(result, freq, 'sum').fillna(0)
 
-def wait(inflows, outflows, freq='m'):
-    """Returns a Series of average wait times computed using Little's Law."""
+@instrumented
+def wait(inflows, outflows=None, freq='m'):
+    """
+    Returns a Series of average wait times computed using Little's Law.
+    Takes flow Series or an :class:`EventLog` like :func:`backlog`.
+    """
 
+    if outflows is None:
+        outflows = inflows
     L = backlog(inflows, outflows, freq)
     k = arrivals(inflows, freq)
 
-    w = L.resample(freq, how='mean') / k.resample(freq, how='mean')
+    w = _resample(L, freq, 'mean') / _resample(k, freq, 'mean')
+
+    return w.dropna()
+
+
+_forecast_quantiles = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+def _weekday_sampler(history, method, random_state):
+    """
+    Returns a function drawing an array of daily counts of a given shape for
+    an array of weekdays, fitted on a daily Series by weekday.
+    """
+
+    history = history.dropna()
+    if len(history) == 0:
+        raise ValueError("Can't fit a forecast on an empty series")
+
+    values = history.values.astype(float)
+    weekdays = np.asarray(history.index.weekday)
+
+    if method == 'poisson':
+        rates = np.array([values[weekdays == day].mean()
+                          if (weekdays == day).any() else values.mean()
+                          for day in range(7)])
+        rates = np.maximum(rates, 0)
+
+        def sample(days, shape):
+            return random_state.poisson(rates[days], size=shape).astype(float)
+
+    elif method == 'bootstrap':
+        # one row of observations per weekday, padded to the longest row.
+        # A weekday without history borrows every observation.
+        groups = [values[weekdays == day] for day in range(7)]
+        groups = [group if len(group) else values for group in groups]
+        counts = np.array([len(group) for group in groups])
+        table = np.zeros((7, counts.max()))
+        for day, group in enumerate(groups):
+            table[day, :len(group)] = group
+
+        def sample(days, shape):
+            picks = random_state.random_sample(shape) * counts[days]
+            return table[days, picks.astype(np.int64)]
+
+    else:
+        raise ValueError("Method not recognized: {}".format(method))
+
+    return sample
+
+@instrumented
+def forecast_backlog(arrivals, throughput, current_backlog, periods=30, 
+                     paths=1000, method='poisson', quantiles=_forecast_quantiles,
+                     start_date=None, seed=None, return_paths=False):
+    """
+    Simulates future backlog and returns quantile bands of it by day.
+
+    Daily arrivals and throughput are fitted separately for every weekday
+    on history like that returned by :func:`arrivals` and :func:`throughput`,
+    then `paths` future paths are drawn at once and run through the queue
+    recursion ``backlog = max(0, backlog + arrivals - throughput)``. Past
+    throughput is taken as the capacity of the queue.
+
+    :param arrivals: Daily Series of arrivals.
+    :param throughput: Daily Series of throughput.
+    :param current_backlog: Backlog at the start of the forecast.
+    :param periods: Number of days to forecast.
+    :param paths: Number of simulated paths.
+    :param method: 'poisson' draws daily counts from a Poisson distribution
+                   with each weekday's mean, 'bootstrap' resamples the
+                   historical days of the same weekday (use it for weighted
+                   flows).
+    :param quantiles: Quantiles between 0 and 1 to return.
+    :param start_date: First forecast day. Defaults to the day after the 
+                       last day of `arrivals`.
+    :param seed: Seed for the random number generator, for reproducible 
+                 forecasts.
+    :param return_paths: Also return the simulated backlog as an array of
+                         shape (`paths`, `periods`).
+
+    >>> bands = forecast_backlog(arrivals(inflows), throughput(outflows), 
+    ...                          current_backlog=120, periods=90, seed=0)
+    >>> bands[0.95]
+    """
+
+    random_state = np.random.RandomState(seed)
+
+    if start_date is None:
+        start_date = arrivals.index.max() + pd.DateOffset(days=1)
+    elif isinstance(start_date, str):
+        start_date = dateutil_parser.parse(start_date)
+
+    time_index = pd.date_range(start_date, periods=periods, normalize=True)
+    days = np.asarray(time_index.weekday)
+    shape = (paths, periods)
+
+    inflows = _weekday_sampler(arrivals, method, random_state)(days, shape)
+    outflows = _weekday_sampler(throughput, method, random_state)(days, shape)
+
+    # Lindley's recursion without a Python loop: the free walk minus its
+    # running minimum (whenever that dips below zero) is the walk
+    # reflected at zero
+    walk = current_backlog + np.cumsum(inflows - outflows, axis=1)
+    floor = np.minimum(np.minimum.accumulate(walk, axis=1), 0)
+    simulated = walk - floor
+
+    bands = np.percentile(simulated, [q * 100 for q in quantiles], axis=0)
+    result = pd.DataFrame(bands.T, index=time_index, columns=list(quantiles))
 
-    return w.dropna()
\ No newline at end of file
+    if return_paths:
+        return result, simulated
+    return result
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+    grigri.sharedmem
+    ~~~~~~~~~~~~~~~~~~
+
+    Moves DataFrames and Series between processes through shared memory
+    blocks instead of pickling them.
+
+    The parent process copies each numeric or datetime column into its own
+    :class:`multiprocessing.shared_memory.SharedMemory` block once. Workers
+    only receive a small descriptor (block names, dtypes and lengths) and
+    rebuild the frame as views on top of those blocks, so handing a chunk to a
+    worker costs the same no matter how many rows it has.
+
+    >>> with share_frame(frame) as shared:
+    ...     pool.submit(work, chunk_descriptor(shared.descriptor, 0, 1000))
+
+    Columns that can't live in a flat buffer (strings, Python objects,
+    categoricals, timezone-aware timestamps) are pickled along with the
+    descriptor as before. :func:`chunk_descriptor` slices them so each
+    worker is only sent the rows of its own chunk.
+"""
+
+import sys
+import threading
+
+from ._lazy import LazyModule
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+shared_memory = LazyModule('multiprocessing.shared_memory')
+resource_tracker = LazyModule('multiprocessing.resource_tracker')
+
+
+# dtype kinds that are plain fixed-width buffers: bool, signed/unsigned ints,
+# floats, complex, timedelta and datetime
+_shareable_kinds = 'biufcmM'
+
+# blocks this process has attached to. The handles have to stay open for as
+# long as any array is viewing their buffer, so they are kept for the
+# lifetime of the (worker) process.
+_attached = {}
+
+_attach_lock = threading.Lock()
+
+
+def _is_shareable(dtype):
+    return isinstance(dtype, np.dtype) and dtype.kind in _shareable_kinds
+
+def _open_block(name):
+    """Attaches to an existing shared memory block by name."""
+
+    try:
+        block = _attached[name]
+    except KeyError:
+        # attaching shouldn't make this process responsible for unlinking
+        # the block, the owner does that
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            block = _attach_untracked(name)
+        _attached[name] = block
+
+    return block
+
+def _skip_register(name, rtype):
+    pass
+
+def _attach_untracked(name):
+    """
+    Attaches to a block without registering it with the resource tracker,
+    which before python 3.13 would warn about (and unlink) blocks the
+    owner is still using. Unregistering afterwards isn't an option: pool
+    workers share the owner's tracker, so that would drop the owner's
+    registration instead.
+    """
+
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = _skip_register
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class SharedFrame(object):
+    """
+    Owner of the shared memory blocks backing a DataFrame or Series. Use
+    :func:`share_frame` to create one.
+
+    The blocks are unlinked by :meth:`close`, which is called automatically
+    when used as a context manager. Workers must be done with the frame
+    before then.
+    """
+
+    def __init__(self, data):
+        self._blocks = []
+
+        if isinstance(data, pd.Series):
+            kind = 'series'
+            columns = [(data.name, self._store(data))]
+        else:
+            kind = 'frame'
+            columns = [(col, self._store(data.iloc[:, i]))
+                       for i, col in enumerate(data.columns)]
+
+        self.descriptor = {
+            'kind': kind,
+            'length': len(data),
+            'columns': columns,
+            'index': self._store(data.index),
+            'index_name': data.index.name,
+        }
+
+    def _store(self, values):
+        """
+        Copies `values` into a new shared memory block and returns a spec
+        describing how to find it again. Unshareable values are returned
+        as-is so they get pickled with the descriptor.
+        """
+
+        if not _is_shareable(values.dtype) or isinstance(values, pd.MultiIndex):
+            return ('raw', values)
+
+        array = np.ascontiguousarray(values.values if hasattr(values, 'values')
+                                     else values)
+
+        # zero-sized blocks aren't allowed
+        block = shared_memory.SharedMemory(create=True,
+                                           size=max(array.nbytes, 1))
+        self._blocks.append(block)
+
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        view[:] = array
+
+        return ('shm', block.name, array.dtype.str, len(array), 0)
+
+    def close(self):
+        """Releases and unlinks every shared memory block."""
+
+        blocks, self._blocks = self._blocks, []
+        for block in blocks:
+            _attached.pop(block.name, None)
+            try:
+                block.close()
+            except BufferError:
+                # a view in this process is still alive; the mapping goes
+                # away with it, but the name can be unlinked regardless
+                pass
+            block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        if self._blocks:
+            self.close()
+
+
+def share_frame(data):
+    """
+    Places the column buffers of a DataFrame or Series in shared memory and
+    returns the owning :class:`SharedFrame`. Pass its ``descriptor`` to
+    worker processes and rebuild the data with :func:`attach_frame`.
+
+    :param data: DataFrame or Series to share.
+    """
+
+    return SharedFrame(data)
+
+def _slice_raw(values, start, stop):
+    if isinstance(values, pd.Series):
+        # drop the original labels so the pieces line up by position
+        return values.iloc[start:stop].reset_index(drop=True)
+    return values[start:stop]
+
+def _slice_spec(spec, start, stop):
+    if spec[0] == 'raw':
+        return ('raw', _slice_raw(spec[1], start, stop))
+
+    _, name, dtype, length, offset = spec
+    start, stop, _ = slice(start, stop).indices(length)
+    return ('shm', name, dtype, max(stop - start, 0), offset + start)
+
+def chunk_descriptor(descriptor, start, stop):
+    """
+    Returns a descriptor of rows `start` to `stop` only. Shared columns just
+    get a new offset into their block, and pickled columns are sliced, so
+    sending the result to a worker costs the size of the chunk rather than
+    of every pickled column.
+    """
+
+    chunk = dict(descriptor)
+    chunk['index'] = _slice_spec(descriptor['index'], start, stop)
+    chunk['columns'] = [(col, _slice_spec(spec, start, stop))
+                        for col, spec in descriptor['columns']]
+    chunk['length'] = len(range(*slice(start, stop).indices(
+                                descriptor['length'])))
+    return chunk
+
+def _load(spec, start, stop):
+    if spec[0] == 'raw':
+        return _slice_raw(spec[1], start, stop)
+
+    _, name, dtype, length, offset = spec
+    block = _open_block(name)
+    dtype = np.dtype(dtype)
+    array = np.ndarray((length,), dtype=dtype, buffer=block.buf,
+                       offset=offset * dtype.itemsize)
+
+    return array[start:stop]
+
+def attach_frame(descriptor, start=None, stop=None):
+    """
+    Rebuilds a DataFrame or Series from a :class:`SharedFrame` descriptor
+    without copying the shared column buffers.
+
+    :param descriptor: The ``descriptor`` attribute of a :class:`SharedFrame`.
+    :param start: First row (by position) to include.
+    :param stop: Row position to stop at. Workers should rather be sent a
+                 :func:`chunk_descriptor`, which doesn't carry the rows of
+                 pickled columns outside the chunk.
+    """
+
+    index = pd.Index(_load(descriptor['index'], start, stop),
+                     name=descriptor['index_name'])
+
+    columns = [(col, _load(spec, start, stop))
+               for col, spec in descriptor['columns']]
+
+    if descriptor['kind'] == 'series':
+        name, values = columns[0]
+        series = pd.Series(values, name=name, copy=False)
+        series.index = index
+        return series
+
+    # build on positional labels first so duplicate column names and
+    # pickled Series columns can't trip up alignment
+    data = {i: values for i, (_, values) in enumerate(columns)}
+    frame = pd.DataFrame(data, columns=range(len(columns)), copy=False)
+    frame.index = index
+    frame.columns = [col for col, _ in columns]
+
+    return frame
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+    grigri.sketch
+    ~~~~~~~~~~~~~
+
+    HyperLogLog sketches for approximate distinct counts in fixed memory.
+
+    A sketch with precision `p` keeps ``2 ** p`` one-byte registers no matter
+    how many values go into it, and estimates the number of distinct values
+    with a relative standard error of about ``1.04 / sqrt(2 ** p)`` (1.6% at
+    the default precision of 12, which takes 4KB). Sketches of the same
+    precision merge by taking the larger of each pair of registers, so the
+    sketches of days add up to the sketch of a week or a month without
+    going back to the values.
+
+    >>> customers = HyperLogLog()
+    >>> customers.update(monday['CustomerID'])
+    >>> customers.merge(tuesday_sketch)
+    >>> customers.count()
+    15321.7
+
+    Values are hashed with a fixed function, so sketches built in different
+    processes (or on different days) can be merged. Integer-valued floats
+    hash like the integers they equal, which keeps an id column that gained
+    a null (and turned into floats) in one batch compatible with the others.
+"""
+
+import hashlib
+
+from ._lazy import LazyModule
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+
+__all__ = ['HyperLogLog', 'hash_values', 'sketch_cells', 'estimate_registers',
+           'DEFAULT_PRECISION']
+
+# used by every sketch in grigri unless asked otherwise, 4KB per sketch
+DEFAULT_PRECISION = 12
+
+# registers are estimated about this many at a time (a whole number of 
+# sketches, at least one) to bound the size of the temporary float arrays
+_estimate_chunk_registers = 1 << 20
+
+
+def _splitmix64(bits):
+    """
+    The finalizer of the SplitMix64 generator, a cheap mix turning any
+    distinct uint64 values into uniformly distributed ones.
+    """
+
+    with np.errstate(over='ignore'):
+        z = bits + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+def _object_hash(value):
+    if isinstance(value, bytes):
+        data = value
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+    else:
+        data = repr(value).encode('utf-8')
+    digest = hashlib.blake2b(data, digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+def _hash_numbers(values):
+    """Hashes the (non-null) values of a numeric or datetime array."""
+
+    kind = values.dtype.kind
+    if kind in 'biu':
+        return _splitmix64(values.astype(np.int64).view(np.uint64))
+    if kind in 'mM':
+        return _splitmix64(values.view(np.int64).view(np.uint64))
+
+    values = values.astype(np.float64) + 0.  # -0.0 is 0.0
+    integral = (values == np.floor(values)) & (np.abs(values) < 2. ** 63)
+    bits = values.view(np.uint64).copy()
+    bits[integral] = values[integral].astype(np.int64).view(np.uint64)
+    return _splitmix64(bits)
+
+def hash_values(values):
+    """
+    Returns a uint64 hash of every value and a boolean mask of the values
+    that aren't null.
+
+    :param values: Array-like of numbers, timestamps or Python objects.
+    """
+
+    values = np.asarray(values)
+    if values.dtype.kind in 'biufmM':
+        valid = ~pd.isnull(values)
+        result = np.zeros(len(values), dtype=np.uint64)
+        result[valid] = _hash_numbers(values[valid])
+        return result, valid
+
+    # hashing a python object is slow, only do it once per distinct value
+    codes, uniques = pd.factorize(values)
+    hashes = np.fromiter((_object_hash(value) for value in uniques),
+                         dtype=np.uint64, count=len(uniques))
+
+    valid = codes >= 0
+    result = np.zeros(len(codes), dtype=np.uint64)
+    result[valid] = hashes[codes[valid]]
+    return result, valid
+
+def _bit_length(values):
+    """Number of bits needed to write each uint64, 0 for 0."""
+
+    # each 32 bit half is exact as a float, and frexp's exponent is then the
+    # bit length
+    high = np.frexp((values >> np.uint64(32)).astype(np.float64))[1]
+    low = np.frexp((values & np.uint64(0xFFFFFFFF)).astype(np.float64))[1]
+    return np.where(high > 0, high + 32, low)
+
+def _register_updates(hashes, precision=DEFAULT_PRECISION):
+    """
+    Returns the register each hash goes to and the value it proposes for
+    it: the first `precision` bits pick the register, and the position of
+    the first set bit in the rest is the rank.
+    """
+
+    if not 4 <= precision <= 18:
+        raise ValueError("Precision must be between 4 and 18")
+
+    rest_bits = 64 - precision
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    index = (hashes >> np.uint64(rest_bits)).astype(np.int64)
+    rest = hashes & np.uint64((1 << rest_bits) - 1)
+    rank = rest_bits - _bit_length(rest) + 1
+    return index, rank.astype(np.uint8)
+
+def sketch_cells(cells, hashes, n_cells, precision=DEFAULT_PRECISION):
+    """
+    Builds one sketch per cell at once. Returns a ``(n_cells, 2 ** precision)``
+    uint8 array of registers.
+
+    :param cells: Cell number (0 to `n_cells` - 1) of each hash.
+    :param hashes: uint64 hashes e.g. from :func:`hash_values`.
+    """
+
+    m = 1 << precision
+    registers = np.zeros(n_cells * m, dtype=np.uint8)
+    index, rank = _register_updates(hashes, precision)
+    np.maximum.at(registers, np.asarray(cells, dtype=np.int64) * m + index,
+                  rank)
+    return registers.reshape(n_cells, m)
+
+def estimate_registers(registers):
+    """
+    Estimated number of distinct values of every sketch in a 2d array of
+    registers, one sketch per row.
+    """
+
+    registers = np.atleast_2d(registers)
+    m = registers.shape[1]
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    powers = 2. ** -np.arange(256)
+
+    rows = max(1, _estimate_chunk_registers // m)
+    result = np.empty(len(registers))
+    for start in range(0, len(registers), rows):
+        chunk = registers[start:start + rows]
+        raw = alpha * m * m / powers[chunk].sum(axis=1)
+
+        # few values: count empty registers instead (linear counting)
+        zeros = (chunk == 0).sum(axis=1)
+        small = (raw <= 2.5 * m) & (zeros > 0)
+        with np.errstate(divide='ignore'):
+            linear = m * np.log(m / np.maximum(zeros, 1).astype(float))
+        result[start:start + len(chunk)] = np.where(small, linear, raw)
+
+    return result
+
+
+class HyperLogLog(object):
+    """
+    A single HyperLogLog sketch.
+
+    :param precision: Number of index bits, between 4 and 18. Memory is
+                      ``2 ** precision`` bytes.
+    """
+
+    __slots__ = ('precision', 'registers')
+
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        if not 4 <= precision <= 18:
+            raise ValueError("Precision must be between 4 and 18")
+
+        self.precision = precision
+        if registers is None:
+            registers = np.zeros(1 << precision, dtype=np.uint8)
+        self.registers = registers
+
+    @property
+    def error(self):
+        """Relative standard error of :meth:`count`."""
+
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def update(self, values):
+        """Adds an array of values, nulls are skipped."""
+
+        hashes, valid = hash_values(values)
+        self.update_hashes(hashes[valid])
+        return self
+
+    def update_hashes(self, hashes):
+        """Adds values that were already hashed with :func:`hash_values`."""
+
+        index, rank = _register_updates(hashes, self.precision)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        """Adds every value of another sketch of the same precision."""
+
+        if other.precision != self.precision:
+            raise ValueError("Can only merge sketches of the same precision")
+
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def copy(self):
+        return HyperLogLog(self.precision, self.registers.copy())
+
+    def count(self):
+        """Estimated number of distinct values added so far."""
+
+        return float(estimate_registers(self.registers)[0])
+
+    def __repr__(self):
+        return '<HyperLogLog: ~%d distinct, precision %d>' % (
+               round(self.count()), self.precision)
@@ -0,0 +1,132 @@
+from datetime import datetime
+
+import itertools
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ..constructors import (straight_line, amortize, cartesion_index, 
+                            complete_frame, CartesianIndex)
+
+
+class TestAmortize(unittest.TestCase):
+    def test_amortize_matches_straight_line(self):
+        date_range = pd.date_range('2013-09-01', '2013-09-30')
+
+        expected = straight_line(300., date_range)
+        result = amortize([300.], [date_range[0]], [date_range[-1]], 
+                          cumsum=True)
+
+        np.testing.assert_allclose(result.values, expected.values)
+        self.assertTrue(result.index.equals(expected.index))
+
+    def test_amortize_sums_overlapping_values(self):
+        result = amortize([30., 10.], ['2013-09-01', '2013-09-02'], 
+                          ['2013-09-03', '2013-09-02'])
+
+        self.assertEqual(result.tolist(), [10., 20., 10.])
+
+    def test_amortize_by_month(self):
+        values, starts, ends = [1200., 310.], ['2013-01-01', '2013-03-01'], \
+                               ['2013-12-31', '2013-03-31']
+
+        result = amortize(values, starts, ends, freq='m')
+        self.assertEqual(result.index[0], datetime(2013, 1, 31))
+        self.assertEqual(result.tolist()[:3], [100., 100., 410.])
+
+        # pro-rata weights each month by its number of days
+        result = amortize(values, starts, ends, freq='m', method='prorata')
+        self.assertAlmostEqual(result.iloc[0], 1200. * 31 / 365)
+        self.assertAlmostEqual(result.iloc[2], 1200. * 31 / 365 + 310.)
+        self.assertAlmostEqual(result.sum(), 1510.)
+
+    def test_amortize_by_group(self):
+        result = amortize([10., 20., 30.], ['2013-09-01'] * 3,
+                          ['2013-09-02', '2013-09-02', '2013-09-01'], 
+                          groups=['b', 'a', 'b'])
+
+        self.assertEqual(list(result.columns), ['a', 'b'])
+        self.assertEqual(result['a'].tolist(), [10., 10.])
+        self.assertEqual(result['b'].tolist(), [35., 5.])
+
+    def test_amortize_rejects_backwards_ranges(self):
+        self.assertRaises(ValueError, amortize, [1.], ['2013-09-02'], 
+                          ['2013-09-01'])
+
+    def test_amortize_rejects_null_dates(self):
+        self.assertRaises(ValueError, amortize, [1., 2.], 
+                          ['2013-09-01', None], ['2013-09-02', '2013-09-03'])
+        self.assertRaises(ValueError, amortize, [1.], ['2013-09-01'], 
+                          [float('nan')], method='prorata')
+
+
+class TestCartesianIndex(unittest.TestCase):
+    def setUp(self):
+        self.cities = ['Los Angeles', 'San Diego', 'Bakersfield']
+        self.types = ['Residential', 'Commercial']
+
+    def test_cartesion_index_matches_product(self):
+        result = cartesion_index(self.cities, self.types, [1, 2], 
+                                 names=['city', 'type', 'n'])
+        expected = list(itertools.product(self.cities, self.types, [1, 2]))
+
+        self.assertEqual(list(result), expected)
+        self.assertEqual(list(result.names), ['city', 'type', 'n'])
+
+    def test_cartesion_index_keeps_repeated_values(self):
+        result = cartesion_index(['a', 'a'], [1])
+        self.assertEqual(list(result), [('a', 1), ('a', 1)])
+
+    def test_cartesion_index_keeps_level_dtypes_and_nulls(self):
+        dates = pd.date_range('2013-09-01', periods=2)
+        result = cartesion_index(['a', np.nan], dates)
+
+        self.assertEqual(result.get_level_values(1).dtype.kind, 'M')
+        self.assertEqual(len(result), 4)
+        self.assertTrue(pd.isnull(result.get_level_values(0)[2:]).all())
+        self.assertEqual(list(result.get_level_values(1)), list(dates) * 2)
+
+    def test_lazy_index_matches_eager_index(self):
+        args = (['a', np.nan, 'a'], pd.date_range('2013-09-01', periods=2))
+        eager = cartesion_index(*args)
+        lazy = cartesion_index(*args, lazy=True)
+
+        self.assertEqual(len(lazy), len(eager))
+        self.assertTrue(lazy.to_index().equals(eager))
+        self.assertEqual(lazy.get_loc((np.nan, args[1][1])), 3)
+        # repeated values are found at their first occurrence
+        self.assertEqual(lazy.get_indexer(eager).tolist(), [0, 1, 2, 3, 0, 1])
+
+    def test_lazy_index_finds_positions(self):
+        lazy = cartesion_index(self.cities, self.types, lazy=True)
+
+        self.assertTrue(isinstance(lazy, CartesianIndex))
+        self.assertEqual(len(lazy), 6)
+        self.assertEqual(lazy.get_loc(('San Diego', 'Commercial')), 3)
+
+        index = pd.MultiIndex.from_tuples([('Bakersfield', 'Residential'),
+                                           ('Fresno', 'Residential')])
+        self.assertEqual(lazy.get_indexer(index).tolist(), [4, -1])
+        self.assertEqual(list(lazy.to_index()), 
+                         list(itertools.product(self.cities, self.types)))
+
+    def test_complete_frame_fills_missing_combinations(self):
+        index = pd.MultiIndex.from_tuples([('a', 1), ('b', 2)])
+        frame = pd.DataFrame({'value': [10, 20]}, index=index)
+
+        result = complete_frame(frame, fill_value=0)
+
+        self.assertEqual(list(result.index), 
+                         [('a', 1), ('a', 2), ('b', 1), ('b', 2)])
+        self.assertEqual(result['value'].tolist(), [10, 0, 0, 20])
+        self.assertEqual(result['value'].dtype, frame['value'].dtype)
+
+    def test_complete_frame_with_explicit_levels(self):
+        index = pd.MultiIndex.from_tuples([('a', 1), ('b', 2)])
+        series = pd.Series([1.5, 2.5], index=index)
+
+        result = complete_frame(series, levels=[['a', 'c'], [1, 2]])
+
+        np.testing.assert_array_equal(result.values, 
+                                      [1.5, np.nan, np.nan, np.nan])
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+import unittest
+
+
+_heavy_modules = ('numpy', 'pandas', 'dateutil')
+
+# directory containing the grigri package
+_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _loaded_after_import(module):
+    """Heavy modules in sys.modules after importing `module` in a fresh
+    interpreter."""
+
+    code = ('import sys; import %s; '
+            'print(" ".join(m for m in %r if m in sys.modules))'
+            % (module, _heavy_modules))
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=_root)
+    return output.decode().split()
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_modules_import_without_pandas(self):
+        for module in ('grigri.math', 'grigri.tools', 'grigri.dates', 
+                       'grigri.tseries', 'grigri.queues', 'grigri.io.sql',
+                       'grigri.constructors', 'grigri.transforms',
+                       'grigri.sketch'):
+            self.assertEqual(_loaded_after_import(module), [], module)
+
+    def test_lazy_module_loads_on_first_use(self):
+        from .._lazy import LazyModule
+
+        json = LazyModule('json')
+        self.assertEqual(json.dumps([1]), '[1]')
+        self.assertTrue('dumps' in json.__dict__)
@@ -0,0 +1,124 @@
+import threading
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ..instrument import instrumented, collect, enable, disable, MemorySink, _sinks
+from ..tools import parallel_apply
+
+
+@instrumented
+def _double(frame):
+    return frame * 2
+
+@instrumented(name='custom.allocate')
+def _allocate(n):
+    return np.ones(n)
+
+@instrumented
+def _outer(frame):
+    return _double(_double(frame))
+
+@instrumented(name='custom.fail')
+def _fail(frame):
+    raise KeyError('missing')
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.frame = pd.DataFrame({'a': np.arange(10.), 'b': np.arange(10.)})
+
+    def test_instrumented_function_is_unchanged(self):
+        self.assertEqual(_double.__name__, '_double')
+        self.assertEqual(_double(self.frame)['a'].sum(), 90.)
+        self.assertEqual(_sinks.get(), ())
+
+    def test_collect_records_rows_and_bytes(self):
+        with collect() as stats:
+            _double(self.frame)
+            _double(self.frame)
+
+        totals = stats.summary()[__name__ + '._double']
+        self.assertEqual(totals['calls'], 2)
+        self.assertEqual(totals['rows_in'], 20)
+        self.assertEqual(totals['rows_out'], 20)
+        self.assertEqual(totals['bytes_in'], 2 * 160)
+        self.assertTrue(totals['seconds'] >= 0)
+        self.assertEqual(totals['peak_memory'], None)
+
+        # nothing is recorded outside of the context manager
+        _double(self.frame)
+        self.assertEqual(stats.summary()[__name__ + '._double']['calls'], 2)
+
+    def test_collect_records_nested_calls(self):
+        with collect() as stats:
+            _outer(self.frame)
+
+        summary = stats.summary()
+        self.assertEqual(summary[__name__ + '._outer']['calls'], 1)
+        self.assertEqual(summary[__name__ + '._double']['calls'], 2)
+
+    def test_collect_measures_peak_memory(self):
+        with collect(memory=True) as stats:
+            _allocate(100000)
+
+        peak = stats.summary()['custom.allocate']['peak_memory']
+        self.assertTrue(peak >= 800000)
+
+    def test_callbacks_and_global_sinks(self):
+        calls = []
+        enable(calls.append)
+        try:
+            _allocate(5)
+        finally:
+            disable(calls.append)
+        _allocate(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0].name, 'custom.allocate')
+        self.assertEqual(calls[0].rows_out, 5)
+
+    def test_memory_sink_keeps_calls(self):
+        sink = MemorySink(keep_calls=True)
+        with collect(sink):
+            _allocate(3)
+
+        self.assertEqual([call.name for call in sink.calls], ['custom.allocate'])
+
+    def test_calls_that_raise_are_recorded(self):
+        sink = MemorySink(keep_calls=True)
+        with collect(sink):
+            self.assertRaises(KeyError, _fail, self.frame)
+            _double(self.frame)
+
+        failed, succeeded = sink.calls
+        self.assertEqual(failed.error, 'KeyError')
+        self.assertEqual(failed.rows_in, 10)
+        self.assertEqual(failed.rows_out, None)
+        self.assertEqual(succeeded.error, None)
+        self.assertEqual(sink.summary()['custom.fail']['errors'], 1)
+
+    def test_sinks_are_per_context(self):
+        other_calls = []
+
+        def other_thread():
+            _allocate(1)
+            with collect() as stats:
+                _allocate(2)
+            other_calls.append(stats.summary()['custom.allocate']['calls'])
+
+        with collect() as stats:
+            thread = threading.Thread(target=other_thread)
+            thread.start()
+            thread.join()
+            _allocate(3)
+
+        self.assertEqual(stats.summary()['custom.allocate']['calls'], 1)
+        self.assertEqual(other_calls, [1])
+
+    def test_thread_workers_report_to_callers_sinks(self):
+        with collect() as stats:
+            parallel_apply(self.frame, _double, workers=2, chunks=4)
+
+        self.assertEqual(stats.summary()[__name__ + '._double']['calls'], 4)
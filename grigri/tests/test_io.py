@@ -1,12 +1,27 @@
 import unittest
 from unittest import mock
 
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
 from datetime import datetime, date
 
+import numpy as np
 import pandas as pd
 
-from ..io.sql import read_frame, coerce_dtypes
-from .utils import assert_series_equal, assert_frame_equal
+from ..dates.range import month_range
+from ..io.sql import (read_frame, write_frame, write_frames, coerce_dtypes,
+                      coerce_to_ascii, SpilledFrame, WriteFramesError)
+from ..io.store import write_dataset, read_dataset, dataset_partitions
+from ..io import sql, stream
+from ..io.stream import (column_types, write_ndjson, read_ndjson, write_csv,
+                         read_csv)
+from ..io.incremental import (incremental_extract, read_extract, 
+                              extract_watermark)
+from .utils import assert_frame_equal
 
 class TestDataTypeCoercion(unittest.TestCase):
 
@@ -122,3 +137,678 @@ class TestReadFrame(unittest.TestCase):
         mock_conn.cursor.return_value = mock_cursor
 
         self.assertRaises(AssertionError, read_frame, 'select top 10', mock_conn)
+
+
+class TestCoerceAscii(unittest.TestCase):
+    def setUp(self):
+        self.frame = pd.DataFrame({
+            'Name': [u'Café', None, u'naïve', 'plain', u'Ωmega'],
+            'Mixed': [u'Zoë', 1, np.nan, u'Ångström', None],
+            'Value': [1, 2, 3, 4, 5],
+        }, columns=['Name', 'Mixed', 'Value'])
+
+    def values(self, series):
+        # nulls may come back as None or NaN depending on the dtype
+        return [None if pd.isnull(value) else value for value in series]
+
+    def test_non_ascii_characters_are_dropped(self):
+        result = coerce_to_ascii(self.frame.copy())
+        self.assertEqual(self.values(result['Name']), 
+                         ['Caf', None, 'nave', 'plain', 'mega'])
+        self.assertEqual(self.values(result['Mixed']), 
+                         ['Zo', 1, None, 'ngstrm', None])
+        self.assertEqual(list(result['Value']), [1, 2, 3, 4, 5])
+
+    def test_transliterate(self):
+        result = coerce_to_ascii(self.frame.copy(), ['Name'], 
+                                 transliterate=True)
+        self.assertEqual(self.values(result['Name']), 
+                         ['Cafe', None, 'naive', 'plain', 'mega'])
+        self.assertEqual(result['Mixed'][0], u'Zoë')
+
+    def test_values_containing_the_separator(self):
+        frame = pd.DataFrame({'Name': [u'a\x00é', u'b']})
+        result = coerce_to_ascii(frame)
+        self.assertEqual(self.values(result['Name']), ['a\x00', 'b'])
+
+    def test_read_frame_coerce_ascii(self):
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE TABLE People (Name TEXT, Age INTEGER)')
+        conn.executemany('INSERT INTO People VALUES (?, ?)', 
+                         [(u'José', 30), (None, 40)])
+
+        result = read_frame('SELECT * FROM People', conn, 
+                            coerce_ascii='transliterate')
+        self.assertEqual(self.values(result['Name']), ['Jose', None])
+        self.assertEqual(list(result['Age']), [30, 40])
+        conn.close()
+
+
+class TestDatasetStore(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'store')
+        self.frame = pd.DataFrame({
+            'Date': pd.to_datetime(['2013-08-30 00:00', '2013-09-01 10:00', 
+                                    '2013-09-30 23:00', '2013-10-02 00:00', 
+                                    None]),
+            'Value': [1., 2., 3., 4., 5.],
+            'Name': ['a', 'b', 'c', None, 'e'],
+        }, columns=['Date', 'Value', 'Name'])
+        write_dataset(self.frame, self.path, 'Date')
+
+    def tearDown(self):
+        shutil.rmtree(os.path.dirname(self.path))
+
+    def test_write_dataset_partitions_by_period(self):
+        self.assertEqual(dataset_partitions(self.path), 
+                         ['2013-08-01', '2013-09-01', '2013-10-01', 'null'])
+        self.assertEqual(dataset_partitions(self.path, 
+                                            month_range(datetime(2013, 9, 5))),
+                         ['2013-09-01'])
+
+    def test_read_dataset_round_trip(self):
+        result = read_dataset(self.path)
+
+        self.assertEqual(list(result.columns), ['Date', 'Value', 'Name'])
+        self.assertEqual(result['Value'].tolist(), [1., 2., 3., 4., 5.])
+        self.assertEqual(result['Name'].tolist()[:3], ['a', 'b', 'c'])
+        self.assertEqual(result['Date'].dtype.kind, 'M')
+
+    def test_read_dataset_filters_dates_and_columns(self):
+        result = read_dataset(self.path, month_range(datetime(2013, 9, 5)),
+                              columns=['Value'])
+        self.assertEqual(list(result.columns), ['Value'])
+        self.assertEqual(result['Value'].tolist(), [2., 3.])
+
+        # a range cutting through partitions only keeps rows inside it
+        result = read_dataset(self.path, (datetime(2013, 8, 30), 
+                                          datetime(2013, 9, 1)))
+        self.assertEqual(result['Value'].tolist(), [1., 2.])
+
+        result = read_dataset(self.path, (datetime(2014, 1, 1), 
+                                          datetime(2014, 2, 1)))
+        self.assertEqual(len(result), 0)
+        self.assertEqual(list(result.columns), ['Date', 'Value', 'Name'])
+
+    def test_write_dataset_replaces_or_appends_partitions(self):
+        update = pd.DataFrame({'Date': [datetime(2013, 9, 15)], 'Value': [10.],
+                               'Name': ['z']}, columns=['Date', 'Value', 'Name'])
+
+        write_dataset(update, self.path, 'Date', append=True)
+        result = read_dataset(self.path, month_range(datetime(2013, 9, 1)))
+        self.assertEqual(result['Value'].tolist(), [2., 3., 10.])
+
+        write_dataset(update, self.path, 'Date')
+        result = read_dataset(self.path, month_range(datetime(2013, 9, 1)))
+        self.assertEqual(result['Value'].tolist(), [10.])
+
+        # other months are untouched
+        self.assertEqual(len(read_dataset(self.path)), 4)
+
+    def test_read_dataset_uses_mapped_files(self):
+        write_dataset(self.frame.iloc[1:3], self.path, 'Date')
+        result = read_dataset(self.path, month_range(datetime(2013, 9, 5)),
+                              columns=['Date', 'Value'])
+
+        for column in ('Date', 'Value'):
+            values = result[column].values
+            while values is not None and not isinstance(values, np.memmap):
+                values = values.base
+            self.assertTrue(isinstance(values, np.memmap))
+
+    def test_write_dataset_converts_aware_dates_to_utc(self):
+        frame = pd.DataFrame({
+            'Date': pd.DatetimeIndex(['2013-09-30 20:00', 
+                                      '2013-10-01 08:00']).tz_localize(
+                                      'US/Pacific'),
+            'Value': [1., 2.],
+            'Name': ['a', 'b'],
+        }, columns=['Date', 'Value', 'Name'])
+        path = self.path + '-tz'
+        write_dataset(frame, path, 'Date')
+
+        # 20:00 on the 30th in California is in October in UTC
+        self.assertEqual(dataset_partitions(path), ['2013-10-01'])
+        result = read_dataset(path, month_range(datetime(2013, 10, 1)))
+        self.assertEqual(list(result['Date']), 
+                         [datetime(2013, 10, 1, 3), datetime(2013, 10, 1, 15)])
+
+    def test_failed_append_can_be_rerun(self):
+        update = pd.DataFrame({
+            'Date': [datetime(2013, 9, 15), datetime(2013, 10, 15)], 
+            'Value': [10., 11.], 'Name': ['y', 'z'],
+        }, columns=['Date', 'Value', 'Name'])
+
+        with mock.patch('grigri.io.store._write_metadata', 
+                        side_effect=OSError('disk full')):
+            self.assertRaises(OSError, write_dataset, update, self.path, 
+                              'Date', append=True)
+        # nothing was committed
+        self.assertEqual(len(read_dataset(self.path)), 5)
+
+        write_dataset(update, self.path, 'Date', append=True)
+        result = read_dataset(self.path)
+        self.assertEqual(sorted(result['Value']), 
+                         [1., 2., 3., 4., 5., 10., 11.])
+        # appending only wrote the new rows
+        self.assertEqual(len(os.listdir(self.path)), 7)
+
+    def test_write_dataset_rejects_different_columns(self):
+        self.assertRaises(ValueError, write_dataset, self.frame[['Date']], 
+                          self.path, 'Date')
+
+
+class TestIncrementalExtract(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'tickets')
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('CREATE TABLE Tickets (TicketID INTEGER, '
+                          'Status TEXT, Version INTEGER)')
+        self.insert([(1, 'open', 1), (2, 'open', 2)])
+
+        self.statements = []
+        self.conn.set_trace_callback(self.statements.append)
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(os.path.dirname(self.path))
+
+    def insert(self, rows):
+        self.conn.executemany('INSERT INTO Tickets VALUES (?, ?, ?)', rows)
+        self.conn.commit()
+
+    def extract(self, **kwargs):
+        return incremental_extract('SELECT * FROM Tickets', self.conn, 
+                                   self.path, 'Version', **kwargs)
+
+    def test_first_extract_pulls_everything(self):
+        result = self.extract(key='TicketID')
+
+        self.assertEqual(result['TicketID'].tolist(), [1, 2])
+        self.assertEqual(extract_watermark(self.path), 2)
+        self.assertEqual(read_extract(self.path)['Status'].tolist(), 
+                         ['open', 'open'])
+
+    def test_refresh_only_queries_new_rows_and_dedups(self):
+        self.extract(key='TicketID')
+
+        # ticket 1 is closed and ticket 3 is added
+        self.insert([(1, 'closed', 3), (3, 'open', 4)])
+        result = self.extract(key='TicketID')
+
+        self.assertTrue(any('_src.[Version] >= 2' in sql or 
+                            '_src.[Version] >= ?' in sql 
+                            for sql in self.statements))
+        self.assertEqual(result['TicketID'].tolist(), [2, 1, 3])
+        self.assertEqual(result['Status'].tolist(), ['open', 'closed', 'open'])
+        self.assertEqual(extract_watermark(self.path), 4)
+
+        # nothing new: the stored extract comes back unchanged
+        result = self.extract(key='TicketID')
+        self.assertEqual(len(result), 3)
+        self.assertEqual(extract_watermark(self.path), 4)
+
+    def test_refresh_without_changes_writes_nothing(self):
+        self.extract(key='TicketID')
+        for _ in range(4):
+            result = self.extract(key='TicketID')
+
+        # the rows at the watermark come back every time, but unchanged
+        self.assertEqual(sorted(os.listdir(self.path)), ['1', '_state.json'])
+        self.assertEqual(result['TicketID'].tolist(), [1, 2])
+
+        # a row at the watermark that did change is still picked up
+        self.conn.execute("UPDATE Tickets SET Status = 'closed' "
+                          "WHERE TicketID = 2")
+        self.conn.commit()
+        result = self.extract(key='TicketID')
+        self.assertEqual(result['Status'].tolist(), ['open', 'closed'])
+        self.assertEqual(sorted(os.listdir(self.path)), 
+                         ['1', '2', '_state.json'])
+
+    def test_refresh_without_key_appends(self):
+        self.extract()
+        self.insert([(3, 'open', 3)])
+        result = self.extract()
+
+        self.assertEqual(result['TicketID'].tolist(), [1, 2, 3])
+
+    def test_refresh_only_writes_new_rows(self):
+        self.extract(key='TicketID')
+        first = os.path.join(self.path, '1', 'c0.npy')
+        written = os.stat(first).st_mtime_ns
+
+        self.insert([(1, 'closed', 3)])
+        self.extract(key='TicketID')
+
+        # the first segment is left alone, the refresh adds one with only
+        # the changed row: the one at the watermark is pulled again but 
+        # hasn't changed
+        self.assertEqual(os.stat(first).st_mtime_ns, written)
+        self.assertEqual(len(np.load(os.path.join(self.path, '2', 'c0.npy'))),
+                         1)
+        result = read_extract(self.path, columns=['Status'])
+        self.assertEqual(list(result.columns), ['Status'])
+        self.assertEqual(result['Status'].tolist(), ['open', 'closed'])
+
+    def test_segments_are_merged_when_there_are_too_many(self):
+        with mock.patch('grigri.io.incremental._max_segments', 2):
+            self.extract(key='TicketID')
+            self.insert([(1, 'closed', 3)])
+            self.extract(key='TicketID')
+            self.insert([(3, 'open', 4)])
+            result = self.extract(key='TicketID')
+
+        self.assertEqual(sorted(os.listdir(self.path)), ['3', '_state.json'])
+        self.assertEqual(read_extract(self.path)['TicketID'].tolist(), 
+                         result['TicketID'].tolist())
+
+
+class TestStreamIO(unittest.TestCase):
+    def setUp(self):
+        self.frame = pd.DataFrame({
+            'int': [1, 2, 3],
+            'float': [1.5, np.nan, 3.],
+            'datetime': pd.to_datetime(['2013-09-01 00:00', '2013-09-02 10:30',
+                                        None]),
+            'str': ['a', None, u'\xfc'],
+        }, columns=['int', 'float', 'datetime', 'str'])
+        self.types = column_types(self.frame)
+
+    def assert_round_trip(self, result):
+        self.assertEqual(list(result.columns), list(self.frame.columns))
+        self.assertEqual(result['int'].tolist(), [1, 2, 3])
+        self.assertEqual(result['int'].dtype.kind, 'i')
+        self.assertTrue(np.isnan(result['float'].iloc[1]))
+        self.assertEqual(result['datetime'].dtype.kind, 'M')
+        self.assertEqual(result['datetime'].iloc[1], datetime(2013, 9, 2, 10, 30))
+        self.assertTrue(pd.isnull(result['datetime'].iloc[2]))
+        self.assertTrue(pd.isnull(result['str'].iloc[1]))
+        self.assertEqual(result['str'].iloc[2], u'\xfc')
+
+    def test_column_types(self):
+        self.assertEqual(self.types, {'int': int, 'float': float, 
+                                      'datetime': datetime, 'str': str})
+
+    def test_ndjson_round_trip(self):
+        buf = io.StringIO()
+        write_ndjson(self.frame, buf, chunksize=2)
+
+        lines = buf.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue('"datetime": "2013-09-02T10:30:00"' in lines[1] or
+                        '"datetime":"2013-09-02T10:30:00"' in lines[1])
+        self.assertTrue('null' in lines[1])
+
+        buf.seek(0)
+        self.assert_round_trip(read_ndjson(buf, self.types))
+
+    def test_ndjson_reads_in_chunks(self):
+        buf = io.StringIO()
+        write_ndjson([self.frame, self.frame], buf)
+
+        buf.seek(0)
+        chunks = list(read_ndjson(buf, self.types, chunksize=4))
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 2])
+
+    def test_aware_datetimes_keep_their_offset(self):
+        created = pd.to_datetime(['2013-03-09 12:00', '2013-03-11 12:00', 
+                                  None]).tz_localize('US/Eastern')
+        frame = pd.DataFrame({'Created': created})
+        types = column_types(frame)
+
+        for write, read in ((write_ndjson, read_ndjson), 
+                            (write_csv, read_csv)):
+            buf = io.StringIO()
+            write(frame, buf)
+            # daylight saving time starts in between
+            self.assertTrue('2013-03-09T12:00:00-05:00' in buf.getvalue())
+            self.assertTrue('2013-03-11T12:00:00-04:00' in buf.getvalue())
+
+            buf.seek(0)
+            result = read(buf, types)['Created']
+            self.assertEqual(str(result.dt.tz), 'UTC')
+            self.assertEqual(result.iloc[0], created[0])
+            self.assertEqual(result.iloc[1], created[1])
+            self.assertTrue(pd.isnull(result.iloc[2]))
+
+    def assert_floats_round_trip(self):
+        frame = pd.DataFrame({'float': [0.1 + 0.2, 1. / 3, 1e-300, 2. ** 60]})
+        buf = io.StringIO()
+        write_ndjson(frame, buf)
+
+        buf.seek(0)
+        result = read_ndjson(buf, {'float': float})
+        self.assertEqual(result['float'].tolist(), frame['float'].tolist())
+
+    def test_ndjson_floats_round_trip_with_json(self):
+        with mock.patch.object(stream, 'ujson', None):
+            self.assert_floats_round_trip()
+
+    def test_ndjson_floats_round_trip_with_ujson(self):
+        # ujson may not be installed, stand in for it with the json module
+        # and check it's asked for full precision
+        def dumps(obj, ensure_ascii=True, double_precision=10):
+            self.assertEqual(double_precision, 17)
+            return json.dumps(obj, ensure_ascii=ensure_ascii)
+
+        fake = mock.Mock(dumps=mock.Mock(side_effect=dumps), loads=json.loads)
+        with mock.patch.object(stream, 'ujson', fake):
+            self.assert_floats_round_trip()
+        self.assertTrue(fake.dumps.called)
+
+    def test_csv_round_trip(self):
+        buf = io.StringIO()
+        write_csv(self.frame, buf, chunksize=2)
+
+        lines = buf.getvalue().splitlines()
+        self.assertEqual(lines[0], 'int,float,datetime,str')
+        self.assertEqual(len(lines), 4)
+
+        buf.seek(0)
+        self.assert_round_trip(read_csv(buf, self.types))
+
+
+class TestMemoryBudget(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('CREATE TABLE Results (ID INTEGER, Value REAL, '
+                          'Name TEXT)')
+        self.conn.executemany('INSERT INTO Results VALUES (?, ?, ?)', 
+                              [(i, i * .5, 'row %d' % i) for i in range(2500)])
+        self.sql = 'SELECT * FROM Results'
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_result_within_budget_is_a_dataframe(self):
+        result = read_frame(self.sql, self.conn, memory_budget=10 ** 8,
+                            batch_size=1000)
+
+        self.assertTrue(isinstance(result, pd.DataFrame))
+        self.assertEqual(len(result), 2500)
+        self.assertEqual(result['ID'].tolist(), list(range(2500)))
+
+    def test_result_over_budget_is_spilled(self):
+        with read_frame(self.sql, self.conn, memory_budget=10 ** 4, 
+                        batch_size=1000) as result:
+            self.assertTrue(isinstance(result, SpilledFrame))
+            self.assertEqual(len(result), 2500)
+            self.assertEqual(result.columns, ['ID', 'Value', 'Name'])
+
+            chunks = list(result.chunks(columns=['Value']))
+            self.assertEqual([len(chunk) for chunk in chunks], 
+                             [1000, 1000, 500])
+            self.assertEqual(list(chunks[0].columns), ['Value'])
+
+            frame = result.to_frame()
+            self.assertEqual(frame['Name'].iloc[-1], 'row 2499')
+            self.assertEqual(frame['Value'].sum(), 
+                             sum(i * .5 for i in range(2500)))
+
+            directory = result.directory
+
+        self.assertFalse(os.path.exists(directory))
+
+    def test_chunks_are_memory_mapped(self):
+        with read_frame(self.sql, self.conn, memory_budget=10 ** 4, 
+                        batch_size=1000) as result:
+            chunk = next(iter(result))
+            values = chunk['Value'].values
+            while values is not None and not isinstance(values, np.memmap):
+                values = values.base
+            self.assertTrue(isinstance(values, np.memmap))
+
+    def test_failed_spill_cleans_up(self):
+        real_execute, real_mkdtemp = sql._execute, tempfile.mkdtemp
+
+        cursors = []
+        def execute(*args):
+            cursor, description = real_execute(*args)
+            cursors.append(cursor)
+            return cursor, description
+
+        directories = []
+        def mkdtemp(**kwargs):
+            directories.append(real_mkdtemp(**kwargs))
+            return directories[-1]
+
+        save_columns = sql._save_columns
+        def failing_save(frame, path):
+            if path.endswith('000002'):
+                raise IOError('disk full')
+            return save_columns(frame, path)
+
+        with mock.patch.object(sql, '_execute', side_effect=execute), \
+                mock.patch.object(sql.tempfile, 'mkdtemp', 
+                                  side_effect=mkdtemp), \
+                mock.patch.object(sql, '_save_columns', 
+                                  side_effect=failing_save):
+            self.assertRaises(IOError, read_frame, self.sql, self.conn, 
+                              memory_budget=10 ** 4, batch_size=1000)
+
+        self.assertFalse(os.path.exists(directories[0]))
+        self.assertRaises(sqlite3.ProgrammingError, cursors[0].fetchone)
+
+    def test_empty_result_keeps_columns(self):
+        result = read_frame(self.sql + ' WHERE ID < 0', self.conn, 
+                            memory_budget=1)
+        self.assertEqual(list(result.columns), ['ID', 'Value', 'Name'])
+        self.assertEqual(len(result), 0)
+
+
+class _FlakyCursor(object):
+    def __init__(self, conn, cursor):
+        self.conn = conn
+        self.cursor = cursor
+
+    def executemany(self, sql, rows):
+        self.conn.calls += 1
+        if self.conn.calls in self.conn.fail_on:
+            # insert part of the batch before failing, like a dropped 
+            # connection halfway through
+            self.cursor.executemany(sql, rows[:len(rows) // 2])
+            raise sqlite3.OperationalError('injected failure')
+        return self.cursor.executemany(sql, rows)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+class _FlakyConnection(object):
+    """sqlite3 connection whose nth calls to executemany fail."""
+
+    def __init__(self, conn, fail_on=()):
+        self.conn = conn
+        self.fail_on = set(fail_on)
+        self.calls = 0
+
+    def cursor(self):
+        return _FlakyCursor(self, self.conn.cursor())
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+class TestCheckpointedWriteFrame(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.journal = os.path.join(self.directory, 'load.journal')
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('CREATE TABLE Output (ID INTEGER, Value REAL, '
+                          'Created TIMESTAMP)')
+        self.frame = pd.DataFrame({
+            'ID': np.arange(10),
+            'Value': [1.5, np.nan] * 5,
+            'Created': pd.date_range('2013-09-01', periods=10),
+        }, columns=['ID', 'Value', 'Created'])
+
+    def tearDown(self):
+        self.conn.close()
+        shutil.rmtree(self.directory)
+
+    def written_ids(self):
+        return [row[0] for row in 
+                self.conn.execute('SELECT ID FROM Output ORDER BY ID')]
+
+    def test_write_frame_converts_values(self):
+        write_frame(self.frame, self.conn, 'Output')
+
+        rows = self.conn.execute('SELECT * FROM Output').fetchall()
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[1][1], None)
+        self.assertEqual(rows[0][2], '2013-09-01 00:00:00')
+
+    def test_failed_batches_are_retried(self):
+        conn = _FlakyConnection(self.conn, fail_on=[2, 3])
+        write_frame(self.frame, conn, 'Output', batch_size=3, 
+                    journal=self.journal, backoff=0)
+
+        self.assertEqual(self.written_ids(), list(range(10)))
+        self.assertFalse(os.path.exists(self.journal))
+
+    def test_rerun_resumes_after_last_committed_batch(self):
+        # the third batch fails more often than it's retried
+        conn = _FlakyConnection(self.conn, fail_on=[3, 4])
+        self.assertRaises(sqlite3.OperationalError, write_frame, self.frame, 
+                          conn, 'Output', batch_size=3, journal=self.journal,
+                          retries=1, backoff=0)
+
+        self.assertEqual(self.written_ids(), list(range(6)))
+        self.assertTrue(os.path.exists(self.journal))
+
+        write_frame(self.frame, self.conn, 'Output', batch_size=3, 
+                    journal=self.journal)
+        self.assertEqual(self.written_ids(), list(range(10)))
+        self.assertFalse(os.path.exists(self.journal))
+
+    def test_journal_of_another_load_raises(self):
+        conn = _FlakyConnection(self.conn, fail_on=[2])
+        self.assertRaises(sqlite3.OperationalError, write_frame, self.frame, 
+                          conn, 'Output', batch_size=3, journal=self.journal,
+                          retries=0)
+
+        self.assertRaises(ValueError, write_frame, self.frame, self.conn, 
+                          'Output', batch_size=5, journal=self.journal)
+
+        # same shape, different values
+        changed = self.frame.copy()
+        changed.loc[0, 'Value'] = 2.5
+        self.assertRaises(ValueError, write_frame, changed, self.conn, 
+                          'Output', batch_size=3, journal=self.journal)
+
+    def test_lossy_datetimes_warn(self):
+        frame = pd.DataFrame({
+            'Created': pd.to_datetime(['2013-09-01 10:00:00.000001234', 
+                                       None]),
+        })
+        with self.assertWarns(UserWarning) as caught:
+            write_frame(frame, self.conn, 'Output')
+        self.assertTrue('nanoseconds' in str(caught.warning))
+
+        frame = pd.DataFrame({
+            'Created': pd.date_range('2013-09-01', periods=2, tz='US/Eastern'),
+        })
+        with self.assertWarns(UserWarning) as caught:
+            write_frame(frame, self.conn, 'Output')
+        self.assertTrue('naive UTC' in str(caught.warning))
+
+
+class TestWriteFrames(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'publish.db')
+
+        conn = self.connect()
+        for table in ['Calls', 'Tickets', 'Empty']:
+            conn.execute('CREATE TABLE %s (ID INTEGER, Value REAL)' % table)
+        conn.commit()
+        conn.close()
+
+        self.frames = {
+            'Calls': pd.DataFrame({'ID': np.arange(25), 
+                                   'Value': np.linspace(0, 1, 25)},
+                                  columns=['ID', 'Value']),
+            'Tickets': pd.DataFrame({'ID': np.arange(7), 'Value': np.nan},
+                                    columns=['ID', 'Value']),
+            'Empty': pd.DataFrame({'ID': [], 'Value': []}, 
+                                  columns=['ID', 'Value']),
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def connect(self):
+        # sqlite serializes writers, wait for the lock instead of failing
+        return sqlite3.connect(self.path, timeout=30)
+
+    def table_ids(self, table):
+        conn = self.connect()
+        ids = [row[0] for row in 
+               conn.execute('SELECT ID FROM %s ORDER BY ID' % table)]
+        conn.close()
+        return ids
+
+    def test_writes_every_table(self):
+        result = write_frames(self.frames, self.connect, workers=3)
+
+        self.assertEqual(self.table_ids('Calls'), list(range(25)))
+        self.assertEqual(self.table_ids('Tickets'), list(range(7)))
+        self.assertEqual(self.table_ids('Empty'), [])
+
+        self.assertEqual(sorted(result), ['Calls', 'Empty', 'Tickets'])
+        self.assertEqual(result['Calls']['rows'], 25)
+        self.assertEqual(result['Calls']['parts'], 1)
+        self.assertTrue(result['Calls']['seconds'] >= 0)
+
+    def test_large_frames_are_split_across_connections(self):
+        connections = []
+        def conn_factory():
+            connections.append(1)
+            return self.connect()
+
+        result = write_frames(self.frames, conn_factory, workers=4, 
+                              split_rows=10, batch_size=4)
+
+        self.assertEqual(self.table_ids('Calls'), list(range(25)))
+        self.assertEqual(result['Calls']['parts'], 3)
+        self.assertEqual(result['Tickets']['parts'], 1)
+        self.assertTrue(len(connections) <= 4)
+
+    def test_failed_table_raises_after_others_are_written(self):
+        frames = dict(self.frames, Missing=self.frames['Tickets'],
+                      Absent=self.frames['Calls'])
+        with self.assertRaises(WriteFramesError) as caught:
+            write_frames(frames, self.connect, workers=2, retries=0)
+
+        self.assertEqual(self.table_ids('Calls'), list(range(25)))
+        self.assertEqual(self.table_ids('Tickets'), list(range(7)))
+
+        error = caught.exception
+        self.assertEqual(sorted(error.results), 
+                         ['Absent', 'Calls', 'Empty', 'Missing', 'Tickets'])
+        self.assertEqual(sorted(error.errors), ['Absent', 'Missing'])
+        self.assertTrue(isinstance(error.results['Missing'], 
+                                   sqlite3.OperationalError))
+        self.assertEqual(error.results['Calls']['rows'], 25)
+        self.assertTrue('Absent' in str(error) and 'Missing' in str(error))
+
+    def test_failed_part_is_rolled_back(self):
+        conn = self.connect()
+        conn.execute('CREATE TABLE Strict (ID INTEGER NOT NULL, Value REAL)')
+        conn.commit()
+        conn.close()
+
+        # the last row fails after the others were inserted, and the same
+        # connection goes on to write the smaller table
+        ids = np.arange(30.)
+        ids[-1] = np.nan
+        frames = {'Strict': pd.DataFrame({'ID': ids, 'Value': 1.},
+                                         columns=['ID', 'Value']),
+                  'Tickets': self.frames['Tickets']}
+        with self.assertRaises(WriteFramesError) as caught:
+            write_frames(frames, self.connect, workers=1)
+
+        self.assertEqual(sorted(caught.exception.errors), ['Strict'])
+        self.assertEqual(self.table_ids('Strict'), [])
+        self.assertEqual(self.table_ids('Tickets'), list(range(7)))
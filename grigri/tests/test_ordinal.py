@@ -0,0 +1,41 @@
+import unittest
+
+import pandas as pd
+
+from ..dates.scalar import first_of
+from ..dates.ordinal import period_ordinals, ordinal_dates
+
+
+class TestOrdinalFunctions(unittest.TestCase):
+    def setUp(self):
+        self.dates = pd.DatetimeIndex(['2013-09-01', '2013-09-02 10:00', 
+                                       '2013-09-30', '2013-10-01'])
+
+    def test_period_ordinals_are_consecutive(self):
+        result = period_ordinals(self.dates, 'd')
+        self.assertEqual(list(result[1:] - result[0]), [1, 29, 30])
+
+        result = period_ordinals(self.dates, 'm')
+        self.assertEqual(list(result - result[0]), [0, 0, 0, 1])
+
+    def test_weeks_start_on_monday(self):
+        # 9/1/2013 is a Sunday, 9/2/2013 a Monday
+        result = period_ordinals(self.dates, 'w')
+        self.assertEqual(result[1] - result[0], 1)
+
+        starts = ordinal_dates(result, 'w')
+        self.assertEqual(starts[1], first_of(self.dates[1], 'w'))
+
+    def test_ordinal_dates_round_trip(self):
+        for freq in ('w', 'm', 'q', 'y'):
+            ordinals = period_ordinals(self.dates, freq)
+
+            starts = ordinal_dates(ordinals, freq)
+            expected = [first_of(dt, freq) for dt in self.dates]
+            self.assertEqual(list(starts), expected)
+
+            ends = ordinal_dates(ordinals, freq, label='end')
+            self.assertTrue((period_ordinals(ends, freq) == ordinals).all())
+
+    def test_unknown_frequency_raises(self):
+        self.assertRaises(ValueError, period_ordinals, self.dates, 'fortnight')
@@ -0,0 +1,282 @@
+import unittest
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from ..queues import (forecast_backlog, flow_extract, EventLog, 
+                      sql_flow_extract, sql_double_flow_extract, _flow_query,
+                      backlog, reverse_backlog, throughput, arrivals, wait)
+
+
+class TestForecastBacklog(unittest.TestCase):
+    def setUp(self):
+        index = pd.date_range('2013-01-07', periods=28)
+        weekdays = np.asarray(index.weekday)
+        # 10 in and 9 out on weekdays, nothing in and 2 out on weekends
+        self.arrivals = pd.Series(np.where(weekdays < 5, 10., 0.), index)
+        self.throughput = pd.Series(np.where(weekdays < 5, 9., 2.), index)
+
+    def test_forecast_is_reproducible(self):
+        first = forecast_backlog(self.arrivals, self.throughput, 5, seed=42)
+        second = forecast_backlog(self.arrivals, self.throughput, 5, seed=42)
+
+        self.assertTrue(first.equals(second))
+        self.assertEqual(list(first.columns), [0.05, 0.25, 0.5, 0.75, 0.95])
+        self.assertEqual(first.index[0], pd.Timestamp('2013-02-04'))
+        self.assertEqual(len(first), 30)
+
+    def test_bootstrap_of_constant_history_is_exact(self):
+        result = forecast_backlog(self.arrivals, self.throughput, 1, periods=7,
+                                  method='bootstrap', paths=10, seed=0)
+
+        # Mon-Fri +1 a day, weekends -2 a day but never below zero
+        expected = [2., 3., 4., 5., 6., 4., 2.]
+        for q in result.columns:
+            self.assertEqual(result[q].tolist(), expected)
+
+    def test_paths_match_day_by_day_simulation(self):
+        _, paths = forecast_backlog(self.arrivals, self.throughput, 3, 
+                                    periods=20, paths=50, seed=7,
+                                    return_paths=True)
+
+        # replay the same random draws through the recursion one day at a time
+        random_state = np.random.RandomState(7)
+        days = np.asarray(pd.date_range('2013-02-04', periods=20).weekday)
+        arrival_rates = np.where(days < 5, 10., 0.)
+        service_rates = np.where(days < 5, 9., 2.)
+        inflows = random_state.poisson(arrival_rates, size=(50, 20))
+        outflows = random_state.poisson(service_rates, size=(50, 20))
+
+        expected = np.empty((50, 20))
+        backlog = np.full(50, 3.)
+        for day in range(20):
+            backlog = np.maximum(backlog + inflows[:, day] - outflows[:, day], 0)
+            expected[:, day] = backlog
+
+        np.testing.assert_allclose(paths, expected)
+
+    def test_unknown_method_raises(self):
+        self.assertRaises(ValueError, forecast_backlog, self.arrivals, 
+                          self.throughput, 0, method='magic')
+
+
+class TestEventLog(unittest.TestCase):
+    def setUp(self):
+        self.frame = pd.DataFrame({
+            'Created': pd.to_datetime(['2013-09-01 08:00', '2013-09-01 12:30',
+                                       '2013-09-03 09:15', '2013-09-10 10:00']),
+            'Closed': pd.to_datetime(['2013-09-02 17:00', None, 
+                                      '2013-09-03 18:00', None]),
+            'Weight': [1., 2., 3., 4.],
+            'Team': ['b', 'a', 'b', 'b'],
+        })
+        self.log = EventLog.from_frame(self.frame, 'Created', 'Closed', 
+                                       weight_column='Weight', 
+                                       group_column='Team')
+
+    def test_compact_storage(self):
+        self.assertEqual(self.log.created.dtype, np.int32)
+        self.assertEqual(self.log.closed.dtype, np.int32)
+        self.assertEqual(self.log.weights.dtype, np.float32)
+        self.assertEqual(list(self.log.groups), ['a', 'b'])
+        self.assertEqual(self.log.codes.tolist(), [1, 0, 1, 1])
+        self.assertEqual(self.log.created.tolist(), [0, 0, 2, 9])
+        self.assertFalse(hasattr(self.log, '__dict__'))
+
+    def test_dates_round_trip(self):
+        closed = self.log.dates('Closed')
+        self.assertEqual(pd.Timestamp(closed[0]), pd.Timestamp('2013-09-02'))
+        self.assertTrue(pd.isnull(closed[1]))
+
+        log = EventLog.from_frame(self.frame, 'Created', unit='min')
+        self.assertEqual(pd.Timestamp(log.dates('created')[1]), 
+                         pd.Timestamp('2013-09-01 12:30'))
+
+    def test_flow_extract_accepts_event_log(self):
+        result = flow_extract(self.log, 'Created')
+        self.assertEqual(result.index[0], pd.Timestamp('2013-09-01'))
+        self.assertEqual(len(result), 10)
+        self.assertEqual(result.tolist()[:3], [2., 0., 1.])
+
+        result = flow_extract(self.log, 'Closed', weight_column='Weight')
+        self.assertEqual(result.tolist(), [1., 3.])
+
+        # weeks end on Sunday and, like for DataFrames, the range stops at
+        # the last week ending before the last day
+        result = flow_extract(self.log, 'Created', freq='w')
+        self.assertEqual(result.tolist(), [2., 1.])
+
+    def test_minute_flows_follow_calendar_days(self):
+        frame = pd.DataFrame({
+            'Created': pd.to_datetime(['2013-01-01 20:00', '2013-01-02 06:00',
+                                       '2013-01-03 23:59']),
+            'Closed': pd.to_datetime(['2013-01-02 01:00', None, 
+                                      '2013-01-04 00:00']),
+        })
+        log = EventLog.from_frame(frame, 'Created', 'Closed', unit='min')
+
+        for name in ('Created', 'Closed'):
+            result = flow_extract(log, name)
+            expected = flow_extract(frame, name)
+            self.assertTrue(result.index.equals(expected.index))
+            self.assertEqual(result.tolist(), expected.astype(float).tolist())
+
+        self.assertEqual(flow_extract(log, 'Created').tolist(), [1., 1., 1.])
+        self.assertEqual(pd.Timestamp(log.dates('created')[1]), 
+                         pd.Timestamp('2013-01-02 06:00'))
+
+    def test_select_and_groupby(self):
+        log = self.log.select('b')
+        self.assertEqual(len(log), 3)
+        self.assertEqual(log.weights.tolist(), [1., 3., 4.])
+
+        sizes = dict((team, len(log)) for team, log in self.log.groupby())
+        self.assertEqual(sizes, {'a': 1, 'b': 3})
+        self.assertRaises(KeyError, self.log.select, 'c')
+
+    def test_to_frame(self):
+        result = self.log.to_frame()
+
+        self.assertEqual(list(result.columns), 
+                         ['Created', 'Closed', 'Weight', 'Team'])
+        self.assertEqual(result['Team'].tolist(), ['b', 'a', 'b', 'b'])
+        self.assertEqual(result['Created'].iloc[3], pd.Timestamp('2013-09-10'))
+
+        log = EventLog(self.frame['Created'], weights=self.frame['Weight'])
+        self.assertEqual(list(log.to_frame().columns), 
+                         ['Created', 'Closed', 'Weight'])
+
+    def flows(self):
+        # the log weighs its flows unless it has no weights
+        self.counts = EventLog.from_frame(self.frame, 'Created', 'Closed')
+        return (flow_extract(self.frame, 'Created'), 
+                flow_extract(self.frame, 'Closed'))
+
+    def assert_matches_flows(self, func, log_args, flow_args, **kwargs):
+        for freq in ('d', 'w', 'm'):
+            result = func(*log_args, freq=freq, **kwargs)
+            expected = func(*flow_args, freq=freq, **kwargs)
+            self.assertTrue(result.index.equals(expected.index))
+            np.testing.assert_array_equal(result.values, 
+                                          expected.values.astype(float))
+
+    def test_backlog_accepts_event_log(self):
+        created, closed = self.flows()
+        self.assert_matches_flows(backlog, (self.counts,), (created, closed))
+
+        result = backlog(self.counts, freq='w')
+        self.assertEqual(result.index[0], pd.Timestamp('2013-09-01'))
+        self.assertEqual(result.tolist()[:3], [2., 1., 1.])
+
+    def test_reverse_backlog_accepts_event_log(self):
+        created, closed = self.flows()
+        self.assert_matches_flows(reverse_backlog, (self.counts, self.counts, 5),
+                                  (created, closed, 5), 
+                                  date_start='2013-09-30')
+
+        result = reverse_backlog(self.counts, self.counts, 5, '2013-09-30', 
+                                 freq='w')
+        self.assertEqual(result.tolist()[1:], [5., 4.])
+
+    def test_throughput_accepts_event_log(self):
+        _, closed = self.flows()
+        self.assert_matches_flows(throughput, (self.counts,), (closed,))
+
+        result = throughput(self.counts, freq='w')
+        self.assertEqual(result.index[0], pd.Timestamp('2013-09-08'))
+        self.assertEqual(result.tolist()[:2], [2., 0.])
+
+    def test_arrivals_accepts_event_log(self):
+        created, _ = self.flows()
+        self.assert_matches_flows(arrivals, (self.counts,), (created,))
+
+        result = arrivals(self.counts, freq='w')
+        self.assertEqual(result.tolist()[:3], [2., 1., 1.])
+        self.assertEqual(arrivals(self.counts, freq='m').iloc[0], 4.)
+
+    def test_wait_accepts_event_log(self):
+        created, closed = self.flows()
+        self.assert_matches_flows(wait, (self.counts,), (created, closed))
+
+        result = wait(self.counts, freq='w')
+        self.assertEqual(result.tolist()[:3], [1., 1., 1.])
+
+
+class TestSqlFlowExtract(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('CREATE TABLE Jobs (Created TIMESTAMP, '
+                          'Closed TIMESTAMP, Weight REAL, Team TEXT)')
+        self.conn.executemany('INSERT INTO Jobs VALUES (?, ?, ?, ?)', [
+            ('2013-09-01 08:00:00', '2013-09-02 17:00:00', 1., 'b'),
+            ('2013-09-01 12:30:00', None, 2., 'a'),
+            ('2013-09-03 09:15:00', '2013-09-03 18:00:00', 3., 'b'),
+            ('2013-09-10 10:00:00', None, None, 'b'),
+        ])
+        self.sql = 'SELECT * FROM Jobs'
+
+    def tearDown(self):
+        self.conn.close()
+
+    def test_matches_flow_extract(self):
+        result = sql_flow_extract(self.sql, self.conn, 'Created', 
+                                  dialect='sqlite')
+        self.assertEqual(result.index[0], pd.Timestamp('2013-09-01'))
+        self.assertEqual(len(result), 10)
+        self.assertEqual(result.tolist()[:3], [2., 0., 1.])
+
+        result = sql_flow_extract(self.sql, self.conn, 'Closed', 'Weight',
+                                  dialect='sqlite')
+        self.assertEqual(result.tolist(), [1., 3.])
+
+        result = sql_flow_extract(self.sql, self.conn, 'Created', freq='w',
+                                  dialect='sqlite')
+        self.assertEqual(result.tolist(), [2., 1.])
+
+    def test_null_weights_sum_to_zero(self):
+        result = sql_flow_extract(self.sql, self.conn, 'Created', 'Weight',
+                                  dialect='sqlite')
+        self.assertEqual(len(result), 10)
+        self.assertEqual(result.iloc[0], 3.)
+        self.assertEqual(result.iloc[-1], 0.)
+
+    def test_groupby(self):
+        result = sql_flow_extract(self.sql, self.conn, 'Created', 
+                                  dialect='sqlite', groupby='Team')
+        self.assertEqual(list(result.columns), ['a', 'b'])
+        self.assertEqual(len(result), 10)
+        self.assertEqual(result['a'].sum(), 1.)
+        self.assertEqual(result['b'].tolist()[:3], [1., 0., 1.])
+
+    def test_double_flow_extract(self):
+        inflows, outflows = sql_double_flow_extract(
+            self.sql, self.conn, 'Created', 'Closed', 'Created', 
+            dialect='sqlite')
+        self.assertEqual(inflows.sum(), 4.)
+        self.assertEqual(outflows.tolist(), [1., 0., 1.])
+
+    def test_dialects(self):
+        query = _flow_query('SELECT * FROM Jobs', 'Created', None, 'm', 
+                            'mssql')
+        self.assertTrue("DATEADD(month, DATEDIFF(month, 0, _src.[Created]), 0)"
+                        in query)
+
+        # unweighted flows don't sum anything, SQL Server rejects SUM(NULL)
+        self.assertEqual(query, 
+            'SELECT DATEADD(month, DATEDIFF(month, 0, _src.[Created]), 0) '
+            'AS FlowDate, COUNT(*) AS Units, MIN(_src.[Created]) AS FirstDate, '
+            'MAX(_src.[Created]) AS LastDate FROM (SELECT * FROM Jobs) AS _src '
+            'WHERE _src.[Created] IS NOT NULL '
+            'GROUP BY DATEADD(month, DATEDIFF(month, 0, _src.[Created]), 0)')
+        query = _flow_query('SELECT * FROM Jobs', 'Created', 'Weight', 'd', 
+                            'mssql')
+        self.assertTrue('SUM(_src.[Weight]) AS Weight' in query)
+
+        # a dictionary of templates works for any other database
+        result = sql_flow_extract(self.sql, self.conn, 'Created', 
+                                  dialect={'d': 'date({})'})
+        self.assertEqual(result.sum(), 4.)
+        self.assertRaises(ValueError, sql_flow_extract, self.sql, self.conn,
+                          'Created', dialect='oracle')
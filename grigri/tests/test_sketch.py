@@ -0,0 +1,71 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from .. import sketch
+from ..sketch import (HyperLogLog, hash_values, sketch_cells,
+                      estimate_registers)
+
+
+class TestHyperLogLog(unittest.TestCase):
+    def test_small_counts(self):
+        # few values barely collide in 16K registers, so counting is close
+        # to exact
+        sketch = HyperLogLog(precision=14).update(np.arange(100))
+        self.assertAlmostEqual(sketch.count(), 100, delta=1)
+        self.assertEqual(HyperLogLog().count(), 0)
+
+    def test_error_is_bounded(self):
+        values = np.random.RandomState(0).randint(0, 2 ** 62, 200000)
+        sketch = HyperLogLog(precision=12)
+        for chunk in np.array_split(values, 10):
+            sketch.update(chunk)
+
+        # three standard errors
+        self.assertTrue(abs(sketch.count() / 200000. - 1) < 3 * sketch.error)
+        self.assertEqual(sketch.registers.nbytes, 4096)
+
+    def test_merge_counts_the_union(self):
+        first = HyperLogLog().update(np.arange(0, 30000))
+        second = HyperLogLog().update(np.arange(20000, 50000))
+        union = HyperLogLog().update(np.arange(0, 50000))
+
+        merged = first.copy().merge(second)
+        np.testing.assert_array_equal(merged.registers, union.registers)
+        self.assertRaises(ValueError, first.merge, HyperLogLog(precision=10))
+
+    def test_hashes_are_stable(self):
+        hashes, valid = hash_values(np.array(['a', None, 'b', 'a'], 
+                                             dtype=object))
+        self.assertEqual(valid.tolist(), [True, False, True, True])
+        self.assertEqual(hashes[0], hashes[3])
+        self.assertNotEqual(hashes[0], hashes[2])
+
+        # an int column that turned into floats because of a null
+        ints, _ = hash_values(np.array([1, 2]))
+        floats, valid = hash_values(np.array([1., 2., np.nan]))
+        np.testing.assert_array_equal(ints, floats[:2])
+        self.assertFalse(valid[2])
+
+        dates = pd.date_range('2013-09-01', periods=3).values
+        self.assertEqual(len(set(hash_values(dates)[0])), 3)
+
+    def test_sketch_cells_match_single_sketches(self):
+        values = np.arange(3000)
+        cells = values % 3
+        hashes, _ = hash_values(values)
+        registers = sketch_cells(cells, hashes, 3)
+        self.assertEqual(registers.shape, (3, 4096))
+
+        for cell in range(3):
+            single = HyperLogLog().update(values[cells == cell])
+            np.testing.assert_array_equal(registers[cell], single.registers)
+
+        # estimated a few sketches at a time, whatever their size
+        expected = estimate_registers(registers)
+        with mock.patch.object(sketch, '_estimate_chunk_registers', 5000):
+            np.testing.assert_array_equal(estimate_registers(registers),
+                                          expected)
+        self.assertTrue(np.all(np.abs(expected / 1000. - 1) < 0.05))
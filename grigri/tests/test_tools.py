@@ -0,0 +1,198 @@
+import gc
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ..tools import (parallel_apply, coalesce, is_numeric, find_column_name,
+                     find_column_names, column_lookup, _column_lookups)
+from ..sharedmem import share_frame, attach_frame, chunk_descriptor
+from .utils import assert_series_equal, assert_frame_equal
+
+
+def _double(chunk):
+    return chunk * 2
+
+def _squares(chunk):
+    return [x * x for x in chunk]
+
+
+class TestParallelApply(unittest.TestCase):
+    def setUp(self):
+        self.frame = pd.DataFrame({'a': range(100), 'b': range(100, 200)})
+
+    def test_parallel_apply_preserves_order(self):
+        result = parallel_apply(self.frame, _double, workers=4, chunks=7)
+        expected = self.frame * 2
+
+        assert_frame_equal(result, expected)
+
+    def test_parallel_apply_with_processes(self):
+        series = self.frame['a']
+        result = parallel_apply(series, _double, workers=2, 
+                                backend='processes')
+
+        assert_series_equal(result, series * 2)
+
+    def test_parallel_apply_concatenates_lists(self):
+        result = parallel_apply(list(range(10)), _squares, workers=3)
+        expected = [x * x for x in range(10)]
+
+        self.assertEqual(result, expected)
+
+    def test_parallel_apply_returns_timings(self):
+        result, timings = parallel_apply(self.frame, _double, workers=2, 
+                                         chunks=5, return_timings=True)
+
+        self.assertEqual(len(timings), 5)
+        self.assertTrue(all(t >= 0 for t in timings))
+
+    def test_parallel_apply_handles_empty_input(self):
+        result = parallel_apply(self.frame[:0], _double, workers=2)
+        self.assertTrue(result.empty)
+
+    def test_parallel_apply_with_shared_memory(self):
+        result = parallel_apply(self.frame, _double, workers=2, chunks=3,
+                                backend='processes', shared=True)
+
+        assert_frame_equal(result, self.frame * 2)
+
+    def test_parallel_apply_rejects_unknown_backend(self):
+        self.assertRaises(ValueError, parallel_apply, self.frame, _double, 
+                          backend='gpu')
+
+
+class TestSharedFrame(unittest.TestCase):
+    def test_attach_frame_round_trips_columns(self):
+        frame = pd.DataFrame({
+            'int': range(5),
+            'date': pd.date_range('2013-09-01', periods=5),
+            'str': list('abcde'),
+        })
+
+        with share_frame(frame) as shared:
+            result = attach_frame(shared.descriptor)
+            assert_frame_equal(result, frame)
+
+            result = attach_frame(shared.descriptor, 1, 3)
+            assert_frame_equal(result, frame[1:3])
+
+    def test_chunk_descriptor_slices_pickled_columns(self):
+        frame = pd.DataFrame({
+            'int': range(5),
+            'str': list('abcde'),
+        }, index=list('vwxyz'))
+
+        with share_frame(frame) as shared:
+            chunk = chunk_descriptor(shared.descriptor, 1, 3)
+            self.assertEqual(chunk['length'], 2)
+            self.assertEqual(len(chunk['index'][1]), 2)
+            self.assertEqual(len(dict(chunk['columns'])['str'][1]), 2)
+
+            result = attach_frame(chunk)
+            assert_frame_equal(result, frame[1:3])
+
+            result = attach_frame(chunk_descriptor(chunk, 1, None))
+            assert_frame_equal(result, frame[2:3])
+
+    def test_attach_frame_round_trips_series(self):
+        series = pd.Series([1.5, 2.5, 3.5], name='value')
+
+        with share_frame(series) as shared:
+            result = attach_frame(shared.descriptor)
+            assert_series_equal(result, series)
+
+
+class TestVectorizedChecks(unittest.TestCase):
+    def test_coalesce_fills_in_order(self):
+        first = pd.Series([1., None, None, 4.])
+        second = pd.Series([9., 2., None, 9.])
+
+        result = coalesce(first, second, 0)
+        expected = pd.Series([1., 2., 0., 4.])
+
+        assert_series_equal(result, expected)
+
+    def test_coalesce_looks_up_columns(self):
+        frame = pd.DataFrame({'a': [None, 'x'], 'b': ['y', 'z']})
+
+        result = coalesce('a', 'b', frame=frame)
+        self.assertEqual(result.tolist(), ['y', 'x'])
+
+    def test_coalesce_needs_series_first(self):
+        self.assertRaises(ValueError, coalesce, [1, None], 0)
+        self.assertRaises(ValueError, coalesce, 'a', 0, 
+                          frame=pd.DataFrame({'b': [1]}))
+
+    def test_coalesce_keeps_dtype_without_nulls(self):
+        first = pd.Series([1, 2, 3])
+        result = coalesce(first, pd.Series([None, 1., None]))
+
+        self.assertEqual(result.dtype, first.dtype)
+
+    def test_coalesce_keeps_extension_dtypes(self):
+        first = pd.Series([1, None, None], dtype='Int64')
+
+        result = coalesce(first, 0)
+        self.assertEqual(str(result.dtype), 'Int64')
+        self.assertEqual(result.tolist(), [1, 0, 0])
+
+        result = coalesce(first, pd.Series([None, 5, None]), 
+                          np.array([7, 7, 7]))
+        self.assertEqual(str(result.dtype), 'Int64')
+        self.assertEqual(result.tolist(), [1, 5, 7])
+        self.assertEqual(first.isnull().sum(), 2)
+
+    def test_is_numeric_returns_mask(self):
+        series = pd.Series(['1', 'a', 2.5, None])
+
+        result = is_numeric(series)
+        expected = pd.Series([True, False, True, False])
+
+        assert_series_equal(result, expected)
+
+    def test_is_numeric_numeric_dtypes(self):
+        result = is_numeric(np.arange(3))
+        self.assertTrue(result.all())
+
+        self.assertTrue(is_numeric('1'))
+        self.assertFalse(is_numeric(None))
+
+    def test_is_numeric_skips_nulls_in_numeric_objects(self):
+        values = np.array([1, None, 2.5, '3'], dtype=object)
+        result = is_numeric(values)
+
+        self.assertEqual(result.tolist(), [True, False, True, True])
+
+
+class TestColumnLookup(unittest.TestCase):
+    def setUp(self):
+        self.frame = pd.DataFrame([(1, 2, 3)], 
+                                  columns=['InstallationID', 'Name', 'City'])
+
+    def test_find_column_name_is_case_insensitive(self):
+        self.assertEqual(find_column_name(self.frame, 'installationid'), 
+                         'InstallationID')
+        self.assertRaises(KeyError, find_column_name, self.frame, 'zip')
+
+    def test_find_column_names_in_bulk(self):
+        result = find_column_names(self.frame, ['CITY', 'name'])
+        self.assertEqual(result, ['City', 'Name'])
+
+    def test_column_lookup_is_cached_per_column_set(self):
+        lookup = column_lookup(self.frame)
+        self.assertTrue(column_lookup(self.frame) is lookup)
+
+        # new columns get a fresh lookup
+        self.frame.columns = ['a', 'b', 'c']
+        self.assertEqual(find_column_name(self.frame, 'A'), 'a')
+
+    def test_column_lookup_is_evicted_with_frame(self):
+        frame = pd.DataFrame(columns=['Temporary'])
+        column_lookup(frame)
+        key = id(frame.columns)
+        self.assertTrue(key in _column_lookups)
+
+        del frame
+        gc.collect()
+        self.assertFalse(key in _column_lookups)
@@ -0,0 +1,115 @@
+import sqlite3
+import unittest
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from ..transforms import remove_columns, Pipeline, _run_resample
+
+
+class TestRemoveColumns(unittest.TestCase):
+    def setUp(self):
+        self.frame = pd.DataFrame([(1, 2, 3)], columns=['ID', 'Name', 'City'])
+
+    def test_remove_columns_is_case_insensitive(self):
+        result = remove_columns(self.frame, ['id', 'CITY'])
+        self.assertEqual(list(result.columns), ['Name'])
+
+    def test_remove_columns_accepts_single_column(self):
+        result = remove_columns(self.frame, 'name')
+        self.assertEqual(list(result.columns), ['ID', 'City'])
+
+    def test_remove_columns_ignores_missing_columns(self):
+        result = remove_columns(self.frame, ['zip'])
+        self.assertEqual(list(result.columns), ['ID', 'Name', 'City'])
+
+    def test_remove_columns_accepts_non_string_labels(self):
+        frame = pd.DataFrame([(1, 2, 3)], columns=['ID', 0, 1])
+        result = remove_columns(frame, [0, 'id'])
+        self.assertEqual(list(result.columns), [1])
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.execute('CREATE TABLE jobs (Created TEXT, Notes TEXT, '
+                          'Size REAL)')
+        self.conn.executemany('INSERT INTO jobs VALUES (?, ?, ?)', 
+                              [('2013-09-01', 'a', 1.), 
+                               ('2013-09-02', 'b', 2.)])
+
+    def test_remove_columns_is_pushed_into_sql_source(self):
+        plan = (Pipeline.from_sql('SELECT * FROM jobs', self.conn)
+                .remove_columns('notes'))
+
+        steps = plan.optimize()
+        self.assertEqual(len(steps), 1)
+        self.assertEqual(steps[0].kwargs['exclude'], ['notes'])
+
+        result = plan.execute()
+        self.assertEqual(list(result.columns), ['Created', 'Size'])
+
+    def test_remove_columns_is_pushed_before_coercion(self):
+        frame = pd.DataFrame({'a': ['1'], 'b': ['2']}, dtype=object)
+        plan = (Pipeline(frame)
+                .coerce_dtypes({'a': float, 'b': float})
+                .remove_columns(['B']))
+
+        names = [step.name for step in plan.optimize()]
+        self.assertEqual(names, ['frame', 'remove_columns', 'coerce_dtypes'])
+        self.assertEqual(plan.optimize()[2].kwargs['columns'], {'a': float})
+
+        result = plan.execute()
+        self.assertEqual(list(result.columns), ['a'])
+        self.assertEqual(result['a'].dtype, float)
+
+    def test_squeeze(self):
+        # the example pipeline: a SQL result squeezed into a time-series
+        plan = (Pipeline.from_sql('SELECT Created, Size FROM jobs', self.conn)
+                .coerce_dtypes({'Created': datetime, 'Size': float})
+                .squeeze()
+                .resample('d', how='sum'))
+        result = plan.execute()
+        self.assertTrue(isinstance(result, pd.Series))
+        self.assertEqual(result.index[0], pd.Timestamp('2013-09-01'))
+        self.assertEqual(result.tolist(), [1., 2.])
+
+        result = Pipeline(pd.DataFrame({'a': [1, 2]})).squeeze().execute()
+        self.assertEqual(result.tolist(), [1, 2])
+
+        frame = pd.DataFrame({'a': [1, 2], 'b': [3, 4]})
+        self.assertRaises(ValueError, Pipeline(frame).squeeze().execute)
+
+    def test_resample_and_reindex_are_fused(self):
+        index = pd.date_range('2013-08-31', periods=5)
+        series = pd.Series([1., 2., 4.], index=pd.to_datetime([
+            '2013-09-01 08:00', '2013-09-01 17:00', '2013-09-03 12:00']))
+        for how in ('sum', 'mean', 'count', 'max'):
+            plan = (Pipeline(series)
+                    .resample('d', how=how)
+                    .reindex(index, fill_value=0))
+
+            steps = plan.optimize()
+            self.assertEqual([step.name for step in steps], 
+                             ['frame', 'resample_reindex'])
+            self.assertTrue('resample_reindex(' in plan.explain())
+
+            unfused = (_run_resample(series, 'd', how)
+                       .reindex(index, fill_value=0))
+            result = plan.execute()
+            np.testing.assert_array_equal(result.values, unfused.values)
+            self.assertTrue(result.index.equals(unfused.index))
+
+    def test_reindex_keeps_existing_nans(self):
+        index = pd.date_range('2013-09-01', periods=3)
+        series = pd.Series([1., np.nan], index=index[:2])
+
+        result = Pipeline(series).reindex(index, fill_value=0).execute()
+        np.testing.assert_array_equal(result.values, [1., np.nan, 0.])
+
+    def test_pipeline_is_immutable(self):
+        base = Pipeline.from_sql('SELECT * FROM jobs', self.conn)
+        base.remove_columns('notes')
+
+        self.assertEqual(len(base.steps), 1)
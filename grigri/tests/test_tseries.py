@@ -0,0 +1,320 @@
+from datetime import datetime
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from ..tseries import (split_tseries, partition_tseries, count_timestamps, 
+                       resample_reindex, group_resample, Rollup, _resample)
+
+
+class TestPartitionTseries(unittest.TestCase):
+    def setUp(self):
+        index = pd.date_range('2013-09-01', '2013-11-30')
+        self.series = pd.Series(range(len(index)), index=index)
+
+    def test_split_tseries_keeps_split_day_in_past(self):
+        past, future = split_tseries(self.series, datetime(2013, 9, 2, 15))
+
+        self.assertEqual(past.index[-1], datetime(2013, 9, 2))
+        self.assertEqual(future.index[0], datetime(2013, 9, 3))
+        self.assertEqual(len(past) + len(future), len(self.series))
+
+    def test_partition_tseries_splits_by_month(self):
+        month_ends = [datetime(2013, 10, 31), datetime(2013, 9, 30)]
+        pieces = partition_tseries(self.series, month_ends)
+
+        self.assertEqual([len(piece) for piece in pieces], [30, 31, 30])
+        self.assertEqual(pieces[1].index[0], datetime(2013, 10, 1))
+        self.assertEqual(pieces[1].index[-1], datetime(2013, 10, 31))
+
+    def test_partition_tseries_sorts_unsorted_index(self):
+        shuffled = self.series.iloc[::-1]
+        pieces = partition_tseries(shuffled, [datetime(2013, 9, 30)])
+
+        self.assertEqual(len(pieces[0]), 30)
+        self.assertTrue(pieces[0].index.equals(self.series.index[:30]))
+
+    def test_partition_tseries_handles_out_of_range_dates(self):
+        pieces = partition_tseries(self.series, [datetime(2000, 1, 1), 
+                                                 datetime(2020, 1, 1)])
+
+        self.assertEqual([len(piece) for piece in pieces], 
+                         [0, len(self.series), 0])
+
+
+class TestBinnedAggregation(unittest.TestCase):
+    def setUp(self):
+        self.timestamps = pd.Series(pd.to_datetime([
+            '2013-09-01 08:00', '2013-09-01 17:00', '2013-09-03 12:00', 
+            None, '2013-10-15 00:00'
+        ]))
+
+    def test_count_timestamps_by_day(self):
+        result = count_timestamps(self.timestamps[:3])
+
+        self.assertTrue(result.index.equals(
+            pd.date_range('2013-09-01', '2013-09-03')))
+        self.assertEqual(result.tolist(), [2, 0, 1])
+
+    def test_count_timestamps_onto_new_index(self):
+        new_index = pd.date_range('2013-08-31', periods=3)
+        result = count_timestamps(self.timestamps, new_index=new_index,
+                                  weights=[1, 2, 3, 4, 5])
+
+        self.assertEqual(result.tolist(), [0, 3, 0])
+
+    def test_count_timestamps_by_month(self):
+        result = count_timestamps(self.timestamps, freq='m')
+
+        # periods are labeled by their last day, like resample
+        self.assertEqual(list(result.index), [datetime(2013, 9, 30), 
+                                              datetime(2013, 10, 31)])
+        self.assertEqual(result.tolist(), [3, 1])
+
+    def test_resample_reindex_reductions(self):
+        series = pd.Series([1., 3., np.nan, 4.], index=pd.to_datetime([
+            '2013-09-01 08:00', '2013-09-01 17:00', '2013-09-02 00:00', 
+            '2013-09-03 00:00']))
+        new_index = pd.date_range('2013-08-31', periods=5)
+
+        def check(how, expected):
+            result = resample_reindex(series, new_index, how=how)
+            np.testing.assert_array_equal(result.values, expected)
+
+        nan = np.nan
+        check('sum', [nan, 4., nan, 4., nan])
+        check('mean', [nan, 2., nan, 4., nan])
+        check('count', [nan, 2., 0., 1., nan])
+        check('min', [nan, 1., nan, 4., nan])
+        check('max', [nan, 3., nan, 4., nan])
+        check('first', [nan, 1., nan, 4., nan])
+        check('last', [nan, 3., nan, 4., nan])
+
+        result = resample_reindex(series, new_index, how='sum', fill_value=0)
+        self.assertEqual(result.tolist(), [0., 4., 0., 4., 0.])
+
+    def test_count_timestamps_keeps_integer_counts(self):
+        self.assertEqual(count_timestamps(self.timestamps).dtype, np.int64)
+        self.assertEqual(count_timestamps(self.timestamps, freq='2h').dtype,
+                         np.int64)
+
+        result = count_timestamps(self.timestamps, weights=[1, 2, 3, 4, 5])
+        self.assertEqual(result.dtype, float)
+
+    def test_mismatched_new_index_matches_reference(self):
+        series = pd.Series([1., 3., 4., 6.], index=pd.to_datetime([
+            '2013-09-01 08:00', '2013-09-20 17:00', '2013-10-03 00:00',
+            '2013-11-30 00:00']))
+        indexes = [
+            # month starts rather than the month ends resample labels with
+            pd.date_range('2013-09-01', periods=3, freq='MS'),
+            # the same month twice
+            pd.DatetimeIndex(['2013-09-30', '2013-10-31', '2013-09-30']),
+            # not midnight
+            pd.DatetimeIndex(['2013-09-30 12:00', '2013-10-31']),
+        ]
+
+        reference = _resample(series, 'm', 'sum')
+        for new_index in indexes:
+            result = resample_reindex(series, new_index, freq='m', how='sum')
+            np.testing.assert_array_equal(result.values, 
+                                          reference.reindex(new_index).values)
+
+        timestamps = pd.Series(series.index)
+        reference = _resample(pd.Series(1, index=series.index), 'm', 'sum')
+        for new_index in indexes:
+            result = count_timestamps(timestamps, freq='m', 
+                                      new_index=new_index)
+            expected = reference.reindex(new_index).fillna(0)
+            self.assertEqual(result.tolist(), expected.tolist())
+
+
+class TestGroupResample(unittest.TestCase):
+    def setUp(self):
+        self.frame = pd.DataFrame({
+            'Date': pd.to_datetime([
+                '2013-09-01 08:00', '2013-09-01 17:00', '2013-09-03 12:00', 
+                '2013-09-02 09:00', '2013-09-02 10:00', '2013-09-04 11:00']),
+            'Region': ['a', 'a', 'a', 'b', 'b', 'b'],
+            'Value': [1., 2., 3., 4., 5., 6.],
+        })
+
+    def test_parallel_group_resample(self):
+        result = group_resample(self.frame, 'Date', 'Region', 
+                                value_column='Value', how='sum', workers=2)
+
+        self.assertEqual(result.index.names, ['Region', 'Date'])
+        # empty periods sum to NaN, like resample(how='sum')
+        np.testing.assert_array_equal(result['a'].values, [3., np.nan, 3.])
+        np.testing.assert_array_equal(result['b'].values, [9., np.nan, 6.])
+        self.assertTrue(result['b'].index.equals(
+            pd.date_range('2013-09-02', '2013-09-04')))
+
+    def test_group_resample_matches_parallel(self):
+        expected = group_resample(self.frame, 'Date', 'Region', 
+                                  value_column='Value', how='sum', workers=2)
+        result = group_resample(self.frame, 'Date', 'Region', 
+                                value_column='Value', how='sum')
+
+        self.assertTrue(isinstance(result, pd.Series))
+        self.assertTrue(result.index.equals(expected.index))
+        np.testing.assert_array_equal(result.values, expected.values)
+
+
+class TestRollup(unittest.TestCase):
+    def setUp(self):
+        self.frame = pd.DataFrame({
+            'Date': pd.to_datetime(['2013-09-01 08:00', '2013-09-01 17:00', 
+                                    '2013-09-02 09:00', '2013-09-30 12:00',
+                                    '2013-10-01 12:00', '2013-09-01 12:00']),
+            'Value': [1., 3., np.nan, 4., 10., 7.],
+            'Region': ['a', 'a', 'a', 'a', 'a', 'b'],
+        })
+        self.rollup = Rollup(self.frame, 'Date', 'Value', groupby='Region')
+
+    def test_daily_partials(self):
+        result = self.rollup.resample('d', how='sum')
+
+        # every day inside a group's span is there, missing days are NaN
+        self.assertEqual(len(result.loc['a']), 31)
+        self.assertEqual(result.loc['a'].iloc[0], 4.)
+        self.assertTrue(np.isnan(result.loc['a'].iloc[1]))
+        self.assertEqual(result.loc['b'].tolist(), [7.])
+
+    def test_coarser_frequencies(self):
+        result = self.rollup.resample('m', how='mean')
+        self.assertEqual(list(result.index.get_level_values('Date')), 
+                         [datetime(2013, 9, 30), datetime(2013, 10, 31), 
+                          datetime(2013, 9, 30)])
+        self.assertEqual(result.tolist(), [8. / 3, 10., 7.])
+
+        result = self.rollup.resample('q', how='count', label='start')
+        self.assertEqual(result.loc['a'].tolist(), [3., 1.])
+        self.assertEqual(result.index[0][1], datetime(2013, 7, 1))
+
+        result = self.rollup.resample('y', how='std')
+        self.assertAlmostEqual(result.loc['a'].iloc[0], 
+                               np.std([1., 3., 4., 10.], ddof=1))
+        self.assertTrue(np.isnan(result.loc['b'].iloc[0]))
+
+    def test_first_and_last_follow_time(self):
+        result = self.rollup.resample('m', how='first', by=[])
+        self.assertEqual(result.tolist(), [1., 10.])
+
+        result = self.rollup.resample('m', how='last', by=[])
+        self.assertEqual(result.tolist(), [4., 10.])
+
+    def test_totals_across_groups(self):
+        result = self.rollup.resample('w', how='max', by=[])
+
+        # 9/1/2013 is a Sunday so it closes the first week
+        self.assertEqual(result.index[0], datetime(2013, 9, 1))
+        self.assertEqual(result.iloc[0], 7.)
+
+        new_index = pd.date_range('2013-08-31', periods=3)
+        result = self.rollup.resample('d', how='sum', by=[], 
+                                      new_index=new_index)
+        self.assertTrue(np.isnan(result.iloc[0]))
+        self.assertEqual(result.iloc[1], 11.)
+
+    def test_merge_matches_rollup_of_all_rows(self):
+        first = Rollup(self.frame.iloc[:3], 'Date', 'Value', groupby='Region')
+        second = Rollup(self.frame.iloc[3:], 'Date', 'Value', groupby='Region')
+        merged = first.merge(second)
+
+        for how in ('count', 'sum', 'min', 'first', 'last', 'var'):
+            expected = self.rollup.resample('m', how=how)
+            result = merged.resample('m', how=how)
+            self.assertTrue(result.index.equals(expected.index))
+            np.testing.assert_array_equal(result.values, expected.values)
+
+    def test_variance_of_large_values(self):
+        # a sum of squares would lose every digit of a spread this small
+        random_state = np.random.RandomState(0)
+        values = 1e9 + random_state.normal(0, 1, 1000)
+        frame = pd.DataFrame({
+            'Date': (np.datetime64('2013-09-01')
+                     + np.arange(1000).astype('timedelta64[h]')),
+            'Value': values,
+        })
+        rollup = Rollup(frame, 'Date', 'Value')
+        merged = Rollup(frame.iloc[:400], 'Date', 'Value').merge(
+            Rollup(frame.iloc[400:], 'Date', 'Value'))
+
+        for result in (rollup.resample('y', how='var', by=[]),
+                       merged.resample('y', how='var', by=[])):
+            self.assertAlmostEqual(result.iloc[0], np.var(values, ddof=1),
+                                   places=6)
+
+
+class TestDistinctCounts(unittest.TestCase):
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        n = 20000
+        seconds = random_state.randint(0, 60 * 86400, n)
+        self.frame = pd.DataFrame({
+            'Date': (np.datetime64('2013-09-01') 
+                     + seconds.astype('timedelta64[s]')),
+            'Region': random_state.choice(['a', 'b'], n),
+            'Customer': random_state.randint(0, 3000, n).astype(float),
+        })
+        self.frame.loc[::10, 'Customer'] = np.nan
+
+    def expected(self, freq):
+        frame = self.frame.dropna()
+        counts = {}
+        for (region, date), customers in zip(
+                zip(frame['Region'], frame['Date']), frame['Customer']):
+            period = pd.Timestamp(date).to_period(freq).end_time.normalize()
+            counts.setdefault((region, period), set()).add(customers)
+        return dict((key, len(values)) for key, values in counts.items())
+
+    def test_exact_nunique(self):
+        result = group_resample(self.frame, 'Date', 'Region', 
+                                value_column='Customer', freq='w', 
+                                how='nunique')
+        self.assertEqual(result.index.names, ['Region', 'Date'])
+        self.assertEqual(len(result), 2 * 10)
+
+        expected = self.expected('W')
+        for key, value in result.items():
+            self.assertEqual(value, expected.get(key, 0))
+
+    def test_approximate_nunique_is_close(self):
+        exact = group_resample(self.frame, 'Date', 'Region', 
+                               value_column='Customer', freq='m', 
+                               how='nunique')
+        result = group_resample(self.frame, 'Date', 'Region', 
+                                value_column='Customer', freq='m', 
+                                how='nunique', approximate=True)
+        self.assertTrue(result.index.equals(exact.index))
+        errors = np.abs(result.values / exact.values - 1)
+        # 1.6% standard error at the default precision
+        self.assertTrue(errors.max() < 0.05)
+
+    def test_nunique_needs_value_column(self):
+        self.assertRaises(ValueError, group_resample, self.frame, 'Date', 
+                          'Region', how='nunique')
+
+    def test_daily_sketches_merge(self):
+        rollup = Rollup(self.frame, 'Date', groupby='Region', 
+                        distinct_column='Customer')
+        first = Rollup(self.frame.iloc[:5000], 'Date', groupby='Region', 
+                       distinct_column='Customer')
+        second = Rollup(self.frame.iloc[5000:], 'Date', groupby='Region', 
+                        distinct_column='Customer')
+
+        # sketches only keep maxima, so merging loses nothing
+        expected = rollup.resample('m', how='nunique', by=[])
+        result = first.merge(second).resample('m', how='nunique', by=[])
+        np.testing.assert_array_equal(result.values, expected.values)
+        self.assertEqual(result.name, 'Customer')
+
+        total = self.frame.groupby(self.frame['Date'].dt.month)['Customer']
+        errors = np.abs(result.values / total.nunique().values - 1)
+        self.assertTrue(errors.max() < 0.05)
+
+        self.assertRaises(ValueError, Rollup(self.frame, 'Date').resample, 
+                          'm', 'nunique')
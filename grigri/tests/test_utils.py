@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from .utils import (assert_almost_equal, assert_arrays_almost_equal,
+                    assert_series_equal, assert_frame_equal)
+
+
+class TestArrayAssertions(unittest.TestCase):
+    def test_tolerance_and_nans(self):
+        a = np.array([1., np.nan, 1e-7, np.inf, 1000.])
+        b = np.array([1.000001, np.nan, 2e-7, np.inf, 1000.0001])
+        assert_arrays_almost_equal(a, b)
+
+        self.assertRaises(AssertionError, assert_arrays_almost_equal, 
+                          a, np.array([1., 0., 1e-7, np.inf, 1000.]))
+        self.assertRaises(AssertionError, assert_arrays_almost_equal, 
+                          a, np.array([1.1, np.nan, 1e-7, np.inf, 1000.]))
+
+    def test_datetimes(self):
+        a = pd.to_datetime(['2013-09-01', None]).values
+        assert_arrays_almost_equal(a, a.copy())
+
+        b = pd.to_datetime(['2013-09-02', None]).values
+        self.assertRaises(AssertionError, assert_arrays_almost_equal, a, b)
+
+        # the same instants in different units
+        a = np.array(['2013-09-01T10:00:00', 'NaT'], dtype='M8[s]')
+        assert_arrays_almost_equal(a, a.astype('M8[ns]'))
+        assert_arrays_almost_equal(a - a[0], (a - a[0]).astype('m8[ns]'))
+        self.assertRaises(AssertionError, assert_arrays_almost_equal, 
+                          a, a.astype('M8[ns]') + np.timedelta64(1, 'ns'))
+
+    def test_integers_are_exact(self):
+        assert_arrays_almost_equal(np.array([1, 2]), np.array([1, 2]))
+        self.assertRaises(AssertionError, assert_series_equal, 
+                          pd.Series([100000]), pd.Series([100001]))
+
+        # large IDs don't survive a cast to float
+        ids = np.array([2 ** 62, 2 ** 62 + 1], dtype=np.int64)
+        self.assertRaises(AssertionError, assert_arrays_almost_equal, 
+                          ids, ids[::-1])
+        self.assertRaises(AssertionError, assert_arrays_almost_equal, 
+                          np.array([True, False]), np.array([True, True]))
+
+    def test_objects(self):
+        a = np.array(['a', None, 1.0000001, np.nan], dtype=object)
+        b = np.array(['a', None, 1., None], dtype=object)
+        assert_arrays_almost_equal(a, b)
+
+        b[0] = 'b'
+        self.assertRaises(AssertionError, assert_arrays_almost_equal, a, b)
+
+    def test_reports_first_mismatches_across_chunks(self):
+        a = np.zeros(100)
+        b = np.zeros(100)
+        b[[5, 50, 60, 95]] = 1.
+
+        try:
+            assert_arrays_almost_equal(a, b, chunksize=30, max_mismatches=3)
+        except AssertionError as e:
+            message = str(e)
+        else:
+            self.fail('arrays should differ')
+
+        self.assertTrue('4 of 100' in message)
+        self.assertTrue('[5]' in message and '[60]' in message)
+        self.assertFalse('[95]' in message)
+
+    def test_frames(self):
+        frame = pd.DataFrame({'a': np.arange(5.), 'b': list('abcde'),
+                              'c': pd.date_range('2013-09-01', periods=5)})
+        assert_frame_equal(frame, frame.copy(), chunksize=2)
+
+        other = frame.copy()
+        other.loc[3, 'a'] = np.nan
+        try:
+            assert_frame_equal(frame, other)
+        except AssertionError as e:
+            self.assertTrue("Column 'a'" in str(e))
+        else:
+            self.fail('frames should differ')
+
+    def test_scalars_and_lengths(self):
+        assert_almost_equal(1., 1.000001)
+        assert_almost_equal(np.nan, None)
+        self.assertRaises(AssertionError, assert_almost_equal, [1, 2], [1])
+        assert_series_equal(pd.Series([1, 2]), pd.Series([1, 2]))
@@ -7,17 +7,136 @@ values, etc.
 Functions directly taken from pandas source code:
 https://github.com/pydata/pandas/blob/master/pandas/util/testing.py
 
+Arrays are compared whole with vectorized checks, a chunk of rows at a
+time so frames with millions of rows don't need several temporary copies
+of every column, and failures list only the first few mismatching 
+positions.
+
 """
 
 import numpy as np
 
-from pandas.core.common import isnull
-from pandas import DataFrame
+from pandas import isnull, DataFrame
+
+# rows compared at a time
+CHUNKSIZE = 1000000
+
+# mismatching positions listed in a failure message
+MAX_MISMATCHES = 10
 
 
 def isiterable(obj):
     return hasattr(obj, '__iter__')
 
+def _decimal(a_dtype, b_dtype, check_less_precise):
+    # compare float32 data with 3 instead of 5 decimals if asked to
+    if (check_less_precise and a_dtype.kind == 'f' and b_dtype.kind == 'f'
+            and a_dtype.itemsize <= 4 and b_dtype.itemsize <= 4):
+        return 3
+    return 5
+
+def _numeric_mismatches(a, b, decimal):
+    """
+    Mask of positions where two numeric arrays differ, with the same
+    tolerance as comparing scalars: absolute for values close to zero and
+    relative otherwise. NaN only matches NaN and inf any inf.
+    """
+
+    a = a.astype(np.float64)
+    b = b.astype(np.float64)
+    tolerance = 1.5 * 10 ** -decimal
+
+    a_nan, b_nan = np.isnan(a), np.isnan(b)
+    a_inf, b_inf = np.isinf(a), np.isinf(b)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        small = np.abs(a) < 1e-5
+        close = np.where(small, np.abs(a - b) < tolerance,
+                         np.abs(1 - a / b) < tolerance)
+
+    close |= a_nan & b_nan
+    close |= a_inf & b_inf
+    close &= a_nan == b_nan
+    close[a_inf & ~b_inf] = False
+
+    return ~close
+
+def _scalars_almost_equal(a, b, check_less_precise):
+    try:
+        assert_almost_equal(a, b, check_less_precise)
+    except AssertionError:
+        return False
+    return True
+
+def _mismatches(a, b, check_less_precise):
+    """Mask of positions where two arrays of the same length differ."""
+
+    kinds = a.dtype.kind + b.dtype.kind
+
+    if all(kind in 'biu' for kind in kinds):
+        # integers are compared exactly, a cast to float would also round
+        # large IDs
+        return a != b
+
+    if all(kind in 'biuf' for kind in kinds):
+        decimal = _decimal(a.dtype, b.dtype, check_less_precise)
+        return _numeric_mismatches(a, b, decimal)
+
+    if kinds in ('MM', 'mm'):
+        # bring both to one unit so M8[s] and M8[ns] of the same instants
+        # match. NaT is the smallest int64, so this also matches NaT with NaT
+        unit = 'datetime64[ns]' if kinds == 'MM' else 'timedelta64[ns]'
+        return a.astype(unit).view(np.int64) != b.astype(unit).view(np.int64)
+
+    a = a.astype(object)
+    b = b.astype(object)
+    different = ~np.asarray(a == b, dtype=bool)
+    if not different.any():
+        return different
+
+    # nulls don't equal each other and numbers may be close enough, so
+    # take a closer look at the (hopefully few) positions left
+    different &= ~(isnull(a) & isnull(b))
+    for i in np.flatnonzero(different):
+        if _scalars_almost_equal(a[i], b[i], check_less_precise):
+            different[i] = False
+
+    return different
+
+def assert_arrays_almost_equal(a, b, check_less_precise=False, 
+                               chunksize=CHUNKSIZE, 
+                               max_mismatches=MAX_MISMATCHES):
+    """
+    Asserts two arrays have the same length and (almost) equal values,
+    comparing `chunksize` elements at a time. The error lists the first
+    `max_mismatches` differing positions.
+    """
+
+    a = np.asarray(a)
+    b = np.asarray(b)
+    na, nb = len(a), len(b)
+    assert na == nb, "%s != %s" % (na, nb)
+
+    if a.ndim > 1 or b.ndim > 1:
+        assert a.shape == b.shape, "%s != %s" % (a.shape, b.shape)
+        a, b = a.ravel(), b.ravel()
+
+    count = 0
+    examples = []
+    for start in range(0, len(a), chunksize):
+        stop = start + chunksize
+        positions = np.flatnonzero(_mismatches(a[start:stop], b[start:stop],
+                                               check_less_precise))
+        count += len(positions)
+        for i in positions[:max_mismatches - len(examples)]:
+            examples.append('[%d]: %r != %r' % (start + i, a[start + i],
+                                                b[start + i]))
+
+    if count:
+        raise AssertionError('Arrays differ at %d of %d positions, first %d:\n%s'
+                             % (count, len(a), len(examples), 
+                                '\n'.join(examples)))
+
 def assert_almost_equal(a, b, check_less_precise = False):
     if isinstance(a, dict) or isinstance(b, dict):
         return assert_dict_equal(a, b)
@@ -28,14 +147,7 @@ def assert_almost_equal(a, b, check_less_precise = False):
 
     if isiterable(a):
         np.testing.assert_(isiterable(b))
-        na, nb = len(a), len(b)
-        assert na == nb, "%s != %s" % (na, nb)
-
-        if np.array_equal(a, b):
-            return True
-        else:
-            for i in range(na):
-                assert_almost_equal(a[i], b[i], check_less_precise)
+        assert_arrays_almost_equal(a, b, check_less_precise)
         return True
 
     err_msg = lambda a, b: 'expected %.5f but got %.5f' % (b, a)
@@ -82,10 +194,12 @@ def assert_series_equal(left, right, check_dtype=True,
                         check_index_type=False,
                         check_index_freq=False,
                         check_series_type=False,
-                        check_less_precise=False):
+                        check_less_precise=False,
+                        chunksize=CHUNKSIZE):
     if check_series_type:
         assert(type(left) == type(right))
-    assert_almost_equal(left.values, right.values, check_less_precise)
+    assert_arrays_almost_equal(left.values, right.values, check_less_precise,
+                               chunksize)
     if check_dtype:
         assert(left.dtype == right.dtype)
     if check_less_precise:
@@ -106,7 +220,8 @@ def assert_frame_equal(left, right, check_dtype=True,
                        check_column_type=False,
                        check_frame_type=False,
                        check_less_precise=False,
-                       check_names=True):
+                       check_names=True,
+                       chunksize=CHUNKSIZE):
     if check_frame_type:
         assert(type(left) == type(right))
     assert(isinstance(left, DataFrame))
@@ -121,12 +236,16 @@ def assert_frame_equal(left, right, check_dtype=True,
 
     for i, col in enumerate(left.columns):
         assert(col in right)
-        lcol = left.icol(i)
-        rcol = right.icol(i)
-        assert_series_equal(lcol, rcol,
-                            check_dtype=check_dtype,
-                            check_index_type=check_index_type,
-                            check_less_precise=check_less_precise)
+        lcol = left.iloc[:, i]
+        rcol = right.iloc[:, i]
+        try:
+            assert_series_equal(lcol, rcol,
+                                check_dtype=check_dtype,
+                                check_index_type=check_index_type,
+                                check_less_precise=check_less_precise,
+                                chunksize=chunksize)
+        except AssertionError as e:
+            raise AssertionError('Column %r: %s' % (col, e))
 
     if check_index_type:
         assert(type(left.index) == type(right.index))
@@ -6,12 +6,22 @@
     Miscellaneous functions for dealing with type-checking.
 """
 
+import contextvars
+import os
+import time
+import weakref
 from datetime import datetime, date
+from functools import partial
 from math import pi, sin, cos, atan2, sqrt, floor, ceil
 
-import pandas as pd
+from ._lazy import LazyModule
+from .instrument import instrumented
+from .sharedmem import share_frame, attach_frame, chunk_descriptor
 
-from dateutil.parser import parse
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+concurrent_futures = LazyModule('concurrent.futures')
+dateutil_parser = LazyModule('dateutil.parser')
 
 
 def is_null(*args):
@@ -29,20 +39,179 @@ def is_null(*args):
     # if everything is null then return the last argument
     return args[-1]
 
+@instrumented
+def coalesce(*args, frame=None):
+    """
+    Column-wise version of :func:`is_null`. Returns a Series with the first 
+    non-null value across `args` for every row, like T-SQL COALESCE() over 
+    columns.
+
+    :param args: Series to coalesce, in order of preference. The first 
+                 argument must be a Series (or, with `frame`, a column name) 
+                 since the result takes its index, name and dtype. The others
+                 can also be arrays aligned with it, and the last a scalar 
+                 default.
+    :param frame: If given, any argument that is a column of `frame` is 
+                  looked up by name.
+
+    >>> coalesce('phone', 'mobile', 'unknown', frame=customers)
+
+    .. note::
+        Each argument only fills the rows that are still null, and the 
+        remaining arguments are skipped entirely once no nulls are left, so
+        the dtype of the first Series is kept whenever it has no nulls.
+    """
+
+    if frame is not None:
+        args = [frame[arg] if _is_column(frame, arg) else arg for arg in args]
+
+    result = args[0]
+    if not isinstance(result, pd.Series):
+        raise ValueError("First argument to coalesce must be a Series")
+
+    if not isinstance(result.dtype, np.dtype):
+        return _coalesce_extension(result, args[1:])
+
+    values = result.values
+    copied = False
+    remaining = np.flatnonzero(pd.isnull(values))
+
+    for arg in args[1:]:
+        if not len(remaining):
+            break
+
+        if isinstance(arg, pd.Series) and not arg.index.equals(result.index):
+            arg = arg.reindex(result.index)
+        other = np.asarray(arg)
+
+        if other.ndim:
+            candidates = other[remaining]
+        else:
+            candidates = np.repeat(other, len(remaining))
+
+        found = ~pd.isnull(candidates)
+        if not found.any():
+            continue
+
+        dtype = _common_dtype(values.dtype, candidates.dtype)
+        # copy on first write so the input is never modified
+        if not copied or values.dtype != dtype:
+            values = values.astype(dtype)
+            copied = True
+
+        values[remaining[found]] = candidates[found]
+        remaining = remaining[~found]
+
+    if not copied:
+        return result
+
+    return pd.Series(values, index=result.index, name=result.name)
+
+def _coalesce_extension(result, others):
+    """
+    :func:`coalesce` for a first Series with a pandas extension dtype (e.g.
+    Int64), which numpy can't find a common dtype with. Filling with 
+    `Series.where` keeps the extension dtype whenever the values fit it.
+    """
+
+    for arg in others:
+        missing = result.isnull()
+        if not missing.any():
+            break
+
+        if isinstance(arg, pd.Series):
+            if not arg.index.equals(result.index):
+                arg = arg.reindex(result.index)
+        elif np.ndim(arg):
+            arg = pd.Series(np.asarray(arg), index=result.index)
+
+        result = result.where(~missing, arg)
+
+    return result
+
+def _is_column(frame, key):
+    try:
+        return key in frame.columns
+    except TypeError:
+        # unhashable e.g. a Series
+        return False
+
+def _common_dtype(left, right):
+    """Smallest dtype that can hold values of both `left` and `right`."""
+
+    if left == right:
+        return left
+
+    # extension dtypes (Int64, string, ...) are no numpy dtypes
+    if not (isinstance(left, np.dtype) and isinstance(right, np.dtype)):
+        return np.dtype(object)
+
+    if left.kind in 'biuf' and right.kind in 'biuf':
+        return np.result_type(left, right)
+
+    return np.dtype(object)
+
 def is_numeric(n):
     """
-    Tests if an object is interpretable as a number.
+    Tests if an object is interpretable as a number. Series and arrays are 
+    tested element-wise and return a boolean mask.
 
     >>> is_numeric('1')
     True
+    >>> is_numeric(pd.Series(['1', 'a', 2.5, None]))
+    0     True
+    1    False
+    2     True
+    3    False
+    dtype: bool
     """
 
+    if isinstance(n, pd.Series):
+        return pd.Series(_is_numeric_array(np.asarray(n.values)), index=n.index, 
+                         name=n.name)
+
+    if isinstance(n, np.ndarray):
+        return _is_numeric_array(n)
+
     try:
         float(n)
         return True
     except (ValueError, TypeError):
         return False
 
+# element-wise is_numeric as a numpy ufunc. Made once, on first use, so
+# importing grigri.tools doesn't import numpy
+_is_numeric_ufunc = None
+
+def _numeric_ufunc():
+    global _is_numeric_ufunc
+    if _is_numeric_ufunc is None:
+        _is_numeric_ufunc = np.frompyfunc(is_numeric, 1, 1)
+    return _is_numeric_ufunc
+
+def _is_numeric_array(values):
+    kind = values.dtype.kind
+
+    # numeric dtypes are trivially numeric; complex, datetime and timedelta
+    # values can't be passed to float() so never are
+    if kind in 'biuf':
+        return np.ones(len(values), dtype=bool)
+    if kind in 'cmM':
+        return np.zeros(len(values), dtype=bool)
+
+    # fast path: numpy converts the whole array with float() in C and only 
+    # fails if at least one element isn't numeric
+    try:
+        values.astype(float)
+    except (ValueError, TypeError):
+        return _numeric_ufunc()(values).astype(bool)
+
+    # numpy turns None into NaN but float(None) is an error
+    if kind == 'O':
+        return np.asarray(pd.notnull(values), dtype=bool)
+
+    return np.ones(len(values), dtype=bool)
+
 def is_date(dt, strict=True):
     """
     Tests if an object is interpretable as a datetime object.
@@ -58,7 +227,7 @@ def is_date(dt, strict=True):
     if not strict:
         try:
             if dt not in (' ', '-', ''):
-                parse(dt)
+                dateutil_parser.parse(dt)
                 return True
         except (AttributeError, ValueError):
             pass
@@ -103,6 +272,52 @@ def percent_change(before, after):
     except ZeroDivisionError:
         return float('nan')
 
+# Case-folded column lookups, keyed by the id() of a frame's column Index.
+# Index objects aren't hashable so a WeakKeyDictionary won't work; instead 
+# each entry holds a weakref to its Index that evicts the entry once the 
+# Index (and usually the frame with it) is garbage collected. Indexes are 
+# immutable, so renaming or adding columns swaps in a new Index and a new 
+# entry rather than invalidating this one.
+_column_lookups = {}
+
+def _fold(column):
+    return column.lower() if isinstance(column, str) else column
+
+def _evict_column_lookup(key, ref):
+    entry = _column_lookups.get(key)
+    if entry is not None and entry[0] is ref:
+        del _column_lookups[key]
+
+def column_lookup(frame):
+    """
+    Returns a dictionary mapping lowercased column names to the list of 
+    matching column names in `frame`, in column order. The mapping is built 
+    once per set of columns and cached until the columns are garbage 
+    collected.
+
+    :param frame: DataFrame (or a column Index) to build the lookup for.
+    """
+
+    columns = getattr(frame, 'columns', frame)
+    key = id(columns)
+
+    entry = _column_lookups.get(key)
+    if entry is not None and entry[0]() is columns:
+        return entry[1]
+
+    lookup = {}
+    for col in columns:
+        lookup.setdefault(_fold(col), []).append(col)
+
+    try:
+        ref = weakref.ref(columns, partial(_evict_column_lookup, key))
+    except TypeError:
+        # plain lists etc. can't be weakly referenced, so don't cache
+        return lookup
+
+    _column_lookups[key] = (ref, lookup)
+    return lookup
+
 def find_column_name(frame, column_name):
     """
     Searches for the desired column in a DataFrame and returns its name.
@@ -112,13 +327,21 @@ def find_column_name(frame, column_name):
     an issue.
     """
 
-    column_match = column_name.lower()
+    try:
+        return column_lookup(frame)[_fold(column_name)][0]
+    except KeyError:
+        raise KeyError("Cannot find column in DataFrame: %s" % column_name)
+
+def find_column_names(frame, column_names):
+    """
+    Bulk version of :func:`find_column_name`. Returns the actual name of 
+    every column in `column_names`, in the same order.
 
-    for col in frame.columns:
-        if col.lower() == column_match:
-            return col
+    :param frame: DataFrame to search.
+    :param column_names: List of case-insensitive column names.
+    """
 
-    raise KeyError("Cannot find column in DataFrame: %s" % column_name)
+    return [find_column_name(frame, name) for name in column_names]
 
 def split_sequence(data, n):
     """
@@ -149,3 +372,125 @@ def ditto(frames, meth, *args, **kwargs):
     """
 
     return [getattr(frame, meth)(*args, **kwargs) for frame in frames]
+
+_pool_backends = {
+    'threads': 'ThreadPoolExecutor',
+    'processes': 'ProcessPoolExecutor',
+}
+
+def _timed_call(func, chunk):
+    """Calls `func` on `chunk` and returns the result with elapsed seconds."""
+
+    start = time.perf_counter()
+    result = func(chunk)
+
+    return result, time.perf_counter() - start
+
+def _timed_shared_call(func, descriptor):
+    """Rebuilds a chunk from shared memory and times `func` on it."""
+
+    return _timed_call(func, attach_frame(descriptor))
+
+def _in_context(backend):
+    """
+    Returns a function running its arguments in a copy of the caller's 
+    context on a thread, so instrumentation sinks enabled by the caller see
+    the worker's calls too. Process workers can't share it.
+    """
+
+    if backend == 'threads':
+        return contextvars.copy_context().run
+    return _call
+
+def _call(func, *args):
+    return func(*args)
+
+@instrumented
+def parallel_apply(data, func, workers=None, backend='threads', chunks=None,
+                   return_timings=False, shared=False):
+    """
+    Applies a function to chunks of a Series or DataFrame (or any list-like 
+    object) on a worker pool and stitches the results back together in their
+    original order.
+
+    :param data: List-like data-structure (list, DataFrame, Series,...) to 
+                 be split with :func:`split_sequence`.
+    :param func: Function that takes one chunk of `data` and returns a 
+                 DataFrame, Series or list. Must be picklable (i.e. defined at
+                 module level) when using the `processes` backend.
+    :param workers: Number of pool workers. Defaults to the number of CPUs.
+    :param backend: Either 'threads' or 'processes'. Threads are cheap and 
+                    work well when `func` spends its time inside numpy/pandas
+                    or waiting on IO; processes sidestep the GIL for pure 
+                    Python row-wise transforms at the cost of pickling each 
+                    chunk.
+    :param chunks: Number of chunks to split `data` into. Defaults to 
+                   `workers`.
+    :param return_timings: If `True` also return a list with the number of 
+                           seconds spent on each chunk, in chunk order.
+    :param shared: If `True` and using the `processes` backend, place a 
+                   DataFrame or Series in shared memory once (see 
+                   :mod:`grigri.sharedmem`) and only send each worker the 
+                   row range of its chunk instead of pickling the chunk.
+
+    >>> parallel_apply(frame, lambda chunk: chunk.apply(parse_row, axis=1),
+    ...                workers=4)
+    """
+
+    try:
+        pool_class = getattr(concurrent_futures, _pool_backends[backend])
+    except KeyError:
+        raise ValueError("Backend not recognized: {}".format(backend))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if chunks is None:
+        chunks = workers
+
+    # split_sequence can't make chunks out of nothing, so just run the
+    # function once on the empty input
+    if len(data) == 0:
+        result, elapsed = _timed_call(func, data)
+        return (result, [elapsed]) if return_timings else result
+
+    use_shared = (shared and backend == 'processes' and 
+                  isinstance(data, (pd.Series, pd.DataFrame)))
+
+    with pool_class(max_workers=workers) as pool:
+        if use_shared:
+            with share_frame(data) as shared_data:
+                # chunk the row positions rather than the data itself
+                futures = [pool.submit(_timed_shared_call, func, 
+                                       chunk_descriptor(shared_data.descriptor,
+                                                        rows.start, rows.stop))
+                           for rows in split_sequence(range(len(data)), chunks)]
+                outputs = [future.result() for future in futures]
+        else:
+            futures = [pool.submit(_in_context(backend), _timed_call, func, 
+                                   piece) 
+                       for piece in split_sequence(data, chunks)]
+            # collecting in submission order keeps the output in the same 
+            # order as the input no matter which chunk finishes first
+            outputs = [future.result() for future in futures]
+
+    results = [result for result, _ in outputs]
+    timings = [elapsed for _, elapsed in outputs]
+
+    result = _concat_chunks(results)
+
+    if return_timings:
+        return result, timings
+
+    return result
+
+def _concat_chunks(results):
+    """Glues per-chunk results back together into a single object."""
+
+    if all(isinstance(r, (pd.Series, pd.DataFrame)) for r in results):
+        return pd.concat(results)
+
+    if all(isinstance(r, list) for r in results):
+        return [item for r in results for item in r]
+
+    return results
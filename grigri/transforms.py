@@ -6,8 +6,19 @@
     Functions that transform Series and DataFrames.
 """
 
-import pandas as pd
+from collections import namedtuple
 
+from ._lazy import LazyModule
+from .instrument import instrumented
+from .io.sql import _fetch, _build_frame, coerce_dtypes
+from .sketch import DEFAULT_PRECISION
+from .tools import column_lookup, _fold
+from .tseries import (group_resample, resample_reindex, _resample, 
+                      _resample_reindex)
+
+pd = LazyModule('pandas')
+
+@instrumented
 def squeeze(frame):
     """
     Attempts to reduce a DataFrame into a Series. Will raise ValueError if 
@@ -23,21 +34,23 @@ def squeeze(frame):
 
     # single column DataFrame -> select out only column to return a series
     if num_columns == 1:
-        return frame.ix[:,0]
+        return frame.iloc[:, 0]
 
     if num_columns == 2:
         # detect any datetime columns
         for col in frame.columns:
-            if frame[col].dtype == 'datetime64[ns]':
+            # any unit or time zone
+            if frame[col].dtype.kind == 'M':
                 datetime_column = col
                 break
         else:
             raise ValueError
 
-        return frame.set_index(datetime_column).ix[:0]
+        return frame.set_index(datetime_column).iloc[:, 0]
 
     raise ValueError
 
+@instrumented
 def remove_columns(frame, columns):
     """
     Returns a new DataFrame removing specified columns.
@@ -50,10 +63,241 @@ def remove_columns(frame, columns):
     if not isinstance(columns, list):
         columns = [columns,]
 
-    # case insensitive list of columns
-    cols_to_remove = [c.lower() for c in columns]
+    # case insensitive lookup of every column matching each name
+    lookup = column_lookup(frame)
+    cols_to_remove = [col for name in columns 
+                      for col in lookup.get(_fold(name), [])]
+
+    return frame.drop(cols_to_remove, axis=1)
+
+
+Step = namedtuple('Step', ['name', 'kwargs'])
+
+
+class Pipeline(object):
+    """
+    Lazily records a chain of grigri transformations and only runs them when
+    :meth:`execute` is called. Before running, the chain is rewritten so less
+    data gets materialized along the way:
+
+    * :meth:`remove_columns` is pushed ahead of :meth:`coerce_dtypes` and, 
+      when reading from SQL, into building the frame itself so the removed 
+      columns are never materialized or coerced at all.
+    * Consecutive :meth:`remove_columns` calls are merged into one.
+    * A :meth:`resample` directly followed by :meth:`reindex` is fused into a 
+      single :func:`grigri.tseries.resample_reindex`.
+
+    Every method returns a new pipeline, so partial pipelines can be reused.
+
+    >>> plan = (Pipeline.from_sql('SELECT * FROM jobs', conn)
+    ...         .remove_columns(['Notes', 'Description'])
+    ...         .squeeze()
+    ...         .resample('d', how='sum')
+    ...         .reindex(month_range(), fill_value=0))
+    >>> print(plan.explain())
+    1. read_frame(sql='SELECT * FROM jobs', exclude=['Notes', 'Description'])
+    2. squeeze()
+    3. resample_reindex(new_index=<DatetimeIndex: 31>, freq='d', how='sum', fill_value=0)
+    >>> result = plan.execute()
+    """
+
+    def __init__(self, data=None, steps=None):
+        if steps is None:
+            steps = [Step('frame', {'frame': data})]
+        self.steps = list(steps)
+
+    @classmethod
+    def from_sql(cls, sql, conn, params=None, coerce_default=True,
+                 coerce_ascii=False):
+        """
+        Starts a pipeline from the result set of a SQL statement. Takes the
+        same arguments as :func:`grigri.io.sql.read_frame`.
+        """
+
+        step = Step('read_frame', {
+            'sql': sql, 
+            'conn': conn, 
+            'params': params,
+            'coerce_default': coerce_default,
+            'coerce_ascii': coerce_ascii,
+            'exclude': [],
+        })
+
+        return cls(steps=[step])
+
+    def _then(self, name, **kwargs):
+        return Pipeline(steps=self.steps + [Step(name, kwargs)])
+
+    def coerce_dtypes(self, columns):
+        """See :func:`grigri.io.sql.coerce_dtypes`."""
+        return self._then('coerce_dtypes', columns=dict(columns))
+
+    def remove_columns(self, columns):
+        """See :func:`remove_columns`."""
+        if not isinstance(columns, list):
+            columns = [columns,]
+        return self._then('remove_columns', columns=list(columns))
+
+    def squeeze(self):
+        """See :func:`squeeze`."""
+        return self._then('squeeze')
+
+    def group_resample(self, date_column, groupby=None, level=None, 
+                       value_column=None, freq='d', how='mean', 
+                       approximate=False, precision=DEFAULT_PRECISION):
+        """See :func:`grigri.tseries.group_resample`."""
+        return self._then('group_resample', date_column=date_column, 
+                          groupby=groupby, level=level, 
+                          value_column=value_column, freq=freq, how=how,
+                          approximate=approximate, precision=precision)
+
+    def resample(self, freq='d', how='mean'):
+        """Resamples a time-series, like :func:`DataFrame.resample`."""
+        return self._then('resample', freq=freq, how=how)
+
+    def reindex(self, new_index, fill_value=None):
+        """Conforms the result to `new_index`, filling holes with `fill_value`."""
+        return self._then('reindex', new_index=new_index, 
+                          fill_value=fill_value)
+
+    def resample_reindex(self, new_index, freq='d', how='mean', 
+                         fill_value=None):
+        """See :func:`grigri.tseries.resample_reindex`."""
+        return self._then('resample_reindex', new_index=new_index, freq=freq,
+                          how=how, fill_value=fill_value)
+
+    def optimize(self):
+        """Returns the optimized list of steps that :meth:`execute` will run."""
+        return _optimize(self.steps)
+
+    def explain(self):
+        """Returns a printable description of the optimized plan."""
+
+        lines = []
+        for i, step in enumerate(self.optimize(), 1):
+            args = ', '.join('%s=%s' % (key, _describe(value)) 
+                             for key, value in step.kwargs.items()
+                             if key not in _hidden_arguments)
+            lines.append('%d. %s(%s)' % (i, step.name, args))
+
+        return '\n'.join(lines)
+
+    def execute(self):
+        """Runs the optimized plan and returns the result."""
+
+        data = None
+        for step in self.optimize():
+            data = _executors[step.name](data, **step.kwargs)
+
+        return data
+
+    def __repr__(self):
+        return '<Pipeline: %d steps>' % len(self.steps)
+
+
+# arguments not worth printing in `Pipeline.explain`
+_hidden_arguments = ('conn', 'coerce_default', 'coerce_ascii', 'params')
+
+def _describe(value):
+    if isinstance(value, (pd.Index, pd.Series, pd.DataFrame)):
+        return '<%s: %d>' % (type(value).__name__, len(value))
+    return repr(value)
+
+def _merge_removals(first, second):
+    columns = first.kwargs['columns'] + second.kwargs['columns']
+    return [Step('remove_columns', {'columns': columns})]
+
+def _push_removal_before_coercion(coerce, remove):
+    # no point coercing columns that are about to be thrown away
+    removed = set(_fold(col) for col in remove.kwargs['columns'])
+    columns = {col: dtype for col, dtype in coerce.kwargs['columns'].items()
+               if _fold(col) not in removed}
+
+    return [remove, Step('coerce_dtypes', {'columns': columns})]
+
+def _push_removal_into_sql(source, remove):
+    kwargs = dict(source.kwargs)
+    kwargs['exclude'] = kwargs['exclude'] + remove.kwargs['columns']
+
+    return [Step('read_frame', kwargs)]
+
+def _fuse_resample_reindex(resample, reindex):
+    kwargs = {
+        'new_index': reindex.kwargs['new_index'],
+        'freq': resample.kwargs['freq'],
+        'how': resample.kwargs['how'],
+        'fill_value': reindex.kwargs['fill_value'],
+        # the reindex only fills the labels it adds, not the empty periods
+        # of the resample
+        'fill': 'added',
+    }
+
+    return [Step('resample_reindex', kwargs)]
+
+# rewrite rules for adjacent pairs of steps
+_rules = {
+    ('remove_columns', 'remove_columns'): _merge_removals,
+    ('coerce_dtypes', 'remove_columns'): _push_removal_before_coercion,
+    ('read_frame', 'remove_columns'): _push_removal_into_sql,
+    ('resample', 'reindex'): _fuse_resample_reindex,
+}
+
+def _optimize(steps):
+    """Applies rewrite rules to adjacent steps until none match anymore."""
+
+    steps = list(steps)
+
+    changed = True
+    while changed:
+        changed = False
+        for i in range(len(steps) - 1):
+            rule = _rules.get((steps[i].name, steps[i + 1].name))
+            if rule is not None:
+                steps[i:i + 2] = rule(steps[i], steps[i + 1])
+                changed = True
+                break
+
+    # pushing removals down can leave nothing left to coerce
+    return [step for step in steps 
+            if not (step.name == 'coerce_dtypes' and not step.kwargs['columns'])]
+
+def _run_read_frame(data, sql, conn, params, coerce_default, coerce_ascii,
+                    exclude):
+    rows, description = _fetch(sql, conn, params)
+    return _build_frame(rows, description, exclude=exclude, 
+                        coerce_default=coerce_default, 
+                        coerce_ascii=coerce_ascii)
+
+def _run_resample(data, freq, how):
+    return _resample(data, freq, how)
+
+def _run_reindex(data, new_index, fill_value):
+    # like pandas, only the added labels are filled, NaNs already in the
+    # data are kept
+    if fill_value is None:
+        return data.reindex(new_index)
+    return data.reindex(new_index, fill_value=fill_value)
+
+def _run_resample_reindex(data, new_index, freq, how, fill_value, 
+                          fill='all'):
+    if fill == 'all':
+        return resample_reindex(data, new_index, freq=freq, how=how,
+                                fill_value=fill_value)
 
-    remaining_cols = [col for col in data_frame.columns 
-                      if col.lower() not in cols_to_remove]
+    data, added = _resample_reindex(data, new_index, freq, how)
+    if fill_value is not None and added.any():
+        data = data.copy()
+        data.iloc[added] = fill_value
+    return data
 
-    return data_frame[remaining_cols]
+_executors = {
+    'frame': lambda data, frame: frame,
+    'read_frame': _run_read_frame,
+    'coerce_dtypes': lambda data, columns: coerce_dtypes(data, columns),
+    'remove_columns': lambda data, columns: remove_columns(data, columns),
+    'squeeze': lambda data: squeeze(data),
+    'group_resample': lambda data, **kwargs: group_resample(data, **kwargs),
+    'resample': _run_resample,
+    'reindex': _run_reindex,
+    'resample_reindex': _run_resample_reindex,
+}
@@ -7,16 +7,73 @@
     time-series DataFrames and Series.
 """
 
-from datetime import datetime
-
-import numpy as np
-import pandas as pd
+import re
+from datetime import datetime, timedelta
 
+from ._lazy import LazyModule
+from .dates.ordinal import period_ordinals, ordinal_dates
 from .dates.scalar import strip_time
+from .instrument import instrumented
+from .sharedmem import share_frame, attach_frame, chunk_descriptor
+from .sketch import (hash_values, sketch_cells, estimate_registers,
+                     DEFAULT_PRECISION)
+
+np = LazyModule('numpy')
+pd = LazyModule('pandas')
+concurrent_futures = LazyModule('concurrent.futures')
+
+
+# offset aliases newer pandas versions renamed
+_renamed_aliases = {'m': 'ME', 'q': 'QE', 'y': 'YE', 'a': 'YE', 't': 'min'}
+
+def _offset_alias(freq):
+    """
+    Returns `freq`, or its new name if this pandas doesn't know it anymore 
+    (e.g. 'm' became 'ME').
+    """
+
+    try:
+        pd.tseries.frequencies.to_offset(freq)
+        return freq
+    except ValueError:
+        pass
 
+    match = re.match(r'^(\d*)([a-zA-Z]+)$', freq)
+    if match is None or match.group(2).lower() not in _renamed_aliases:
+        return freq
+    return match.group(1) + _renamed_aliases[match.group(2).lower()]
 
+def _resample(data, freq, how='mean'):
+    """
+    ``data.resample(freq, how=how)`` on pandas versions that still take 
+    `how`, the equivalent method call on the ones that don't. Empty periods
+    sum to NaN on both, as they always did with `how`.
+    """
+
+    try:
+        return data.resample(freq, how=how)
+    except TypeError:
+        resampler = data.resample(_offset_alias(freq))
+        if callable(how):
+            return resampler.apply(how)
+        if how == 'sum':
+            return resampler.sum(min_count=1)
+        return getattr(resampler, how)()
+
+def _resample_chunk(chunk, date_column, value_column, freq, how):
+    """Resamples a single group for :func:`group_resample`."""
+
+    if not isinstance(chunk, pd.Series):
+        chunk = chunk.set_index(date_column, drop=False)[value_column]
+    return _resample(chunk, freq, how)
+
+def _resample_shared_chunk(descriptor, *args):
+    return _resample_chunk(attach_frame(descriptor), *args)
+
+@instrumented
 def group_resample(frame, date_column, groupby=None, level=None, 
-                   value_column=None, freq='d', how='mean'):
+                   value_column=None, freq='d', how='mean', workers=None,
+                   approximate=False, precision=DEFAULT_PRECISION):
     """
     Applies :func:`resample` to every group in a groupby object.
 
@@ -32,6 +89,22 @@ def group_resample(frame, date_column, groupby=None, level=None,
                          just count each timestamp.
     :param freq: Frequency to downsample or upsample time-series by.
     :param how: Name of or aggregation function to use when resampling.
+    :param workers: If set, resample the groups on a pool of this many 
+                    processes. The frame is handed to the workers through 
+                    shared memory (see :mod:`grigri.sharedmem`), so `how` must
+                    be picklable e.g. a string or module-level function.
+    :param approximate: With ``how='nunique'``, estimate the distinct counts
+                        with HyperLogLog sketches (see :class:`Rollup`) 
+                        instead of counting them exactly. Memory is bounded
+                        by the number of (group, day) cells rather than the
+                        number of distinct values.
+    :param precision: Precision of the sketches when `approximate`. The 
+                      relative error is about ``1.04 / sqrt(2 ** precision)``
+                      (1.6% for the default of 12).
+
+    ``how='nunique'`` counts the distinct values of `value_column` in every
+    period. It needs `groupby` to be a column name or a list of column 
+    names.
 
     .. note ::
         This function *always* returns a Series -- possibly with a `MultiIndex`. 
@@ -42,20 +115,31 @@ def group_resample(frame, date_column, groupby=None, level=None,
 
     is_series = isinstance(frame, pd.Series)
 
+    if how == 'nunique':
+        if is_series or level is not None or value_column is None:
+            raise ValueError("how='nunique' needs a value_column and groupby "
+                             "columns")
+        return _group_nunique(frame, date_column, groupby, value_column, freq,
+                              approximate, precision)
+
     # if no value column is supplied to aggregate, make sure resampling
     # just counts the number of timestamps
     if value_column is None and not is_series:
         value_column = date_column
         how = 'count'
 
-    grouped = frame.groupby(by=groupby, level=level, squeeze=True)
+    if workers is not None and len(frame):
+        return _parallel_group_resample(frame, date_column, groupby, level,
+                                        value_column, freq, how, workers)
 
-    def f(chunk):
-        if not is_series:
-            chunk = chunk.set_index(date_column, drop=False)[value_column]
-        return chunk.resample(freq, how=how)
+    try:
+        grouped = frame.groupby(by=groupby, level=level, squeeze=True)
+    except TypeError:
+        # pandas 2 dropped squeeze, the stack below does its job
+        grouped = frame.groupby(by=groupby, level=level)
 
-    result = grouped.apply(f)
+    result = grouped.apply(_resample_chunk, date_column, value_column, freq, 
+                           how)
 
     # Sometimes squeeze doesn't reduce the result from DataFrame
     # to Series. Stack manually.
@@ -66,6 +150,88 @@ def group_resample(frame, date_column, groupby=None, level=None,
 
     return result
 
+def _group_nunique(frame, date_column, groupby, value_column, freq, 
+                   approximate, precision):
+    """Distinct values per group and period for :func:`group_resample`."""
+
+    if groupby is not None and not isinstance(groupby, list):
+        groupby = [groupby]
+
+    if approximate:
+        rollup = Rollup(frame, date_column, groupby=groupby or None, 
+                        distinct_column=value_column, precision=precision)
+        return rollup.resample(freq, how='nunique')
+
+    timestamps = np.asarray(frame[date_column], dtype='datetime64[ns]')
+    keep = ~pd.isnull(timestamps)
+    if groupby:
+        codes, first = _group_codes([frame[col].values for col in groupby])
+        groups = frame[groupby].iloc[first].reset_index(drop=True)
+        keep &= codes >= 0
+    else:
+        codes = np.zeros(len(frame), dtype=np.int64)
+        groups = None
+
+    # rows with a null value still count towards their group's span
+    value_codes, _ = pd.factorize(np.asarray(frame[value_column]))
+    timestamps, codes, value_codes = (timestamps[keep], codes[keep], 
+                                      value_codes[keep])
+
+    periods = period_ordinals(timestamps, freq)
+    period_min = periods.min() if len(periods) else 0
+    span = periods.max() - period_min + 1 if len(periods) else 1
+    cells, inverse = np.unique(codes * span + periods - period_min, 
+                               return_inverse=True)
+    inverse = inverse.ravel()
+
+    # sort the (cell, value) pairs and count the ones that differ from the
+    # pair before them
+    present = value_codes >= 0
+    pair_cells, pair_values = inverse[present], value_codes[present]
+    order = np.lexsort((pair_values, pair_cells))
+    pair_cells, pair_values = pair_cells[order], pair_values[order]
+    new = np.ones(len(order), dtype=bool)
+    new[1:] = ((pair_cells[1:] != pair_cells[:-1]) 
+               | (pair_values[1:] != pair_values[:-1]))
+    counts = np.bincount(pair_cells[new], minlength=len(cells)).astype(float)
+
+    return _dense_group_series(cells // span, cells % span + period_min, counts,
+                               groups, groupby or [], freq, 'end', 0.,
+                               date_column, value_column)
+
+def _parallel_group_resample(frame, date_column, groupby, level, value_column,
+                             freq, how, workers):
+    """
+    Process pool version of :func:`group_resample`. Rows are reordered so 
+    every group is one contiguous block, which lets each worker pull its 
+    group out of the shared frame with a plain slice.
+    """
+
+    grouped = frame.groupby(by=groupby, level=level)
+    keys = sorted(grouped.indices)
+
+    boundaries = np.cumsum([0] + [len(grouped.indices[k]) for k in keys])
+    positions = np.concatenate([grouped.indices[k] for k in keys])
+
+    if groupby is not None and not isinstance(groupby, (list, tuple)):
+        group_name = getattr(groupby, 'name', groupby)
+    elif level is not None and not isinstance(level, (list, tuple)):
+        group_name = frame.index.names[level] if isinstance(level, int) else level
+    else:
+        group_name = None
+
+    with share_frame(frame.take(positions)) as shared:
+        with concurrent_futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_resample_shared_chunk, 
+                                   chunk_descriptor(shared.descriptor, start,
+                                                    stop),
+                                   date_column, value_column, freq, how)
+                       for start, stop in zip(boundaries[:-1], boundaries[1:])]
+            results = [future.result() for future in futures]
+
+    return pd.concat(results, keys=keys, names=[group_name])
+
+@instrumented
 def split_tseries(frame, split_date=None):
     """
     Splits a time-series DataFrame(or Series) into one DataFrame before the 
@@ -102,21 +268,116 @@ def split_tseries(frame, split_date=None):
 
     if split_date is None:
         split_date = datetime.now()
-    
-    split_date = strip_time(split_date)
-    
-    # datetimeindex has to be sorted before slicing
-    split_frame = frame.sort_index()
-    
-    return split_frame[:split_date], split_frame[split_date:]
 
-def count_timestamps(series, freq='d'):
-    assert series.dtype == 'datetime64[ns]', "Series must have datetime64 datatype"
+    past, future = partition_tseries(frame, [split_date])
+
+    return past, future
+
+@instrumented
+def partition_tseries(frame, split_dates):
+    """
+    Splits a time-series DataFrame (or Series) at several dates at once and 
+    returns a list of ``len(split_dates) + 1`` consecutive pieces. Like 
+    :func:`split_tseries`, rows on the same day as a split date go into the 
+    piece *before* it.
+
+    :param frame: Target DataFrame or Series to split. Must have a 
+                  :class:`DatetimeIndex` as its index.
+    :param split_dates: List of dates (or a :class:`DatetimeIndex`) to split 
+                        on. Doesn't need to be sorted.
+
+    >>> jan, feb, rest = partition_tseries(data, [datetime(2013,1,31), 
+    ...                                           datetime(2013,2,28)])
 
-    tseries = pd.Series(1, index=series)
+    .. note::
+        The index is only sorted if it isn't sorted already, and each cut 
+        point is found with a binary search, so carving a large frame into 
+        many periods is a single pass. The pieces are positional slices of 
+        the (sorted) frame, not copies.
+    """
+
+    if not _is_sorted(frame.index):
+        frame = frame.sort_index()
+
+    # every row before midnight of the following day belongs to the 
+    # earlier piece
+    boundaries = sorted(strip_time(dt) + timedelta(days=1) 
+                        for dt in split_dates)
+    boundaries = np.array(boundaries, dtype='datetime64[ns]')
+
+    positions = np.searchsorted(frame.index.values, boundaries, side='left')
+    edges = [0] + positions.tolist() + [len(frame)]
+
+    return [frame.iloc[start:stop] for start, stop in zip(edges[:-1], edges[1:])]
+
+def _is_sorted(index):
+    """Checks if an index is in ascending order, using pandas' cached flag."""
 
-    return tseries.resample(freq, how='sum')
+    try:
+        return index.is_monotonic_increasing
+    except AttributeError:
+        # pandas < 0.19 only has the one flag
+        return index.is_monotonic
+
+@instrumented
+def count_timestamps(series, freq='d', new_index=None, weights=None):
+    """
+    Counts how many timestamps fall in each period.
+
+    :param series: Series of datetime64 values. NaT's are ignored.
+    :param freq: Frequency to count by e.g. 'd', 'w', 'm'.
+    :param new_index: Date range to return counts for. Timestamps outside of
+                      it are ignored. Defaults to every period from the first
+                      to the last timestamp.
+    :param weights: Optional array-like of weights to sum instead of 
+                    counting, aligned with `series`. Counts are int64, sums
+                    of weights float.
 
+    .. note::
+        For the frequencies understood by :mod:`grigri.dates.ordinal` the 
+        timestamps are turned into integer bin numbers and counted with 
+        :func:`numpy.bincount` straight into an array the size of 
+        `new_index`; other frequencies, and a `new_index` that isn't 
+        labeled the way resample labels periods, go through a regular 
+        resample.
+    """
+
+    assert series.dtype.kind == 'M', "Series must have datetime64 datatype"
+
+    values = np.asarray(series.values, dtype='datetime64[ns]')
+
+    counting = weights is None
+    if counting:
+        weights = np.ones(len(values))
+    weights = np.asarray(weights, dtype=float)
+
+    target = None
+    if _is_binnable(freq):
+        if new_index is None:
+            ordinals = period_ordinals(values[~pd.isnull(values)], freq)
+            target = np.arange(0)
+            if len(ordinals):
+                target = np.arange(ordinals.min(), ordinals.max() + 1)
+            # label periods the same way resample does
+            new_index = ordinal_dates(target, freq, label='end')
+        else:
+            target = _target_periods(new_index, freq)
+
+    if target is None:
+        tseries = _resample(pd.Series(weights, index=series), freq, 'sum')
+        if new_index is not None:
+            tseries = tseries.reindex(new_index)
+        tseries = tseries.fillna(0)
+        return tseries.astype(np.int64) if counting else tseries
+
+    counts = _binned_reduce(values, weights, target, freq, 'sum',
+                            empty_value=0.)
+    if counting:
+        counts = counts.astype(np.int64)
+
+    return pd.Series(counts, index=new_index)
+
+@instrumented
 def resample_reindex(tseries, new_index, freq='d', how='mean',
                      fill_value=None):
     """
@@ -129,11 +390,567 @@ def resample_reindex(tseries, new_index, freq='d', how='mean',
     It is functionally equivalent to::
 
         tseries.resample(freq, how).reindex(new_index)
+
+    .. note::
+        For numeric Series and any of the 'sum', 'mean', 'count', 'min', 
+        'max', 'first' or 'last' reductions at a frequency understood by 
+        :mod:`grigri.dates.ordinal`, values are aggregated directly into bins
+        for `new_index` without building the intermediate resampled 
+        time-series. That needs `new_index` to be unique labels the way 
+        resample labels the periods, anything else falls back to resampling
+        and reindexing.
     """
 
-    tseries = tseries.resample(freq, how=how).reindex(new_index)
+    result, _ = _resample_reindex(tseries, new_index, freq, how)
 
     if fill_value is not None:
-        tseries = tseries.fillna(fill_value)
+        result = result.fillna(fill_value)
     
-    return tseries
\ No newline at end of file
+    return result
+
+def _resample_reindex(tseries, new_index, freq, how):
+    """
+    :func:`resample_reindex` without the filling. Also returns a boolean 
+    mask of the labels in `new_index` that the reindex added, i.e. that 
+    aren't labels of the resampled time-series.
+    """
+
+    target = None
+    if (isinstance(tseries, pd.Series) and how in _binned_hows and
+            tseries.index.dtype.kind == 'M' and 
+            tseries.dtype.kind in 'biuf' and _is_binnable(freq)):
+        target = _target_periods(new_index, freq)
+
+    if target is not None:
+        values = _binned_reduce(tseries.index.values, tseries.values, 
+                                target, freq, how)
+        result = pd.Series(values, index=new_index, name=tseries.name)
+
+        # resample labels every period from the first to the last timestamp
+        timestamps = tseries.index.values
+        timestamps = timestamps[~pd.isnull(timestamps)]
+        if len(timestamps):
+            first, last = period_ordinals([timestamps.min(), 
+                                           timestamps.max()], freq)
+            added = (target < first) | (target > last)
+        else:
+            added = np.ones(len(target), dtype=bool)
+        return result, added
+
+    resampled = _resample(tseries, freq, how)
+    added = ~pd.Index(new_index).isin(resampled.index)
+    return resampled.reindex(new_index), added
+
+_binned_hows = ('sum', 'mean', 'count', 'min', 'max', 'first', 'last')
+
+def _is_binnable(freq):
+    """Checks if `freq` is a frequency :func:`period_ordinals` understands."""
+
+    try:
+        period_ordinals([], freq)
+    except ValueError:
+        return False
+    return True
+
+def _target_periods(new_index, freq):
+    """
+    Period ordinals of the labels in `new_index`, or None if they aren't 
+    unique labels the way resample labels periods (e.g. month starts for a
+    monthly resample, or times other than midnight for a daily one). A
+    reindex of the resampled data only matches those labels, so anything 
+    else has to go through the real thing.
+    """
+
+    if getattr(new_index, 'tz', None) is not None:
+        return None
+
+    labels = np.asarray(new_index, dtype='datetime64[ns]')
+    if pd.isnull(labels).any():
+        return None
+
+    target = period_ordinals(labels, freq)
+    if len(np.unique(target)) != len(target):
+        return None
+    if not np.array_equal(ordinal_dates(target, freq, label='end').values, 
+                          labels):
+        return None
+
+    return target
+
+def _binned_reduce(timestamps, values, target, freq, how, 
+                   empty_value=float('nan')):
+    """
+    Aggregates `values` by the period of their `timestamps` directly into an
+    array aligned with `target`, the period ordinals of the new index (see
+    :func:`_target_periods`).
+
+    Mirrors what a resample followed by a reindex returns: periods with no 
+    values are `empty_value`, except for 'count', which is 0 inside the span
+    of the data and NaN outside of it (where the reindex adds the period).
+    """
+
+    timestamps = np.asarray(timestamps, dtype='datetime64[ns]')
+    values = np.asarray(values, dtype=float)
+
+    k = len(target)
+
+    present = ~pd.isnull(timestamps)
+    ordinals = period_ordinals(timestamps[present], freq)
+    values = values[present]
+
+    # resample ignores NaN values but they still stretch the data's span
+    span = (ordinals.min(), ordinals.max()) if len(ordinals) else (1, 0)
+
+    valid = ~np.isnan(values)
+    ordinals, values = ordinals[valid], values[valid]
+
+    if how in ('first', 'last'):
+        # bins are filled in time order, so make sure that is the order
+        order = np.argsort(timestamps[present][valid], kind='mergesort')
+        ordinals, values = ordinals[order], values[order]
+
+    positions = _target_positions(ordinals, target)
+    keep = positions >= 0
+    positions, values = positions[keep], values[keep]
+
+    counts = np.bincount(positions, minlength=k)
+    empty = counts == 0
+
+    if how == 'count':
+        result = counts.astype(float)
+        outside = (target < span[0]) | (target > span[1])
+        result[outside] = np.nan
+        return result
+
+    if how in ('sum', 'mean'):
+        result = np.bincount(positions, weights=values, minlength=k)
+        if how == 'mean':
+            result[~empty] /= counts[~empty]
+    elif how == 'min':
+        result = np.full(k, np.inf)
+        np.minimum.at(result, positions, values)
+    elif how == 'max':
+        result = np.full(k, -np.inf)
+        np.maximum.at(result, positions, values)
+    else:
+        result = np.zeros(k)
+        if how == 'last':
+            positions, values = positions[::-1], values[::-1]
+        # np.unique returns the index of the first occurrence of each bin
+        bins, first = np.unique(positions, return_index=True)
+        result[bins] = values[first]
+
+    result[empty] = empty_value
+    return result
+
+def _target_positions(ordinals, target):
+    """
+    Position of each ordinal within `target`, or -1 if it isn't in there.
+    """
+
+    if not len(target):
+        return np.full(len(ordinals), -1, dtype=np.int64)
+
+    # the usual case: new_index is a contiguous range of periods
+    if np.all(np.diff(target) == 1):
+        positions = ordinals - target[0]
+        positions[(positions < 0) | (positions >= len(target))] = -1
+        return positions
+
+    sorter = np.argsort(target, kind='mergesort')
+    found = np.searchsorted(target, ordinals, sorter=sorter)
+    found = np.minimum(found, len(target) - 1)
+    positions = sorter[found]
+    positions[target[positions] != ordinals] = -1
+
+    return positions
+
+
+# largest and smallest int64, used as timestamps that always lose when
+# picking the first or last value of a bin
+_latest_time = 2 ** 63 - 1
+_earliest_time = -2 ** 63
+
+_rollup_hows = ('count', 'sum', 'mean', 'min', 'max', 'first', 'last', 
+                'var', 'std', 'nunique')
+
+def _group_codes(columns):
+    """
+    Numbers the distinct combinations of values in a list of arrays, in
+    sorted order. Returns the code of each row (-1 where any value is null)
+    and the position of the first row of each code.
+    """
+
+    key = np.zeros(len(columns[0]), dtype=np.int64)
+    valid = np.ones(len(key), dtype=bool)
+    for values in columns:
+        codes, uniques = pd.factorize(values, sort=True)
+        valid &= codes >= 0
+        key = key * (len(uniques) + 1) + codes + 1
+
+    codes = np.full(len(key), -1, dtype=np.int64)
+    if valid.any():
+        _, first, inverse = np.unique(key[valid], return_index=True,
+                                      return_inverse=True)
+        codes[valid] = inverse.ravel()
+        first = np.flatnonzero(valid)[first]
+    else:
+        first = np.empty(0, dtype=np.int64)
+
+    return codes, first
+
+def _reduce_partials(partials, cells):
+    """
+    Combines partial aggregates sharing the same cell number. Returns the
+    unique cells (sorted), their combined partials and the position of every
+    partial's cell among the unique ones.
+    """
+
+    unique_cells, inverse = np.unique(cells, return_inverse=True)
+    inverse = inverse.ravel()
+    k = len(unique_cells)
+
+    if not k:
+        return unique_cells, {name: values[:0] 
+                              for name, values in partials.items()}, inverse
+
+    count = np.bincount(inverse, weights=partials['count'], minlength=k)
+    combined = {
+        'count': count,
+        'sum': np.bincount(inverse, weights=partials['sum'], minlength=k),
+    }
+
+    # Chan et al.'s parallel update for the variance: the squared deviations
+    # of the cell are those of its partials plus each partial's count times
+    # the squared distance of its mean to the cell's. Summing raw squares 
+    # instead cancels catastrophically for large values with a small spread
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = np.bincount(inverse, weights=partials['count'] * partials['mean'],
+                           minlength=k) / count
+    mean[count == 0] = 0.
+    combined['mean'] = mean
+    offset = partials['mean'] - mean[inverse]
+    combined['m2'] = np.bincount(
+        inverse, weights=partials['m2'] + partials['count'] * offset ** 2,
+        minlength=k)
+
+    combined['min'] = np.full(k, np.inf)
+    np.minimum.at(combined['min'], inverse, partials['min'])
+    combined['max'] = np.full(k, -np.inf)
+    np.maximum.at(combined['max'], inverse, partials['max'])
+
+    # the first value of a cell is the first value of its earliest partial
+    order = np.lexsort((partials['first_time'], inverse))
+    _, first = np.unique(inverse[order], return_index=True)
+    combined['first'] = partials['first'][order[first]]
+    combined['first_time'] = partials['first_time'][order[first]]
+
+    # and the last value that of its latest partial. The sort is stable so
+    # ties go to the partial that came last
+    order = np.lexsort((partials['last_time'], inverse))
+    sorted_cells = inverse[order]
+    last = np.flatnonzero(np.append(sorted_cells[1:] != sorted_cells[:-1], 
+                                    True))
+    combined['last'] = partials['last'][order[last]]
+    combined['last_time'] = partials['last_time'][order[last]]
+
+    # distinct count sketches, one row of registers per cell
+    if 'registers' in partials:
+        registers = partials['registers']
+        combined['registers'] = np.zeros((k, registers.shape[1]), 
+                                         dtype=registers.dtype)
+        np.maximum.at(combined['registers'], inverse, registers)
+
+    return unique_cells, combined, inverse
+
+
+def _dense_group_series(codes, periods, values, groups, by, freq, label,
+                        fill_value, date_column, name):
+    """
+    Lays out one value per (group code, period ordinal) cell as a Series 
+    indexed by group and date, filling in the periods missing inside each
+    group's span with `fill_value`. Cells must be unique.
+    """
+
+    n_groups = len(groups) if by else 1
+    starts = np.full(n_groups, np.iinfo(np.int64).max)
+    np.minimum.at(starts, codes, periods)
+    ends = np.full(n_groups, np.iinfo(np.int64).min)
+    np.maximum.at(ends, codes, periods)
+    lengths = np.where(ends >= starts, ends - starts + 1, 0)
+    offsets = np.cumsum(lengths) - lengths
+
+    dense_codes = np.repeat(np.arange(n_groups), lengths)
+    dense_periods = (np.arange(lengths.sum()) 
+                     - np.repeat(offsets, lengths) 
+                     + np.repeat(np.where(lengths, starts, 0), lengths))
+
+    result = np.full(len(dense_codes), fill_value)
+    result[offsets[codes] + periods - starts[codes]] = values
+
+    dates = ordinal_dates(dense_periods, freq, label=label)
+    dates.name = date_column
+
+    if by:
+        labels = groups.iloc[dense_codes]
+        arrays = [labels[col].values for col in by] + [dates]
+        index = pd.MultiIndex.from_arrays(arrays, names=by + [date_column])
+    else:
+        index = dates
+
+    return pd.Series(result, index=index, name=name)
+
+
+class Rollup(object):
+    """
+    Partial aggregates of a time-series per group and day that coarser
+    frequencies and broader groups can be derived from without going back
+    to the raw rows.
+
+    Every (group, day) keeps the count, sum, mean, sum of squared deviations
+    from the mean, min, max and first and last value of its rows. Counts and
+    sums add up, means and squared deviations combine with Chan et al.'s
+    parallel update, mins and maxes combine, and the first and last values
+    are picked by time, so weeks, months, quarters and years (with the same
+    boundaries as :func:`grigri.dates.scalar.first_of`) and totals over
+    fewer group columns come out as if the rows had been aggregated
+    directly.
+
+    >>> rollup = Rollup(calls, 'CallDate', 'Duration', groupby='Region')
+    >>> rollup.resample('m', how='mean')
+    >>> rollup.resample('q', how='sum', by=[])
+    >>> rollup = rollup.merge(Rollup(new_calls, 'CallDate', 'Duration',
+    ...                              groupby='Region'))
+
+    With a `distinct_column`, every cell also keeps a HyperLogLog sketch
+    (see :mod:`grigri.sketch`) of that column, and ``how='nunique'`` gives
+    approximate distinct counts for any period or grouping. Each sketch 
+    takes ``2 ** precision`` bytes, so mind the number of (group, day) cells.
+
+    :param frame: DataFrame of events.
+    :param date_column: Column with the timestamp of each event.
+    :param value_column: Column to aggregate. If not set every event counts
+                         as 1, like :func:`group_resample`.
+    :param groupby: Column name or list of column names to group by.
+    :param distinct_column: Column to count distinct values of, e.g. a
+                            customer id.
+    :param precision: Precision of the distinct count sketches, between 4
+                      and 18. The relative error is about 
+                      ``1.04 / sqrt(2 ** precision)``.
+    """
+
+    def __init__(self, frame, date_column, value_column=None, groupby=None,
+                 distinct_column=None, precision=DEFAULT_PRECISION):
+        if groupby is not None and not isinstance(groupby, list):
+            groupby = [groupby]
+
+        self.date_column = date_column
+        self.value_column = value_column
+        self.groupby = groupby
+        self.distinct_column = distinct_column
+        self.precision = precision
+
+        timestamps = np.asarray(frame[date_column], dtype='datetime64[ns]')
+        if value_column is None:
+            values = np.ones(len(frame))
+        else:
+            values = np.asarray(frame[value_column], dtype=float)
+
+        keep = ~pd.isnull(timestamps)
+        if groupby is not None:
+            codes, first = _group_codes([frame[col].values for col in groupby])
+            self.groups = frame[groupby].iloc[first].reset_index(drop=True)
+            keep &= codes >= 0
+        else:
+            codes = np.zeros(len(frame), dtype=np.int64)
+            self.groups = None
+
+        timestamps, values, codes = timestamps[keep], values[keep], codes[keep]
+        if distinct_column is not None:
+            hashes, hashed = hash_values(frame[distinct_column].values)
+            hashes, hashed = hashes[keep], hashed[keep]
+
+        # every row starts out as a partial aggregate of its own. Rows
+        # without a value still count towards their group's span of days
+        present = ~np.isnan(values)
+        times = timestamps.view(np.int64)
+        partials = {
+            'count': present.astype(float),
+            'sum': np.where(present, values, 0.),
+            'mean': np.where(present, values, 0.),
+            'm2': np.zeros(len(values)),
+            'min': np.where(present, values, np.inf),
+            'max': np.where(present, values, -np.inf),
+            'first': values,
+            'last': values,
+            'first_time': np.where(present, times, _latest_time),
+            'last_time': np.where(present, times, _earliest_time),
+        }
+
+        days = period_ordinals(timestamps, 'd')
+        inverse = self._set_partials(codes, days, partials)
+
+        if distinct_column is not None:
+            # sketch straight into the cells, one row of registers per 
+            # event would be far too big
+            self.partials['registers'] = sketch_cells(
+                inverse[hashed], hashes[hashed], len(self.days), precision)
+
+    def _set_partials(self, codes, days, partials):
+        # cells are numbered group-major so they come out sorted by group
+        # and then day
+        if len(days):
+            day_min = days.min()
+            span = days.max() - day_min + 1
+        else:
+            day_min, span = 0, 1
+
+        cells, self.partials, inverse = _reduce_partials(
+            partials, codes * span + days - day_min)
+        self.codes = cells // span
+        self.days = cells % span + day_min
+        return inverse
+
+    @classmethod
+    def _from_partials(cls, template, groups, codes, days, partials):
+        rollup = cls.__new__(cls)
+        rollup.date_column = template.date_column
+        rollup.value_column = template.value_column
+        rollup.groupby = template.groupby
+        rollup.distinct_column = template.distinct_column
+        rollup.precision = template.precision
+        rollup.groups = groups
+        rollup._set_partials(codes, days, partials)
+        return rollup
+
+    def __len__(self):
+        """Number of (group, day) cells."""
+
+        return len(self.days)
+
+    def merge(self, other):
+        """
+        Returns a new :class:`Rollup` combining this one with `other`, e.g.
+        one built from newly arrived rows. Both must have the same columns.
+        """
+
+        if (self.date_column, self.value_column, self.groupby,
+                self.distinct_column, self.precision) != \
+                (other.date_column, other.value_column, other.groupby,
+                 other.distinct_column, other.precision):
+            raise ValueError("Can only merge rollups of the same columns")
+
+        partials = {name: np.concatenate([self.partials[name], 
+                                          other.partials[name]])
+                    for name in self.partials}
+        days = np.concatenate([self.days, other.days])
+
+        if self.groupby is None:
+            groups = None
+            codes = np.zeros(len(days), dtype=np.int64)
+        else:
+            # renumber both sides' groups against their combined labels
+            labels = pd.concat([self.groups, other.groups], ignore_index=True)
+            label_codes, first = _group_codes([labels[col].values 
+                                               for col in self.groupby])
+            groups = labels.iloc[first].reset_index(drop=True)
+            codes = np.concatenate([
+                label_codes[:len(self.groups)][self.codes],
+                label_codes[len(self.groups):][other.codes],
+            ])
+
+        return self._from_partials(self, groups, codes, days, partials)
+
+    def resample(self, freq='d', how='mean', by=None, label='end', 
+                 new_index=None):
+        """
+        Aggregates the rollup to a frequency and returns a Series with the
+        same layout as :func:`group_resample`: one row per period from each
+        group's first period to its last, indexed by group and date.
+
+        :param freq: One of 'd', 'w', 'm', 'q' or 'y'.
+        :param how: One of 'count', 'sum', 'mean', 'min', 'max', 'first',
+                    'last', 'var', 'std' or 'nunique' (needs a 
+                    `distinct_column`). Periods without values are NaN,
+                    except for 'count' and 'nunique' which are 0.
+        :param by: Group columns to keep, defaults to all of them. Pass an 
+                   empty list for totals across every group, indexed by date
+                   only.
+        :param label: 'end' labels periods by their last day like pandas'
+                      resample, 'start' by their first day.
+        :param new_index: DatetimeIndex to align the result to, like
+                          :func:`resample_reindex`. Only when no group
+                          columns are kept.
+        """
+
+        if how not in _rollup_hows:
+            raise ValueError("Aggregation not recognized: {}".format(how))
+        if how == 'nunique' and self.distinct_column is None:
+            raise ValueError("nunique needs a rollup with a distinct_column")
+        name = self.distinct_column if how == 'nunique' else self.value_column
+
+        if by is None:
+            by = self.groupby or []
+        elif not isinstance(by, list):
+            by = [by]
+
+        unknown = [col for col in by if col not in (self.groupby or [])]
+        if unknown:
+            raise KeyError("Not grouped by: {}".format(unknown))
+
+        if by:
+            label_codes, first = _group_codes([self.groups[col].values
+                                               for col in by])
+            groups = self.groups[by].iloc[first].reset_index(drop=True)
+            codes = label_codes[self.codes]
+        else:
+            groups = None
+            codes = np.zeros(len(self.days), dtype=np.int64)
+
+        periods = period_ordinals(self.days.astype('datetime64[D]'), freq)
+        rollup = self._from_partials(self, groups, codes, periods, 
+                                     self.partials)
+        values = rollup._finalize(how)
+
+        if new_index is not None:
+            if by:
+                raise ValueError("new_index needs totals across groups (by=[])")
+            positions = _target_positions(rollup.days, 
+                                          period_ordinals(new_index, freq))
+            result = np.full(len(new_index), np.nan)
+            keep = positions >= 0
+            result[positions[keep]] = values[keep]
+            return pd.Series(result, index=new_index, name=name)
+
+        return _dense_group_series(rollup.codes, rollup.days, values, groups,
+                                   by, freq, label, 
+                                   0. if how in ('count', 'nunique') else np.nan,
+                                   self.date_column, name)
+
+    def _finalize(self, how):
+        """Turns the partials into the values of one aggregation."""
+
+        partials = self.partials
+        count = partials['count']
+        empty = count == 0
+
+        if how == 'nunique':
+            return estimate_registers(partials['registers'])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if how == 'count':
+                return count
+            if how == 'sum':
+                result = partials['sum'].copy()
+            elif how == 'mean':
+                result = partials['sum'] / count
+            elif how in ('var', 'std'):
+                result = partials['m2'] / (count - 1)
+                result[count < 2] = np.nan
+                if how == 'std':
+                    result = np.sqrt(result)
+            else:
+                result = partials[how].astype(float)
+
+        result[empty] = np.nan
+        return result